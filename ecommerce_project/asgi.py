@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_project.settings')
 
 application = get_asgi_application()
+
+# precompile every template so the first request on this worker doesn't parse them
+from shop.templateprofile import warm_up  # noqa: E402
+
+warm_up()
@@ -44,6 +44,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'shop.staticassets.StaticAssetMiddleware',  # no-op unless STATIC_ASSET_SERVING
+    'shop.templateprofile.TemplateProfilerMiddleware',  # no-op unless TEMPLATE_PROFILING
+    'shop.sessions.SessionWriteMetricsMiddleware',  # before SessionMiddleware: sees its save
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,11 +67,19 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'shop.pagecache.csrf_placeholder',
+                'shop.fragments.chrome',
             ],
         },
     },
 ]
 
+# Per-request template render times (X-Template-Profile header, /__debug__/templates/,
+# shop/templateprofile.py). Opt-in: wraps every template render.
+TEMPLATE_PROFILING = False
+# Compile every template into the cached loader when a worker starts (wsgi.py / asgi.py)
+TEMPLATE_WARMUP = True
+
 WSGI_APPLICATION = 'ecommerce_project.wsgi.application'
 
 
@@ -79,9 +90,57 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # WAL lets readers run while a checkout writes; IMMEDIATE takes the
+            # write lock at BEGIN so concurrent checkouts queue (up to `timeout`)
+            # instead of failing with "database is locked" on lock upgrade.
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Seconds a checkout keeps its stock hold before it is released (shop/inventory.py)
+STOCK_RESERVATION_TTL = 15 * 60
+
+# Cache (per process). Use a shared backend (Redis / Memcached) with several workers so
+# page-cache generations and login throttle buckets are seen by all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'belle-default',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Database sessions that count their writes (shop/sessions.py, `manage.py session_stats`)
+SESSION_ENGINE = 'shop.sessions'
+SESSION_WRITE_METRICS = True
+
+# Catalog response cache, invalidated by per-model generations (shop/pagecache.py)
+PAGE_CACHE = {
+    'ENABLED': True,
+    'SOFT_TTL': 5 * 60,         # then served stale while one worker rebuilds it
+    'HARD_TTL': 24 * 60 * 60,
+    'LOCK_TIMEOUT': 30,
+    'MISS_WAIT': 2.0,
+    'REBUILD_WORKERS': 2,
+}
+
+# Header / menu / footer template fragments (shop/fragments.py). Keys are versioned by the
+# chrome templates' source; bump CHROME_FRAGMENT_VERSION to invalidate them by hand.
+CHROME_FRAGMENT_TTL = 24 * 60 * 60
+CHROME_FRAGMENT_VERSION = 1
+
+# Login attempt token buckets, checked before password hashing (shop/throttling.py).
+# (capacity, seconds to refill); STORE 'cache' shares buckets across workers via CACHES.
+LOGIN_THROTTLE = {
+    'STORE': 'local',
+    'IP_RATE': (20, 60),
+    'EMAIL_RATE': (5, 300),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -125,10 +184,44 @@ STATICFILES_DIRS = [ BASE_DIR / 'static' ]  # dev-only folder for assets
 # You don't need to set it for dev, but it's fine to set:
 STATIC_ROOT = BASE_DIR / 'static_collected'  # used only if you run collectstatic
 
+# collectstatic writes content-hashed names (name.<hash>.ext + staticfiles.json) and
+# precompressed .gz / .br siblings to STATIC_ROOT (shop/staticassets.py). With DEBUG off,
+# {% static %} links the hashed names, so `manage.py collectstatic --noinput` is a required
+# step of every deploy: without it, pages still render (unhashed names, manifest_strict off)
+# but the assets are served without the immutable caching and precompression.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'shop.staticassets.PrecompressedManifestStaticFilesStorage'},
+    # catalog image uploads, stored once per content under MEDIA_ROOT/blobs/ (shop/storage.py)
+    'blobs': {'BACKEND': 'shop.storage.ContentAddressedStorage'},
+}
+# Serve STATIC_ROOT from StaticAssetMiddleware (encoding negotiation, immutable caching,
+# FileResponse). runserver with DEBUG on serves static/ itself.
+STATIC_ASSET_SERVING = not DEBUG
+STATIC_ASSET_MAX_AGE = 60  # seconds, for names without a content hash
+
 # Media files (product images)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Responsive WebP + JPEG derivatives of catalog images under MEDIA_ROOT/derivatives/,
+# written on save and by `manage.py backfill_image_derivatives` (shop/images.py)
+IMAGE_DERIVATIVES = {
+    'WIDTHS': (240, 360, 540, 720),
+    'WEBP_QUALITY': 78,
+    'JPEG_QUALITY': 80,
+    'SIZES': '(min-width: 768px) 33vw, 50vw',  # listing cards: 3 per row on desktop, 2 on mobile
+}
+
+# On-demand resizes at /img/<w>x<h>/<media path> (shop/imagecache.py); only SIZES are served
+# (h 0 = keep aspect). Results go to a disk cache trimmed least-recently-used past MAX_BYTES.
+IMAGE_RESIZE = {
+    'SIZES': ('240x0', '360x0', '540x0', '720x0', '360x504'),
+    'CACHE_DIR': BASE_DIR / 'var' / 'imgcache',
+    'MAX_BYTES': 256 * 1024 * 1024,
+    'QUALITY': 80,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
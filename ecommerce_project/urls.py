@@ -28,3 +28,7 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+
+if getattr(settings, 'TEMPLATE_PROFILING', False):
+    from shop.templateprofile import report_view
+    urlpatterns += [path('__debug__/templates/', report_view, name='template_profile')]
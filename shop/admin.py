@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django import forms
-from .models import Category, Product,Customer_Table,CustomerOrder,Cosmetic,Jewellery,Bag,Shoes,ContactMessage,Wishlist, Cart, CartItem
+from .models import Category, Product,Customer_Table,CustomerOrder,Cosmetic,Jewellery,Bag,Shoes,ContactMessage,Wishlist, Cart, CartItem, Stock, StockReservation
 from django.utils.html import format_html
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .exports import stream_orders, filter_orders, CONTENT_TYPES
+from .money import format_cents, item_cents
 
 @admin.register(Customer_Table)
 class CustomerAdmin(admin.ModelAdmin):
@@ -69,11 +73,34 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(CustomerOrder)
 class CustomerOrderAdmin(admin.ModelAdmin):
     list_display = (
-        'id','customer_id', 'first_name', 'last_name', 'email', 'telephone', 'total_price', 'payment_method', 'created_at'
+        'id','customer_id', 'first_name', 'last_name', 'email', 'telephone', 'total_display', 'payment_method', 'created_at'
     )
     list_filter = ('payment_method', 'created_at', 'country', 'region_state')
-    search_fields = ('first_name', 'last_name', 'email', 'telephone', 'city', 'postcode')
-    readonly_fields = ('created_at', 'order_items_pretty')
+    search_fields = ('=customer_id', 'first_name', 'last_name', 'email', 'telephone', 'city', 'postcode')
+    readonly_fields = ('created_at', 'total_display', 'order_items_pretty')
+    date_hierarchy = 'created_at'
+    actions = ('export_orders_csv', 'export_orders_ndjson')
+
+    def _export_response(self, queryset, fmt):
+        """
+        Stream the selected orders (respects changelist filters / date hierarchy /
+        customer search) as one row per line item without loading them into memory.
+        """
+        response = StreamingHttpResponse(
+            stream_orders(filter_orders(queryset), fmt=fmt),
+            content_type=CONTENT_TYPES[fmt],
+        )
+        stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+        response['Content-Disposition'] = f'attachment; filename="orders-{stamp}.{fmt}"'
+        return response
+
+    def export_orders_csv(self, request, queryset):
+        return self._export_response(queryset, 'csv')
+    export_orders_csv.short_description = 'Export selected orders as CSV (one row per item)'
+
+    def export_orders_ndjson(self, request, queryset):
+        return self._export_response(queryset, 'ndjson')
+    export_orders_ndjson.short_description = 'Export selected orders as NDJSON (one row per item)'
 
     def order_items_pretty(self, obj):
         """Render order items as HTML table in admin detail"""
@@ -87,10 +114,10 @@ class CustomerOrderAdmin(admin.ModelAdmin):
             for item in obj.order_items:
                 html += f'<tr>'
                 html += f'<td style="border:1px solid #ccc;padding:5px;">{item.get("product_name")}</td>'
-                html += f'<td style="border:1px solid #ccc;padding:5px;">${item.get("price")}</td>'
+                html += f'<td style="border:1px solid #ccc;padding:5px;">${format_cents(item_cents(item, "price"))}</td>'
                 html += f'<td style="border:1px solid #ccc;padding:5px;">{item.get("size")}</td>'
                 html += f'<td style="border:1px solid #ccc;padding:5px;">{item.get("quantity")}</td>'
-                html += f'<td style="border:1px solid #ccc;padding:5px;">${item.get("subtotal")}</td>'
+                html += f'<td style="border:1px solid #ccc;padding:5px;">${format_cents(item_cents(item, "subtotal"))}</td>'
                 html += '</tr>'
             html += '</table>'
             return format_html(html)  # ✅ Render HTML safely
@@ -105,7 +132,7 @@ class CustomerOrderAdmin(admin.ModelAdmin):
             )
         }),
         ('Order Info', {
-            'fields': ('payment_method', 'order_notes', 'total_price', 'order_items_pretty', 'created_at')
+            'fields': ('payment_method', 'order_notes', 'total_display', 'order_items_pretty', 'created_at')
         }),
     )
 
@@ -229,3 +256,21 @@ class CartItemAdmin(admin.ModelAdmin):
     search_fields = ('product_title', 'cart__customer__email')
     list_filter = ('size',)
     readonly_fields = ('created', 'updated')
+
+
+@admin.register(Stock)
+class StockAdmin(admin.ModelAdmin):
+    list_display = ('id', 'category', 'item_id', 'size', 'quantity')
+    list_editable = ('quantity',)
+    list_filter = ('category', 'size')
+    search_fields = ('=item_id',)
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'stock', 'holder', 'quantity', 'expires_at', 'created')
+    list_filter = ('expires_at',)
+    readonly_fields = ('stock', 'holder', 'quantity', 'expires_at', 'created')
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        # connects the catalog save/delete signals that invalidate cached pages
+        from . import pagecache  # noqa: F401
+        # generates responsive image derivatives when catalog images are saved
+        from . import images  # noqa: F401
+        # reference counts for the content-addressed catalog images
+        from . import mediarefs  # noqa: F401
@@ -0,0 +1,53 @@
+# shop/benchutils.py
+"""Helpers shared by the bench_* / loadtest_* management commands."""
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+
+
+@contextmanager
+def throwaway_sqlite_db(prefix='bench_'):
+    """
+    Run the block against a freshly migrated, file-backed SQLite database
+    (same OPTIONS as the configured one, so WAL / IMMEDIATE apply), then drop it.
+    The configured database is never touched.
+    """
+    if connection.vendor != 'sqlite':
+        raise CommandError('This command only runs against the sqlite3 backend')
+    tmpdir = tempfile.mkdtemp(prefix=prefix)
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def journal_mode():
+    with connection.cursor() as cur:
+        cur.execute('PRAGMA journal_mode')
+        return cur.fetchone()[0]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list (0 for empty)."""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def git_revision():
+    """Current commit hash (or None outside a git checkout)."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,81 @@
+# shop/cards.py
+"""
+Compact card objects for the product listings (women_shop / men_shop and
+the homepage carousels, shop/homepage.py).
+
+A listing needs a dozen columns per product, not the model: it reads one
+.values() projection (CARD_FIELDS - no description, slug or timestamps) and
+builds a slotted ProductCard per row, once, with everything the card
+template uses already resolved:
+
+    for row in qs.values(*CARD_FIELDS):
+        card = ProductCard.from_row(row, urls)
+
+No model instances, no per-object __dict__ / _state, no image FieldFile
+objects and no attributes patched on afterwards. A card quacks like a
+Product where the templates care: product_id / pk, title, price, the image
+URLs and stored names (image / hover_image), the ImageMeta fields for
+{% responsive_img ... meta=card %} and membership (shop/membership.py packs
+it like a Product).
+"""
+from django.templatetags.static import static
+
+from .models import Product
+
+CARD_FIELDS = (
+    'product_id', 'title', 'price', 'image', 'hover_image', 'sizes', 'colors', 'collection_cat',
+    'image_width', 'image_height', 'image_color', 'image_placeholder',
+)
+
+
+class CardURLs:
+    """Storage + placeholders resolved once per listing, not per card."""
+    __slots__ = ('image_storage', 'hover_storage', 'placeholder', 'placeholder_hover')
+
+    def __init__(self, placeholder, placeholder_hover):
+        self.image_storage = Product._meta.get_field('image').storage
+        self.hover_storage = Product._meta.get_field('hover_image').storage
+        self.placeholder = static(placeholder)
+        self.placeholder_hover = static(placeholder_hover)
+
+
+class ProductCard:
+    __slots__ = (
+        'product_id', 'title', 'price', 'image', 'hover_image', 'image_url', 'hover_url', 'sizes_list', 'colors_list',
+        'collections', 'image_width', 'image_height', 'image_color', 'image_placeholder',
+    )
+    card_category = 'product'  # shop/membership.py category
+
+    @classmethod
+    def from_row(cls, row, urls):
+        card = cls()
+        card.product_id = row['product_id']
+        card.title = row['title']
+        card.price = row['price']
+        image = card.image = row['image']
+        hover = card.hover_image = row['hover_image']
+        card.image_url = urls.image_storage.url(image) if image else urls.placeholder
+        if hover:
+            card.hover_url = urls.hover_storage.url(hover)
+        else:
+            card.hover_url = card.image_url if image else urls.placeholder_hover
+        card.sizes_list = tuple(row['sizes'] or ())
+        card.colors_list = tuple(row['colors'] or ())
+        card.collections = tuple(row['collection_cat'] or ())
+        card.image_width = row['image_width']
+        card.image_height = row['image_height']
+        card.image_color = row['image_color']
+        card.image_placeholder = row['image_placeholder']
+        return card
+
+    @property
+    def pk(self):
+        return self.product_id
+
+    def __repr__(self):
+        return f'<ProductCard {self.product_id}: {self.title}>'
+
+
+def product_cards(qs, urls):
+    """Cards for a Product queryset, in its order."""
+    return [ProductCard.from_row(row, urls) for row in qs.values(*CARD_FIELDS)]
@@ -0,0 +1,86 @@
+# shop/conditional.py
+"""
+Conditional GET for the catalog detail pages (product / cosmetic / jewellery /
+bags / shoes _info).
+
+    @detail_conditional(Product, 'pk', 'shop/product_info.html', related=(Category,))
+    @page_cache(Product, Category)
+    def product_info(request, pk): ...
+
+Before the view (and before the page cache) one primary-key lookup reads the
+item's `updated`; with it the ETag covers everything the page shows:
+
+  - the item's `updated` and the page-cache generation of `related` models
+    (e.g. the product's category)
+  - the visitor's variant (login / cart / wishlist state, pagecache.variant)
+    and CSRF cookie, since the page embeds both
+  - the page template and the chrome (fragments.chrome_version), so a
+    deploy never answers with an old page
+
+A matching If-None-Match gets a 304 without rendering. Last-Modified
+(= updated) is only sent for the shared anonymous variant, where the item
+is the only thing that can change. Responses are `private, no-cache`: the
+browser keeps the page but revalidates every time, which now costs a 304.
+Requests with pending flash messages always render.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.template.loader import get_template
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .fragments import chrome_version
+from .pagecache import generations, variant
+
+_template_digests = {}
+
+
+def _template_digest(name):
+    digest = _template_digests.get(name)
+    if digest is None:
+        digest = _template_digests[name] = hashlib.sha1(get_template(name).template.source.encode()).hexdigest()
+    return digest
+
+
+def detail_conditional(model, pk_kwarg, template, related=()):
+    def decorator(view):
+        def updated(request, kwargs):
+            # one indexed lookup per request, shared by the ETag and Last-Modified
+            if not hasattr(request, '_detail_updated'):
+                request._detail_updated = (
+                    model.objects.filter(pk=kwargs[pk_kwarg]).values_list('updated', flat=True).first()
+                )
+            return request._detail_updated
+
+        def etag(request, *args, **kwargs):
+            stamp = updated(request, kwargs)
+            if stamp is None:
+                return None  # 404 from the view
+            raw = '|'.join(map(str, [
+                model._meta.label_lower, kwargs[pk_kwarg], stamp.isoformat(),
+                generations(related) if related else '',
+                variant(request), request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+                _template_digest(template), chrome_version(),
+            ]))
+            return hashlib.sha1(raw.encode()).hexdigest()
+
+        def last_modified(request, *args, **kwargs):
+            if variant(request) != 'anon':
+                return None
+            return updated(request, kwargs)
+
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
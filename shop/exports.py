@@ -0,0 +1,143 @@
+# shop/exports.py
+"""
+Streaming CustomerOrder exports (CSV / NDJSON).
+
+Orders are read with .iterator(chunk_size=...) and every order is flattened
+into one row per line item lazily, so memory stays flat no matter how many
+orders are exported. Used by the admin export actions and by the
+`export_orders` management command.
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import CustomerOrder
+from .money import item_cents
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# order columns copied onto every flattened line item row
+ORDER_FIELDS = (
+    'id', 'customer_id', 'created_at', 'first_name', 'last_name', 'email',
+    'telephone', 'city', 'postcode', 'country', 'region_state',
+    'payment_method', 'total_cents',
+)
+ITEM_FIELDS = ('product_name', 'size', 'quantity', 'price_cents', 'subtotal_cents', 'session_key')
+# amounts read through money.item_cents so legacy float rows export as cents too
+ITEM_MONEY_FIELDS = {'price_cents': 'price', 'subtotal_cents': 'subtotal'}
+
+# header: order columns + item columns prefixed with "item_"
+EXPORT_COLUMNS = ORDER_FIELDS + tuple(f'item_{f}' for f in ITEM_FIELDS)
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() just returns the value (for csv.writer)."""
+    def write(self, value):
+        return value
+
+
+def parse_date_bound(value, end=False):
+    """
+    Parse 'YYYY-MM-DD' or an ISO datetime into an aware datetime.
+    For plain dates, end=True returns the end of that day (inclusive bound).
+    Returns None for empty values, raises ValueError for garbage.
+    """
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            raise ValueError(f"Invalid date: {value!r}")
+        dt = datetime.combine(d, time.max if end else time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def filter_orders(queryset=None, date_from=None, date_to=None, customer_id=None):
+    """
+    Apply the export filters (created_at range + customer) and a stable order.
+    date_from / date_to may be datetimes or strings accepted by parse_date_bound.
+    """
+    qs = CustomerOrder.objects.all() if queryset is None else queryset
+    if isinstance(date_from, str):
+        date_from = parse_date_bound(date_from)
+    if isinstance(date_to, str):
+        date_to = parse_date_bound(date_to, end=True)
+    if date_from:
+        qs = qs.filter(created_at__gte=date_from)
+    if date_to:
+        qs = qs.filter(created_at__lte=date_to)
+    if customer_id:
+        qs = qs.filter(customer_id=customer_id)
+    return qs.order_by('id').only(*ORDER_FIELDS, 'order_items')
+
+
+def _order_items(order):
+    """Return order_items as a list (older rows may hold a JSON string or a single dict)."""
+    items = order.order_items
+    if isinstance(items, str):
+        try:
+            items = json.loads(items)
+        except json.JSONDecodeError:
+            items = []
+    if isinstance(items, dict):
+        items = [items]
+    return items or []
+
+
+def iter_order_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield one flat dict per order line item (orders without items yield a
+    single row with empty item columns). Nothing is materialised beyond the
+    current DB chunk.
+    """
+    for order in queryset.iterator(chunk_size=chunk_size):
+        base = {f: getattr(order, f) for f in ORDER_FIELDS}
+        base['created_at'] = order.created_at.isoformat() if order.created_at else ''
+        items = _order_items(order)
+        if not items:
+            yield dict(base, **{f'item_{f}': '' for f in ITEM_FIELDS})
+            continue
+        for item in items:
+            row = dict(base)
+            if not isinstance(item, dict):
+                item = {}
+            for f in ITEM_FIELDS:
+                if f in ITEM_MONEY_FIELDS:
+                    row[f'item_{f}'] = item_cents(item, ITEM_MONEY_FIELDS[f])
+                else:
+                    row[f'item_{f}'] = item.get(f, '')
+            yield row
+
+
+def stream_csv(rows):
+    """Yield CSV lines (header first) for the given row dicts."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow([row[c] for c in EXPORT_COLUMNS])
+
+
+def stream_ndjson(rows):
+    """Yield one JSON document per line for the given row dicts."""
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def stream_orders(queryset, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return a generator of text chunks for the export in the requested format."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    rows = iter_order_rows(queryset, chunk_size=chunk_size)
+    return stream_csv(rows) if fmt == 'csv' else stream_ndjson(rows)
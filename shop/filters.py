@@ -0,0 +1,89 @@
+# shop/filters.py
+"""
+Canonical filter URLs for the women_shop / men_shop listings.
+
+The listings accept repeated collection / price / size / color / brand params.
+Order, duplicates and casing don't change the page, but every variant is a
+different URL to page caches, CDNs and crawlers. canonical_filter_url
+301-redirects any non-canonical query string to the single canonical one:
+
+  - params in the filter form's order: collection, price, size, color, brand
+  - values matched case-insensitively against the model CHOICES (and the
+    fixed price ranges), deduped and listed in CHOICES order
+  - unknown params / values dropped
+
+The views build their checkbox lists in the same order, so a submitted filter
+form is already canonical and doesn't pay for the extra redirect.
+"""
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.http import HttpResponsePermanentRedirect
+
+from .models import Product
+
+PRICE_STEP = 50
+PRICE_MAX = 500
+
+
+def _price_ranges():
+    """[(filter value, label)] -> ("0-50", "$0 - $50"), ("51-100", "$50 - $100"), ..."""
+    ranges = []
+    for i in range(0, PRICE_MAX, PRICE_STEP):
+        low = i if i == 0 else i + 1
+        ranges.append((f"{low}-{i + PRICE_STEP}", f"${i} - ${i + PRICE_STEP}"))
+    return ranges
+
+
+PRICE_RANGES = _price_ranges()
+
+# GET param -> allowed values in canonical order (dict order = form order)
+FILTER_CHOICES = {
+    'collection': [value for value, _ in Product.COLLECTION_CHOICES],
+    'price': [value for value, _ in PRICE_RANGES],
+    'size': [value for value, _ in Product.SIZE_CHOICES],
+    'color': [value for value, _ in Product.COLOR_CHOICES],
+    'brand': [value for value, _ in Product.BRAND_CHOICES],
+}
+
+# lowercased value -> canonical value, per param
+_LOOKUP = {
+    param: {value.lower(): value for value in values}
+    for param, values in FILTER_CHOICES.items()
+}
+_RANK = {
+    param: {value: n for n, value in enumerate(values)}
+    for param, values in FILTER_CHOICES.items()
+}
+
+
+def canonical_filters(query):
+    """{param: [canonical values]} for a QueryDict (unknown params/values dropped)."""
+    filters = {}
+    for param, lookup in _LOOKUP.items():
+        values = {lookup.get(v.strip().lower()) for v in query.getlist(param)} - {None}
+        if values:
+            filters[param] = sorted(values, key=_RANK[param].__getitem__)
+    return filters
+
+
+def canonical_query_string(filters):
+    return urlencode([(param, value) for param, values in filters.items() for value in values])
+
+
+def order_like_choices(param, values):
+    """The given values that are valid for `param`, in canonical order."""
+    present = set(values)
+    return [value for value in FILTER_CHOICES[param] if value in present]
+
+
+def canonical_filter_url(view):
+    """301 a listing GET to its canonical filter query string (before any page cache)."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            canonical = canonical_query_string(canonical_filters(request.GET))
+            if canonical != request.META.get('QUERY_STRING', ''):
+                return HttpResponsePermanentRedirect(request.path + (f'?{canonical}' if canonical else ''))
+        return view(request, *args, **kwargs)
+    return wrapper
@@ -3,6 +3,7 @@ from django import forms
 from django.contrib.auth.models import User
 from .models import Customer_Table
 from django.contrib.auth.hashers import make_password
+from .hashing import amake_password
 from .models import ContactMessage
 
 class CheckoutForm(forms.Form):
@@ -37,6 +38,13 @@ class SignUpForm(forms.ModelForm):
         if commit:
             customer.save()
         return customer
+
+    async def asave(self):
+        """save() for async views: hashes on the bounded hashing pool, async ORM insert."""
+        customer = super().save(commit=False)
+        customer.password = await amake_password(self.cleaned_data['password'])
+        await customer.asave()
+        return customer
     
 
 class ContactForm(forms.ModelForm):
@@ -0,0 +1,51 @@
+# shop/fragments.py
+"""
+Versioned keys for the cached page chrome ({% cache %} fragments in
+shop/root.html and shop/base.html: header, mega-menu, mobile menu, footer).
+
+The chrome is identical for every visitor; the per-user bits (login / logout
+link, cart badge) are left outside the fragments as holes (shop/holes.py).
+
+chrome_version changes whenever one of the chrome templates changes (hash of
+their source), collectstatic writes a new manifest (the fragments embed hashed
+{% static %} URLs) or CHROME_FRAGMENT_VERSION is bumped in settings (e.g. after
+a URL change), so stale fragments are never served after a deploy and no
+cache flush is needed.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.loader import get_template
+
+CHROME_TEMPLATES = ('shop/root.html', 'shop/base.html')
+
+_version = None
+
+
+def chrome_version():
+    global _version
+    if _version is None:
+        digest = hashlib.sha1(str(getattr(settings, 'CHROME_FRAGMENT_VERSION', '')).encode())
+        for name in CHROME_TEMPLATES:
+            digest.update(get_template(name).template.source.encode())
+        digest.update(str(getattr(staticfiles_storage, 'manifest_hash', '')).encode())
+        _version = digest.hexdigest()[:12]
+    return _version
+
+
+def chrome(request):
+    """Context processor: key version + timeout for the chrome fragments."""
+    return {
+        'chrome_version': chrome_version(),
+        'chrome_ttl': getattr(settings, 'CHROME_FRAGMENT_TTL', 24 * 60 * 60),
+    }
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _version
+    if setting in ('CHROME_FRAGMENT_VERSION', 'TEMPLATES', 'STORAGES', 'STATIC_ROOT'):
+        _version = None
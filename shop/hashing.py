@@ -0,0 +1,62 @@
+# shop/hashing.py
+"""
+Password hashing for the async auth views.
+
+PBKDF2 takes hundreds of milliseconds of CPU. Awaiting it through Django's own
+acheck_password / sync_to_async (thread_sensitive=True) runs every hash on the
+single shared sync thread, so concurrent logins queue behind each other; a
+plain blocking call would stall the event loop outright.
+
+Instead hashes run on a dedicated, bounded thread pool (hashlib releases the
+GIL while hashing, so the workers really run in parallel). The bound keeps a
+burst from spawning unlimited threads; excess work waits in the pool queue
+without blocking the loop.
+
+    PASSWORD_HASHING_WORKERS = 4   # settings, default: min(4, CPU count)
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def hashing_workers():
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or min(4, os.cpu_count() or 1)
+
+
+def get_hashing_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=hashing_workers(), thread_name_prefix='password-hash')
+    return _executor
+
+
+async def acheck_password(password, encoded):
+    loop = asyncio.get_running_loop()
+    # setter=None: never rehash/save from the pool thread (no DB access there)
+    return await loop.run_in_executor(get_hashing_executor(), check_password, password, encoded, None)
+
+
+async def amake_password(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), make_password, password)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _executor
+    if setting == 'PASSWORD_HASHING_WORKERS':
+        with _executor_lock:
+            old, _executor = _executor, None
+        if old is not None:
+            old.shutdown(wait=False)
@@ -0,0 +1,100 @@
+# shop/holes.py
+"""
+Personalization holes: the per-visitor bits of a page-cached page.
+
+The page cache (shop/pagecache.py) stores ONE copy of each catalog page for
+every visitor - anonymous, logged in, with or without a cart. Whatever
+differs per visitor is left as a hole while the page is captured:
+
+    {% load hole_extras %}
+    {% hole 'account' %}                     login / logout link
+    {% hole 'cart_count' %}                  cart badge
+    {% hole 'messages' %}                    flash messages
+    {% hole 'wishlist_active' product %}     ' active' on the wishlist heart
+    {% hole 'cart_label' product %}          'In Cart' / 'Add To Cart'
+
+A hole renders as a short token (__PAGE_CACHE_HOLE:name[:arg]__) in the
+stored HTML and fill() swaps every token for the requesting visitor's value
+in one pass when the page is served - like the CSRF placeholder, and with no
+query beyond the wishlist set shop/membership.py keeps in the session.
+Outside a capture, {% hole %} renders the value straight away, except
+'messages', which only pages served from the cache need (other pages list
+messages themselves).
+"""
+import re
+
+from django.contrib.messages import get_messages
+from django.template.loader import render_to_string
+
+from .membership import pack_object, wishlist_members, cart_members
+
+# set on the request while the page cache renders a view for storing
+CAPTURE_ATTR = '_page_cache_capturing'
+
+TOKEN_PREFIX = '__PAGE_CACHE_HOLE:'
+TOKEN_RE = re.compile(rb'__PAGE_CACHE_HOLE:([a-z_]+)(?::(\d+))?__')
+
+
+def capturing(request):
+    return bool(getattr(request, CAPTURE_ATTR, False))
+
+
+def _account(request, arg):
+    return render_to_string('shop/holes/account.html', {'customer_id': request.session.get('customer_id')})
+
+
+def _cart_count(request, arg):
+    return str(request.session.get('cart_count') or 0)
+
+
+def _messages(request, arg):
+    storage = get_messages(request)
+    if not len(storage):
+        return ''
+    return render_to_string('shop/holes/messages.html', {'messages': storage})
+
+
+def _wishlist_active(request, packed):
+    return ' active' if packed in wishlist_members(request) else ''
+
+
+def _cart_label(request, packed):
+    return 'In Cart' if packed in cart_members(request) else 'Add To Cart'
+
+
+# name -> (render(request, packed item or None), takes an item, rendered outside captures)
+HOLES = {
+    'account': (_account, False, True),
+    'cart_count': (_cart_count, False, True),
+    'messages': (_messages, False, False),
+    'wishlist_active': (_wishlist_active, True, True),
+    'cart_label': (_cart_label, True, True),
+}
+
+
+def hole(request, name, obj=None):
+    """The token for `name` while capturing, the visitor's value otherwise."""
+    render, takes_item, live = HOLES[name]
+    packed = pack_object(obj) if takes_item else None
+    if takes_item and packed is None:
+        return render(request, None)  # not a catalog item: nothing to personalize
+    if capturing(request):
+        return f'{TOKEN_PREFIX}{name}:{packed}__' if takes_item else f'{TOKEN_PREFIX}{name}__'
+    return render(request, packed) if live else ''
+
+
+def fill(request, content):
+    """Replace every hole token in `content` (bytes) with this visitor's value."""
+    if TOKEN_PREFIX.encode() not in content:
+        return content
+    values = {}
+
+    def value(match):
+        name, arg = match.group(1).decode(), match.group(2)
+        key = (name, arg)
+        if key not in values:
+            render = HOLES[name][0] if name in HOLES else None
+            values[key] = render(request, int(arg) if arg else None).encode() if render else b''
+        return values[key]
+
+    return TOKEN_RE.sub(value, content)
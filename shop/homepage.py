@@ -0,0 +1,99 @@
+# shop/homepage.py
+"""
+Homepage composer: the four product carousels of `index` from one query.
+
+    context = homepage_context()
+
+Each carousel is the newest PER_SECTION available products of one category
+slug (SECTIONS). Instead of a Category lookup plus a products query per
+section, one window query ranks the products of all four categories:
+
+    SELECT ... ROW_NUMBER() OVER (PARTITION BY category_id ORDER BY created DESC) AS rank
+    ... WHERE category.slug IN (...) AND available  ->  rank <= PER_SECTION
+
+and its rows become slotted cards (shop/cards.py), grouped by slug. A slug
+with no category is logged and its carousel filled with the newest
+products overall (one extra, bounded query) - never the whole table.
+
+The composed context is cached under a key versioned by the page-cache
+generations of Product and Category (shop/pagecache.py), which their
+post_save / post_delete signals bump: any catalog change composes a fresh
+context on the next hit and no TTL has to be guessed.
+
+Settings (optional):
+
+    HOMEPAGE_CACHE_TTL = 60 * 60   # seconds an unchanged composition is kept
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .cards import CARD_FIELDS, CardURLs, ProductCard
+from .models import Category, Product
+from .pagecache import generations
+
+logger = logging.getLogger(__name__)
+
+# context name -> category slug
+SECTIONS = {
+    'womens_products': 'women_dresses',
+    'mens_products': 'mens_wear',
+    'women_featured_products': 'women_featured_collection',
+    'men_featured_products': 'men_featured_collection',
+}
+PER_SECTION = 6
+
+PLACEHOLDER = 'images/product-images/placeholder.jpg'
+PLACEHOLDER_HOVER = 'images/product-images/placeholder_hover.jpg'
+
+
+def ranked_rows(slugs, limit):
+    """The newest `limit` available products per category slug, in one query."""
+    return (
+        Product.objects
+        .filter(available=True, category__slug__in=slugs)
+        .annotate(
+            section=F('category__slug'),
+            rank=Window(RowNumber(), partition_by=F('category_id'), order_by=[F('created').desc(), F('pk').desc()]),
+        )
+        .filter(rank__lte=limit)
+        .order_by('section', 'rank')
+        .values(*CARD_FIELDS, 'section')
+    )
+
+
+def compose(limit=PER_SECTION):
+    """The carousel context: {context name: [ProductCard, ...]}."""
+    urls = CardURLs(PLACEHOLDER, PLACEHOLDER_HOVER)
+    by_slug = {slug: [] for slug in SECTIONS.values()}
+    for row in ranked_rows(list(by_slug), limit):
+        by_slug[row['section']].append(ProductCard.from_row(row, urls))
+
+    missing = [slug for slug, cards in by_slug.items() if not cards]
+    if missing:
+        existing = set(Category.objects.filter(slug__in=missing).values_list('slug', flat=True))
+        absent = [slug for slug in missing if slug not in existing]
+        if absent:
+            logger.warning('homepage: no category %s; showing the newest products instead', ', '.join(absent))
+            newest = [ProductCard.from_row(row, urls) for row in
+                      Product.objects.filter(available=True).order_by('-created', '-pk').values(*CARD_FIELDS)[:limit]]
+            for slug in absent:
+                by_slug[slug] = newest
+    return {name: by_slug[slug] for name, slug in SECTIONS.items()}
+
+
+def _cache_key():
+    return 'homepage:context:' + ':'.join(map(str, generations((Product, Category))))
+
+
+def homepage_context():
+    """compose(), cached until the next Product / Category change."""
+    key = _cache_key()
+    context = cache.get(key)
+    if context is None:
+        context = compose()
+        cache.set(key, context, timeout=getattr(settings, 'HOMEPAGE_CACHE_TTL', 60 * 60))
+    return context
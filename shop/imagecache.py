@@ -0,0 +1,277 @@
+# shop/imagecache.py
+"""
+On-demand resized copies of media images: /img/<w>x<h>/<path under MEDIA_ROOT>.
+
+    /img/360x0/products/product-image1.jpg    360px wide, height from aspect
+    /img/360x504/products/product-image1.jpg  fitted inside 360x504
+
+Only the sizes listed in IMAGE_RESIZE['SIZES'] are served (anything else is a
+404), so the endpoint can't be used to fill the disk with arbitrary sizes.
+Images are never upscaled. Clients that accept image/webp get WebP, others
+JPEG (Vary: Accept).
+
+Results live in a size-bounded disk cache (CACHE_DIR, MAX_BYTES):
+  - the file name is a digest of (source path, source mtime + size, size,
+    format, QUALITY, VERSION), which is also the strong ETag - the same
+    inputs always give the same bytes, and a replaced original gets a new
+    name, so nothing is ever served stale
+  - LRU: a hit bumps the file's mtime; when the cache grows past MAX_BYTES
+    the least recently used files are deleted down to 90% of it
+  - concurrent requests for one missing derivative are coalesced: one thread
+    renders it while the others wait for its result; files are written to a
+    temp name and renamed into place, so other processes never read a
+    partial file (at worst two processes render the same file once)
+
+Settings (all optional):
+
+    IMAGE_RESIZE = {
+        'SIZES': ('240x0', '360x0', '540x0', '720x0', '360x504'),
+        'CACHE_DIR': BASE_DIR / 'var' / 'imgcache',
+        'MAX_BYTES': 256 * 1024 * 1024,
+        'QUALITY': 80,
+        'MAX_AGE': 24 * 60 * 60,     # browser / CDN max-age
+        'VERSION': 1,                # bump to re-render everything
+    }
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.urls import reverse
+from django.utils._os import safe_join
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SIZES': ('240x0', '360x0', '540x0', '720x0', '360x504'),
+    'CACHE_DIR': os.path.join(settings.BASE_DIR, 'var', 'imgcache'),
+    'MAX_BYTES': 256 * 1024 * 1024,
+    'QUALITY': 80,
+    'MAX_AGE': 24 * 60 * 60,
+    'VERSION': 1,
+}
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+LOW_WATER = 0.9
+
+
+def resize_settings():
+    return dict(DEFAULTS, **getattr(settings, 'IMAGE_RESIZE', {}))
+
+
+def allowed_sizes():
+    sizes = set()
+    for size in resize_settings()['SIZES']:
+        width, _, height = str(size).partition('x')
+        sizes.add((int(width), int(height or 0)))
+    return sizes
+
+
+def resized_url(name, width, height=0):
+    return reverse('resized_image', kwargs={'width': width, 'height': height, 'path': name})
+
+
+# ---- rendering ----
+def render(source_path, width, height, fmt, quality):
+    """Resized image bytes; never upscales."""
+    with Image.open(source_path) as image:
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    # 0 = unbounded; the box never exceeds the original, so nothing is upscaled
+    box = (min(width or image.width, image.width), min(height or image.height, image.height))
+    if box != image.size:
+        image = ImageOps.contain(image, box, Image.LANCZOS)
+
+    buffer = BytesIO()
+    if fmt == 'webp':
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(buffer, 'WEBP', quality=quality, method=4)
+    else:
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+# ---- disk cache ----
+class DiskLRU:
+    """Files under `root`, evicted least-recently-used (by mtime) beyond max_bytes."""
+
+    def __init__(self, root, max_bytes):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self._size = None      # bytes on disk as far as this process knows
+        self._lock = threading.Lock()
+
+    def path(self, digest, ext):
+        return os.path.join(self.root, digest[:2], f'{digest}.{ext}')
+
+    def touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _scan(self):
+        entries, total = [], 0
+        for dirpath, _, files in os.walk(self.root):
+            for filename in files:
+                if filename.startswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        return entries, total
+
+    def store(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.tmp', dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # rescan: other processes share the directory, so our running total is only a hint
+        entries, total = self._scan()
+        entries.sort()
+        target = self.max_bytes * LOW_WATER
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        logger.info('image cache: evicted %d files, %d bytes left', removed, total)
+
+
+_lru = None
+_inflight = {}                 # cache path -> Event set when its render finishes
+_inflight_lock = threading.Lock()
+
+
+def disk_cache():
+    global _lru
+    if _lru is None:
+        conf = resize_settings()
+        _lru = DiskLRU(conf['CACHE_DIR'], conf['MAX_BYTES'])
+    return _lru
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _lru
+    if setting in ('IMAGE_RESIZE', 'MEDIA_ROOT'):
+        _lru = None
+
+
+def _open_cached(lru, path):
+    """The cached derivative opened for reading, or None. Opened, never exists()-checked
+    first: an eviction can remove the file between the check and the open."""
+    try:
+        handle = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    lru.touch(path)
+    return handle
+
+
+def _open_or_render(lru, path, source_path, width, height, fmt, quality):
+    """
+    An open file with the derivative, rendering it once if several requests
+    race for it. If an eviction removes the new file before it can be opened,
+    the rendered bytes are served from memory.
+    """
+    handle = _open_cached(lru, path)
+    if handle is not None:
+        return handle
+    with _inflight_lock:
+        event = _inflight.get(path)
+        owner = event is None
+        if owner:
+            event = _inflight[path] = threading.Event()
+    if not owner:
+        event.wait(timeout=30)
+        handle = _open_cached(lru, path)
+        if handle is not None:
+            return handle
+        # the owner failed, or its file is already evicted: render ourselves
+    try:
+        data = render(source_path, width, height, fmt, quality)
+        lru.store(path, data)
+    finally:
+        if owner:
+            with _inflight_lock:
+                _inflight.pop(path, None)
+            event.set()
+    return _open_cached(lru, path) or BytesIO(data)
+
+
+def serve(request, width, height, name):
+    if (width, height) not in allowed_sizes():
+        raise Http404('Size not allowed')
+    if not name.lower().endswith(SOURCE_EXTENSIONS):
+        raise Http404
+    try:
+        source_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        source = os.stat(source_path)
+    except OSError:
+        raise Http404
+
+    conf = resize_settings()
+    fmt = 'webp' if 'image/webp' in request.META.get('HTTP_ACCEPT', '') else 'jpeg'
+    digest = hashlib.sha1(
+        f'{name}|{source.st_mtime_ns}|{source.st_size}|{width}x{height}|{fmt}|{conf["QUALITY"]}|{conf["VERSION"]}'.encode()
+    ).hexdigest()
+    etag = f'"{digest}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f"public, max-age={conf['MAX_AGE']}",
+        'Vary': 'Accept',
+    }
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        lru = disk_cache()
+        start = time.perf_counter()
+        handle = _open_or_render(lru, lru.path(digest, 'webp' if fmt == 'webp' else 'jpg'),
+                                 source_path, width, height, fmt, conf['QUALITY'])
+        response = FileResponse(handle, content_type=f'image/{fmt}')
+        response.headers.pop('Content-Disposition', None)
+        response['Server-Timing'] = f'img;dur={(time.perf_counter() - start) * 1000:.1f}'
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,282 @@
+# shop/images.py
+"""
+Responsive derivatives of the catalog images (image + hover image of Product,
+Cosmetic, Jewellery, Bag and Shoes).
+
+For every uploaded original, e.g. products/product-image1.jpg, we write each
+configured width as WebP and as a JPEG fallback:
+
+    derivatives/products/product-image1.360w.webp
+    derivatives/products/product-image1.360w.jpg
+    ...
+
+Widths wider than the original are skipped; an original narrower than every
+width gets a single, not upscaled, derivative under the smallest width.
+Derivatives are generated on save (post_save below) and for the existing
+library by `manage.py backfill_image_derivatives`, which fans out over a
+process pool.
+
+The main image's size, dominant colour and a 16px blurred WebP placeholder
+(data: URI) are stored on the item itself (models.ImageMeta): on save when
+the image changed, and by the same backfill for existing rows.
+
+The {% responsive_img %} tag (templatetags/image_extras.py) turns a media URL
+into a <picture> with a WebP srcset and a JPEG srcset / src, and falls back to
+a plain <img> for images without derivatives (static placeholders, not yet
+backfilled uploads). Which widths exist per original is cached. Given
+meta=<item>, the <img> also gets width / height and the placeholder as its
+background, so the card keeps its box while the real image lazy-loads.
+
+Settings (all optional):
+
+    IMAGE_DERIVATIVES = {
+        'WIDTHS': (240, 360, 540, 720),
+        'WEBP_QUALITY': 78,
+        'JPEG_QUALITY': 80,
+        'SIZES': '(min-width: 768px) 33vw, 50vw',   # default sizes attribute
+    }
+"""
+import base64
+import hashlib
+import logging
+import os
+from io import BytesIO
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from django.utils import timezone
+from PIL import Image, ImageFilter, ImageOps
+
+from .models import Product, Cosmetic, Jewellery, Bag, Shoes
+from .pagecache import bump_generation
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WIDTHS': (240, 360, 540, 720),
+    'WEBP_QUALITY': 78,
+    'JPEG_QUALITY': 80,
+    'SIZES': '(min-width: 768px) 33vw, 50vw',
+}
+
+DERIVATIVES_DIR = 'derivatives'
+
+# catalog model -> its image fields
+IMAGE_FIELDS = {
+    Product: ('image', 'hover_image'),
+    Cosmetic: ('image', 'image_hover'),
+    Jewellery: ('image', 'image_hover'),
+    Bag: ('image', 'image_hover'),
+    Shoes: ('image', 'image_hover'),
+}
+
+# how long "no derivatives yet" is remembered before checking storage again
+MISSING_TIMEOUT = 60
+
+# pixel width of the blurred inline placeholder
+PLACEHOLDER_WIDTH = 16
+
+
+def derivative_settings():
+    return dict(DEFAULTS, **getattr(settings, 'IMAGE_DERIVATIVES', {}))
+
+
+def derivative_name(name, width, fmt):
+    stem, _ = os.path.splitext(name)
+    return f"{DERIVATIVES_DIR}/{stem}.{width}w.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def target_widths(original_width, widths):
+    return [w for w in sorted(widths) if w <= original_width] or [min(widths)]
+
+
+def _encode(image, fmt, conf):
+    buffer = BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=conf['WEBP_QUALITY'], method=4)
+    else:
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+            image = background
+        image.save(buffer, 'JPEG', quality=conf['JPEG_QUALITY'], optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _open(name, storage=None):
+    """The original, upright (EXIF orientation applied), as RGB / RGBA."""
+    with (storage or default_storage).open(name) as original:
+        image = Image.open(original)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    return image
+
+
+def generate_derivatives(name, storage=None, force=False):
+    """
+    Write the WebP + JPEG derivatives of one original; returns the widths
+    available. Existing derivatives are kept unless `force`.
+    """
+    storage = storage or default_storage
+    conf = derivative_settings()
+    image = _open(name, storage)
+    widths = target_widths(image.width, conf['WIDTHS'])
+    for width in widths:
+        resized = None
+        for fmt in ('webp', 'jpeg'):
+            target = derivative_name(name, width, fmt)
+            if not force and storage.exists(target):
+                continue
+            if resized is None:
+                if width >= image.width:
+                    resized = image
+                else:
+                    resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            if force and storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(_encode(resized, fmt, conf)))
+    remember_widths(name, widths)
+    return widths
+
+
+# ---- stored metadata (ImageMeta fields) ----
+def image_meta(name, storage=None):
+    """ImageMeta field values for one original: size, dominant colour, blurred placeholder."""
+    image = _open(name, storage).convert('RGB')
+
+    sample = image.copy()
+    sample.thumbnail((64, 64))
+    palette = sample.quantize(colors=5)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, height), Image.BOX).filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    tiny.save(buffer, 'WEBP', quality=40)
+
+    return {
+        'image_width': image.width,
+        'image_height': image.height,
+        'image_color': f'#{red:02x}{green:02x}{blue:02x}',
+        'image_placeholder': 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode(),
+        'image_meta_source': name,
+    }
+
+
+EMPTY_META = {
+    'image_width': None, 'image_height': None, 'image_color': '', 'image_placeholder': '', 'image_meta_source': '',
+}
+
+
+def store_image_meta(model, name, meta):
+    """Write meta to every `model` row whose image is `name` and isn't up to date; returns rows updated."""
+    # `updated` too: it is the detail pages' ETag / Last-Modified (shop/conditional.py)
+    updated = model.objects.filter(image=name).exclude(image_meta_source=name).update(**meta, updated=timezone.now())
+    if updated:
+        # update() sends no post_save: pages rendered without the metadata must go
+        bump_generation(model)
+    return updated
+
+
+def delete_derivatives(name, storage=None):
+    """Remove every derivative of an original (after the original itself is gone)."""
+    storage = storage or default_storage
+    widths = set(derivative_settings()['WIDTHS'])
+    for width in widths:
+        for fmt in ('webp', 'jpeg'):
+            target = derivative_name(name, width, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+    cache.delete(_widths_key(name))
+
+
+# ---- which widths exist (cached) ----
+def _widths_key(name):
+    return 'imgderiv:' + hashlib.sha1(name.encode()).hexdigest()
+
+
+def remember_widths(name, widths):
+    cache.set(_widths_key(name), list(widths), timeout=None if widths else MISSING_TIMEOUT)
+
+
+def available_widths(name, storage=None):
+    """Widths with both a WebP and a JPEG derivative for this original ([] if none)."""
+    key = _widths_key(name)
+    widths = cache.get(key)
+    if widths is None:
+        storage = storage or default_storage
+        conf = derivative_settings()
+        widths = [
+            w for w in sorted(set(conf['WIDTHS']))
+            if storage.exists(derivative_name(name, w, 'webp')) and storage.exists(derivative_name(name, w, 'jpeg'))
+        ]
+        remember_widths(name, widths)
+    return widths
+
+
+def media_name(url):
+    """Storage name for a MEDIA_URL url, or None for anything else (static placeholders, external)."""
+    if not url or not settings.MEDIA_URL or not url.startswith(settings.MEDIA_URL):
+        return None
+    name = unquote(url[len(settings.MEDIA_URL):])
+    if not name or name.startswith(DERIVATIVES_DIR + '/'):
+        return None
+    return name
+
+
+def srcsets(url):
+    """(webp srcset, jpeg srcset, mid-width jpeg src) for a media URL, or None if it has no derivatives."""
+    name = media_name(url)
+    if name is None:
+        return None
+    widths = available_widths(name)
+    if not widths:
+        return None
+    webp = ', '.join(f"{default_storage.url(derivative_name(name, w, 'webp'))} {w}w" for w in widths)
+    jpeg = ', '.join(f"{default_storage.url(derivative_name(name, w, 'jpeg'))} {w}w" for w in widths)
+    fallback = default_storage.url(derivative_name(name, widths[len(widths) // 2], 'jpeg'))
+    return webp, jpeg, fallback
+
+
+# ---- originals ----
+def catalog_image_names():
+    """Every distinct image name referenced by the catalog models."""
+    names = set()
+    for model, fields in IMAGE_FIELDS.items():
+        for row in model.objects.values_list(*fields):
+            names.update(n for n in row if n)
+    return sorted(names)
+
+
+def _on_catalog_save(sender, instance, **kwargs):
+    name = instance.image.name or ''
+    if name != instance.image_meta_source:
+        try:
+            meta = image_meta(name) if name else EMPTY_META
+        except Exception:
+            logger.exception('image metadata failed for %s', name)
+        else:
+            sender.objects.filter(pk=instance.pk).update(**meta)
+            for field, value in meta.items():
+                setattr(instance, field, value)
+            bump_generation(sender)
+
+    for field in IMAGE_FIELDS[sender]:
+        name = getattr(instance, field).name
+        if name and not available_widths(name):
+            try:
+                generate_derivatives(name)
+            except Exception:
+                # a bad upload must not break the save; backfill can retry it
+                logger.exception('image derivatives failed for %s', name)
+
+
+for _model in IMAGE_FIELDS:
+    post_save.connect(_on_catalog_save, sender=_model, dispatch_uid=f'images-save-{_model.__name__}')
@@ -0,0 +1,162 @@
+# shop/inventory.py
+"""
+Per-size stock reservation for checkout.
+
+Every tracked cart line is reserved with a conditional atomic
+
+    UPDATE shop_stock SET quantity = quantity - n WHERE id = ? AND quantity >= n
+
+inside one transaction, so concurrent checkouts can never oversell: either all
+lines are reserved or the whole transaction rolls back with OutOfStock.
+
+Items with no Stock row are untracked (unlimited) so the catalog keeps working
+until stock is entered in the admin.
+
+Checkout GET places a hold (StockReservation rows with an expiry); POST
+re-reserves and commits it as part of the order transaction. Expired holds are
+returned to stock by release_expired() (also run by the
+`release_expired_reservations` management command).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Stock, StockReservation
+from .utils import parse_cart_key
+
+# seconds a checkout hold is kept before it goes back to stock
+RESERVATION_TTL = getattr(settings, 'STOCK_RESERVATION_TTL', 15 * 60)
+
+
+class OutOfStock(Exception):
+    """Raised when one or more cart lines can't be reserved."""
+    def __init__(self, lines):
+        # lines: list of dicts {key, category, item_id, size, requested, available}
+        self.lines = lines
+        super().__init__(", ".join(f"{l['key']} ({l['available']} left)" for l in lines))
+
+
+def cart_stock_lines(cart):
+    """
+    Aggregate a session cart into {(category, item_id, size): (cart_key, qty)}.
+    Lines with unparseable keys or qty <= 0 are skipped.
+    """
+    lines = {}
+    for key, item in cart.items():
+        category, item_id, size = parse_cart_key(key, item)
+        try:
+            qty = int(item.get('quantity', 0))
+        except (TypeError, ValueError):
+            qty = 0
+        if item_id is None or qty <= 0:
+            continue
+        stock_key = (category, item_id, size)
+        prev_key, prev_qty = lines.get(stock_key, (key, 0))
+        lines[stock_key] = (prev_key, prev_qty + qty)
+    return lines
+
+
+def _stock_rows(stock_keys):
+    """Fetch the Stock rows for the given (category, item_id, size) keys in one query."""
+    if not stock_keys:
+        return {}
+    cond = Q()
+    for category, item_id, size in stock_keys:
+        cond |= Q(category=category, item_id=item_id, size=size)
+    return {
+        (s.category, s.item_id, s.size): s
+        for s in Stock.objects.filter(cond).only('id', 'category', 'item_id', 'size', 'quantity')
+    }
+
+
+def _restore(reservations_qs):
+    """Delete the given reservations and give their quantity back to stock (caller holds a transaction)."""
+    rows = list(reservations_qs.select_for_update().values_list('pk', 'stock_id', 'quantity'))
+    if not rows:
+        return 0
+    StockReservation.objects.filter(pk__in=[r[0] for r in rows]).delete()
+    per_stock = {}
+    for _, stock_id, qty in rows:
+        per_stock[stock_id] = per_stock.get(stock_id, 0) + qty
+    for stock_id, qty in per_stock.items():
+        Stock.objects.filter(pk=stock_id).update(quantity=F('quantity') + qty)
+    return len(rows)
+
+
+def release_reservations(holder):
+    """Return every hold of this checkout to stock. Returns number of released rows."""
+    with transaction.atomic():
+        return _restore(StockReservation.objects.filter(holder=holder))
+
+
+def release_expired(now=None, stock_ids=None):
+    """Return expired holds to stock (optionally only for some Stock ids)."""
+    now = now or timezone.now()
+    qs = StockReservation.objects.filter(expires_at__lte=now)
+    if stock_ids is not None:
+        qs = qs.filter(stock_id__in=stock_ids)
+    with transaction.atomic():
+        return _restore(qs)
+
+
+def reserve_cart(cart, holder, ttl=None, commit=False):
+    """
+    Reserve stock for every tracked line of `cart`, all or nothing.
+
+    - Any previous hold of `holder` is released first (re-entering checkout
+      refreshes the hold instead of stacking it).
+    - commit=False: writes StockReservation rows that expire after `ttl` seconds.
+    - commit=True: the decrement is final (order placement); no hold rows.
+
+    Raises OutOfStock (and rolls everything back) when a line can't be covered.
+    """
+    ttl = RESERVATION_TTL if ttl is None else ttl
+    lines = cart_stock_lines(cart)
+    now = timezone.now()
+
+    with transaction.atomic():
+        _restore(StockReservation.objects.filter(holder=holder))
+
+        stocks = _stock_rows(list(lines))
+        if not stocks:
+            return []
+        # abandoned checkouts holding the same items go back to stock first
+        release_expired(now=now, stock_ids=[s.pk for s in stocks.values()])
+
+        reserved, short = [], []
+        for stock_key, (cart_key, qty) in lines.items():
+            stock = stocks.get(stock_key)
+            if stock is None:
+                continue  # untracked item
+            updated = (
+                Stock.objects
+                .filter(pk=stock.pk, quantity__gte=qty)
+                .update(quantity=F('quantity') - qty)
+            )
+            if updated:
+                reserved.append(StockReservation(
+                    stock_id=stock.pk, holder=holder, quantity=qty,
+                    expires_at=now + timedelta(seconds=ttl),
+                ))
+            else:
+                short.append((stock, cart_key, qty))
+
+        if short:
+            available = dict(
+                Stock.objects.filter(pk__in=[s.pk for s, _, _ in short]).values_list('pk', 'quantity')
+            )
+            raise OutOfStock([{
+                'key': cart_key,
+                'category': stock.category,
+                'item_id': stock.item_id,
+                'size': stock.size,
+                'requested': qty,
+                'available': available.get(stock.pk, 0),
+            } for stock, cart_key, qty in short])
+
+        if not commit:
+            StockReservation.objects.bulk_create(reserved)
+    return reserved
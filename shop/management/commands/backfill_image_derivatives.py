@@ -0,0 +1,74 @@
+# shop/management/commands/backfill_image_derivatives.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from shop import images
+
+
+def _generate(name, force):
+    """Runs in a pool process: returns (name, widths, ImageMeta values, error)."""
+    try:
+        return name, images.generate_derivatives(name, force=force), images.image_meta(name), None
+    except Exception as exc:
+        return name, [], None, f'{type(exc).__name__}: {exc}'
+
+
+class Command(BaseCommand):
+    help = ('Generate the responsive WebP + JPEG derivatives and the stored size / colour / '
+            'placeholder metadata for every catalog image in parallel, and report the bytes '
+            'a listing card saves.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Pool processes')
+        parser.add_argument('--force', action='store_true', help='Regenerate existing derivatives')
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 0:
+            raise CommandError('--workers must be positive')
+        referenced = images.catalog_image_names()
+        names = [n for n in referenced if default_storage.exists(n)]
+        missing = len(referenced) - len(names)
+        self.stdout.write(f"images={len(names)} missing_files={missing} workers={options['workers']}")
+
+        # children must not inherit the parent's open DB connections
+        connections.close_all()
+        start = time.perf_counter()
+        done = failed = rows = 0
+        results = []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            futures = [pool.submit(_generate, name, options['force']) for name in names]
+            for future in as_completed(futures):
+                name, widths, meta, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"  {name}: {error}")
+                    continue
+                # the pool processes' caches are their own: record the widths here too
+                images.remember_widths(name, widths)
+                # DB writes stay in this process
+                rows += sum(images.store_image_meta(model, name, meta) for model in images.IMAGE_FIELDS)
+                results.append((name, widths))
+                done += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"generated for {done} images in {elapsed:.1f}s ({failed} failed), "
+                          f"metadata stored on {rows} items")
+
+        # what a card downloads: the original vs. the derivative a 360px slot picks
+        original = webp = jpeg = 0
+        for name, widths in results:
+            width = next((w for w in widths if w >= 360), widths[-1])
+            original += default_storage.size(name)
+            webp += default_storage.size(images.derivative_name(name, width, 'webp'))
+            jpeg += default_storage.size(images.derivative_name(name, width, 'jpeg'))
+        if results:
+            self.stdout.write(self.style.SUCCESS(
+                f"per card image: original {original / len(results) / 1024:.0f} KB, "
+                f"webp {webp / len(results) / 1024:.0f} KB ({original / max(webp, 1):.1f}x smaller), "
+                f"jpeg {jpeg / len(results) / 1024:.0f} KB ({original / max(jpeg, 1):.1f}x smaller)"
+            ))
@@ -0,0 +1,105 @@
+# shop/management/commands/bench_async_login.py
+import asyncio
+import os
+import time
+
+from asgiref.sync import ThreadSensitiveContext, async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+from django.test.utils import override_settings
+
+from shop.benchutils import throwaway_sqlite_db, percentile
+from shop.models import Customer_Table
+
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = ('Fire concurrent logins through the ASGI handler and report per-login latency '
+            'and event-loop lag for different password-hashing pool sizes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Logins started at once')
+        parser.add_argument('--rounds', type=int, default=2, help='Bursts per pool size')
+        parser.add_argument('--workers', default=None,
+                            help='Comma-separated hashing pool sizes to compare (default: 1,<cpu count>)')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] <= 0 or options['rounds'] <= 0:
+            raise CommandError('--concurrency and --rounds must be positive')
+        cpus = os.cpu_count() or 1
+        if options['workers']:
+            sizes = [int(w) for w in options['workers'].split(',') if w.strip()]
+        else:
+            sizes = sorted({1, cpus})
+        self.stdout.write(f"cpus={cpus} concurrency={options['concurrency']} rounds={options['rounds']}")
+
+        with throwaway_sqlite_db(prefix='bench_async_login_'):
+            hashed = make_password(PASSWORD)
+            Customer_Table.objects.bulk_create(
+                Customer_Table(email=f'async-{n}@example.com', first_name='Async', last_name=f'User{n}', password=hashed)
+                for n in range(options['concurrency'])
+            )
+            single = None
+            for workers in sizes:
+                with override_settings(
+                    PASSWORD_HASHING_WORKERS=workers,
+                    LOGIN_THROTTLE={'ENABLED': False},   # every login comes from one test IP
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                ):
+                    result = async_to_sync(self._burst)(options)
+                if single is None:
+                    single = result
+                self._print(workers, result, single)
+
+    async def _burst(self, options):
+        latencies, statuses, lag = [], {}, [0.0]
+        stop = asyncio.Event()
+
+        async def heartbeat():
+            # how late does a 10ms timer fire while logins are in flight?
+            while not stop.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lag[0] = max(lag[0], time.perf_counter() - start - 0.01)
+
+        async def login(n):
+            client = AsyncClient()
+            start = time.perf_counter()
+            # one sync thread per request, like ASGIHandler; the test client's requests
+            # would otherwise share one and the sync middleware would serialize them
+            async with ThreadSensitiveContext():
+                response = await client.post(
+                    '/login', {'customer[email]': f'async-{n}@example.com', 'customer[password]': PASSWORD},
+                )
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        beat = asyncio.ensure_future(heartbeat())
+        started = time.perf_counter()
+        for _ in range(options['rounds']):
+            await asyncio.gather(*(login(n) for n in range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await beat
+
+        latencies.sort()
+        return {
+            'latencies': latencies,
+            'statuses': statuses,
+            'elapsed': elapsed,
+            'loop_lag': lag[0],
+        }
+
+    def _print(self, workers, r, baseline):
+        lat = r['latencies']
+        ms = lambda v: v * 1000  # noqa: E731
+        line = (f"hash_workers={workers:<3} logins={len(lat)} statuses={r['statuses']} "
+                f"p50={ms(percentile(lat, 0.5)):.0f}ms p95={ms(percentile(lat, 0.95)):.0f}ms "
+                f"max={ms(lat[-1]) if lat else 0:.0f}ms burst_wall={r['elapsed']:.2f}s "
+                f"max_loop_lag={ms(r['loop_lag']):.1f}ms")
+        if r is not baseline and baseline['elapsed']:
+            line += f" speedup_vs_1={baseline['elapsed'] / r['elapsed']:.2f}x"
+        self.stdout.write(line)
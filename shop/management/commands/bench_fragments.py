@@ -0,0 +1,87 @@
+# shop/management/commands/bench_fragments.py
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from shop import fragments
+from shop.benchutils import percentile
+
+
+class Command(BaseCommand):
+    help = ('Render a root.html-based page with the header / menu / footer fragments '
+            'cached vs. uncached and report the per-request template time saved.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', default='shop/faqs.html', help='Template extending shop/root.html')
+        parser.add_argument('--renders', type=int, default=300)
+
+    def handle(self, *args, **options):
+        if options['renders'] <= 0:
+            raise CommandError('--renders must be positive')
+        factory = RequestFactory()
+
+        def request_with(cart_count, customer_id=None):
+            request = factory.get('/')
+            request.session = SessionStore()  # in-memory only, nothing saved
+            request.session['cart_count'] = cart_count
+            if customer_id:
+                request.session['customer_id'] = customer_id
+            return request
+
+        def render(request):
+            return render_to_string(options['template'], {}, request=request)
+
+        # the fragments go to a private in-memory cache for the run
+        bench_caches = dict(settings.CACHES, default={
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-fragments',
+        })
+        with override_settings(CACHES=bench_caches, CHROME_FRAGMENT_VERSION='bench'):
+            # correctness: cached chrome is byte-identical, per-user bits stay live
+            fragments._version = 'bench-check-cold'
+            cold = render(request_with(3))
+            warm = render(request_with(3))
+            if cold != warm:
+                raise CommandError('cached render differs from uncached render')
+            other = render(request_with(7, customer_id=1))
+            if 'Logout' in warm or 'Logout' not in other:
+                raise CommandError('login state was cached into the chrome')
+            badge = lambda html: html.split('id="CartCount"', 1)[1].split('</span>', 1)[0]  # noqa: E731
+            if '3' not in badge(warm) or '7' not in badge(other):
+                raise CommandError('cart badge was cached into the chrome')
+
+            uncached = []
+            for n in range(options['renders']):
+                fragments._version = f'bench-miss-{n}'  # every fragment misses
+                request = request_with(n % 5)
+                start = time.perf_counter()
+                render(request)
+                uncached.append(time.perf_counter() - start)
+
+            fragments._version = 'bench-warm'
+            render(request_with(0))
+            cached = []
+            for n in range(options['renders']):
+                request = request_with(n % 5)
+                start = time.perf_counter()
+                render(request)
+                cached.append(time.perf_counter() - start)
+        fragments._version = None
+
+        uncached.sort()
+        cached.sort()
+        ms = lambda v: v * 1000  # noqa: E731
+        mean_u = sum(uncached) / len(uncached)
+        mean_c = sum(cached) / len(cached)
+        self.stdout.write(f"template={options['template']} renders={options['renders']} size={len(warm) / 1024:.1f} KB")
+        self.stdout.write(f"uncached chrome: mean={ms(mean_u):.3f}ms p50={ms(percentile(uncached, 0.5)):.3f}ms "
+                          f"p95={ms(percentile(uncached, 0.95)):.3f}ms")
+        self.stdout.write(f"cached chrome:   mean={ms(mean_c):.3f}ms p50={ms(percentile(cached, 0.5)):.3f}ms "
+                          f"p95={ms(percentile(cached, 0.95)):.3f}ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"saved {ms(mean_u - mean_c):.3f}ms per request ({(1 - mean_c / mean_u) * 100:.0f}% of template time)"
+        ))
@@ -0,0 +1,96 @@
+# shop/management/commands/bench_image_resize.py
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from shop import imagecache, images
+from shop.benchutils import percentile
+
+
+class Command(BaseCommand):
+    help = ('Exercise /img/<w>x<h>/ against a temporary disk cache: concurrent first requests '
+            '(coalesced renders), warm hits, 304 revalidation and LRU eviction.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Simultaneous first requests per image')
+        parser.add_argument('--images', type=int, default=10, help='Catalog images to use')
+        parser.add_argument('--size', default='360x0', help='Size to request (must be allowed)')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] <= 0 or options['images'] <= 0:
+            raise CommandError('--concurrency and --images must be positive')
+        names = images.catalog_image_names()[:options['images']]
+        if not names:
+            raise CommandError('No catalog images to resize')
+        cache_dir = tempfile.mkdtemp(prefix='bench_imgcache_')
+        conf = dict(imagecache.resize_settings(), CACHE_DIR=cache_dir)
+        try:
+            with override_settings(IMAGE_RESIZE=conf, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                self._run(names, options)
+                # eviction: shrink the budget below what is cached and add one more entry
+                used = imagecache.disk_cache()._scan()[1]
+                with override_settings(IMAGE_RESIZE=dict(conf, MAX_BYTES=used // 2)):
+                    Client().get(f"/img/{options['size']}/{names[0]}", HTTP_ACCEPT='image/jpeg')
+                    left = imagecache.disk_cache()._scan()[1]
+                self.stdout.write(f"eviction: {used / 1024:.0f} KB cached, budget {used // 2 / 1024:.0f} KB "
+                                  f"-> {left / 1024:.0f} KB after trimming")
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def _run(self, names, options):
+        renders = [0]
+        real_render = imagecache.render
+
+        def counting_render(*args, **kwargs):
+            renders[0] += 1
+            return real_render(*args, **kwargs)
+
+        statuses, first = {}, []
+        lock = threading.Lock()
+
+        def fetch(url):
+            start = time.perf_counter()
+            response = Client().get(url, HTTP_ACCEPT='image/webp,*/*')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            with lock:
+                first.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        with mock.patch.object(imagecache, 'render', counting_render):
+            for name in names:
+                url = f"/img/{options['size']}/{name}"
+                threads = [threading.Thread(target=fetch, args=(url,)) for _ in range(options['concurrency'])]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            client = Client()
+            warm, revalidated = [], 0
+            for name in names:
+                url = f"/img/{options['size']}/{name}"
+                start = time.perf_counter()
+                response = client.get(url, HTTP_ACCEPT='image/webp,*/*')
+                b''.join(response.streaming_content)
+                warm.append(time.perf_counter() - start)
+                again = client.get(url, HTTP_ACCEPT='image/webp,*/*', HTTP_IF_NONE_MATCH=response['ETag'])
+                revalidated += again.status_code == 304
+            rejected = client.get(f'/img/123x45/{names[0]}').status_code
+
+        first.sort()
+        warm.sort()
+        ms = lambda v: v * 1000  # noqa: E731
+        requests = len(names) * options['concurrency']
+        self.stdout.write(f"first requests: {requests} ({options['concurrency']} at once per image) "
+                          f"statuses={statuses} renders={renders[0]} (one per image = coalesced)")
+        self.stdout.write(f"  latency p50={ms(percentile(first, 0.5)):.1f}ms p95={ms(percentile(first, 0.95)):.1f}ms")
+        self.stdout.write(f"warm hits: p50={ms(percentile(warm, 0.5)):.2f}ms p95={ms(percentile(warm, 0.95)):.2f}ms, "
+                          f"{revalidated}/{len(names)} revalidated with 304, disallowed size -> {rejected}")
@@ -0,0 +1,90 @@
+# shop/management/commands/bench_listing_cards.py
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.templatetags.static import static
+
+from shop.benchutils import throwaway_sqlite_db
+from shop.cards import CardURLs, product_cards
+from shop.models import Category, Product
+
+PLACEHOLDER = 'images/product-images/placeholder.jpg'
+PLACEHOLDER_HOVER = 'images/product-images/placeholder_hover.jpg'
+
+
+def instance_listing(qs):
+    """How the listings were built before shop/cards.py: full instances with attributes patched on."""
+    placeholder, placeholder_hover = static(PLACEHOLDER), static(PLACEHOLDER_HOVER)
+    products = []
+    for p in qs:
+        p.image_url = getattr(p.image, 'url', placeholder)
+        p.hover_url = getattr(p.hover_image, 'url', getattr(p.image, 'url', placeholder_hover))
+        p.sizes_list = list(p.sizes or [])
+        p.colors_list = list(p.colors or [])
+        products.append(p)
+    return products
+
+
+def card_listing(qs):
+    return product_cards(qs, CardURLs(PLACEHOLDER, PLACEHOLDER_HOVER))
+
+
+class Command(BaseCommand):
+    help = ('Build a women_shop-style listing of N products as model instances vs. slotted cards '
+            'on a throwaway SQLite database; reports time and memory of each.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10_000)
+        parser.add_argument('--description-bytes', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3, help='Timed builds per variant (best is reported)')
+
+    def handle(self, *args, **options):
+        if options['items'] <= 0 or options['repeat'] <= 0:
+            raise CommandError('--items and --repeat must be positive')
+        with throwaway_sqlite_db(prefix='bench_cards_'):
+            self._run(options)
+
+    def _run(self, options):
+        category = Category.objects.create(name='Women bench', slug='women-bench')
+        description = ('Lorem ipsum dolor sit amet. ' * (options['description_bytes'] // 28 + 1))[:options['description_bytes']]
+        Product.objects.bulk_create(
+            Product(
+                category=category, title=f'Bench dress {n}', slug=f'bench-dress-{n}', description=description,
+                sizes=['S', 'M', 'L'], colors=['Black', 'Red'], collection_cat=['Sale'], price='49.90',
+                image=f'blobs/{n % 256:02x}/{n:040x}.jpg', hover_image=f'blobs/{n % 256:02x}/{n + 1:040x}.jpg',
+                image_width=800, image_height=1000, image_color='#a0a0a0',
+                image_placeholder='data:image/webp;base64,' + 'A' * 120,
+            )
+            for n in range(options['items'])
+        )
+        qs = Product.objects.filter(category__name__istartswith='women', available=True).order_by('-created')
+
+        results = {}
+        for label, build in (('instances', instance_listing), ('cards', card_listing)):
+            if len(build(qs.all())) != options['items']:
+                raise CommandError(f'{label}: wrong number of items')
+            best = None
+            for _ in range(options['repeat']):
+                gc.collect()
+                start = time.perf_counter()
+                build(qs.all())  # a fresh queryset: nothing cached between builds
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            gc.collect()
+            tracemalloc.start()
+            listing = build(qs.all())
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del listing
+            results[label] = (best, retained, peak)
+
+        for label, (best, retained, peak) in results.items():
+            self.stdout.write(f"{label:<10} build={best * 1000:8.1f}ms  retained={retained / 1024 / 1024:6.2f} MB "
+                              f"peak={peak / 1024 / 1024:6.2f} MB  ({retained / options['items']:.0f} B/item)")
+        (old_time, old_retained, old_peak), (time_, retained, peak) = results['instances'], results['cards']
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['items']} items: cards are {old_time / time_:.1f}x faster to build, "
+            f"retain {(1 - retained / old_retained) * 100:.0f}% less memory (peak -{(1 - peak / old_peak) * 100:.0f}%)"
+        ))
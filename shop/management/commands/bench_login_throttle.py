@@ -0,0 +1,113 @@
+# shop/management/commands/bench_login_throttle.py
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from shop.benchutils import throwaway_sqlite_db
+from shop.models import Customer_Table
+
+PASSWORD = 'bench-password'
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Command(BaseCommand):
+    help = ('Simulate a credential-stuffing burst against login_view with and without the '
+            'login throttle and report worker CPU (every wrong guess costs a PBKDF2 hash).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=60, help='Attack login attempts per scenario')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent attacker threads')
+        parser.add_argument('--ips', type=int, default=3, help='Distinct attacker IPs')
+        parser.add_argument('--emails', type=int, default=3, help='Distinct targeted accounts')
+        parser.add_argument('--store', choices=('local', 'cache'), default='local',
+                            help="Throttle store for the 'on' scenario")
+        parser.add_argument('--scenario', choices=('both', 'off', 'on'), default='both')
+
+    def handle(self, *args, **options):
+        if options['attempts'] <= 0 or options['threads'] <= 0:
+            raise CommandError('--attempts and --threads must be positive')
+        with throwaway_sqlite_db(prefix='bench_login_'):
+            hashed = make_password(PASSWORD)
+            targets = [f'victim-{n}@example.com' for n in range(options['emails'])]
+            for email in targets + ['bystander@example.com']:
+                Customer_Table.objects.create(email=email, first_name='Bench', last_name='User', password=hashed)
+
+            scenarios = ('off', 'on') if options['scenario'] == 'both' else (options['scenario'],)
+            results = {}
+            for name in scenarios:
+                conf = {'ENABLED': name == 'on', 'STORE': options['store']}
+                # test client host must pass ALLOWED_HOSTS whatever the configured list is
+                with override_settings(LOGIN_THROTTLE=conf, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                    results[name] = self._attack(options, targets)
+                self._print(name, results[name])
+
+        if 'off' in results and 'on' in results and results['off']['cpu_s']:
+            ratio = results['on']['cpu_s'] / results['off']['cpu_s']
+            self.stdout.write(self.style.SUCCESS(
+                f"throttle on uses {ratio * 100:.1f}% of the unthrottled CPU "
+                f"({results['on']['hashed']} vs {results['off']['hashed']} password hashes)"
+            ))
+
+    def _attack(self, options, targets):
+        attempts = [
+            (f'10.0.0.{n % options["ips"] + 1}', targets[n % len(targets)])
+            for n in range(options['attempts'])
+        ]
+        statuses = {}
+
+        def worker(worker_no):
+            from django.db import connection
+            client = Client()
+            local = {}
+            try:
+                for n in range(worker_no, len(attempts), options['threads']):
+                    ip, email = attempts[n]
+                    response = client.post(
+                        '/login', {'customer[email]': email, 'customer[password]': 'wrong-guess'},
+                        REMOTE_ADDR=ip,
+                    )
+                    local[response.status_code] = local.get(response.status_code, 0) + 1
+            finally:
+                connection.close()
+            return local
+
+        cpu_start, wall_start = _cpu_seconds(), time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            for local in pool.map(worker, range(options['threads'])):
+                for status, count in local.items():
+                    statuses[status] = statuses.get(status, 0) + count
+        cpu = _cpu_seconds() - cpu_start
+        wall = time.perf_counter() - wall_start
+
+        # an untargeted customer on a clean IP must still get in
+        legit = Client().post(
+            '/login', {'customer[email]': 'bystander@example.com', 'customer[password]': PASSWORD},
+            REMOTE_ADDR='192.0.2.1',
+        )
+        return {
+            'statuses': statuses,
+            'hashed': statuses.get(200, 0),       # wrong password -> hash ran, page re-rendered
+            'rejected': statuses.get(429, 0),     # throttled before hashing
+            'cpu_s': cpu,
+            'wall_s': wall,
+            'legit_login_ok': legit.status_code == 302,
+        }
+
+    def _print(self, name, r):
+        cores = r['cpu_s'] / r['wall_s'] if r['wall_s'] else 0
+        self.stdout.write(
+            f"throttle={name:<3} attempts={sum(r['statuses'].values())} hashed={r['hashed']} "
+            f"rejected={r['rejected']} cpu={r['cpu_s']:.2f}s wall={r['wall_s']:.2f}s "
+            f"cpu/wall={cores:.2f} cpu/attempt={r['cpu_s'] / max(1, sum(r['statuses'].values())) * 1000:.1f}ms "
+            f"legit_login={'ok' if r['legit_login_ok'] else 'FAILED'}"
+        )
@@ -0,0 +1,82 @@
+# shop/management/commands/bench_money.py
+import timeit
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.management.base import BaseCommand
+
+from shop.money import item_cents, format_cents, SHIPPING_CENTS
+
+
+def _legacy_cart_total(cart):
+    """Old cart_detail / update_cart style: Decimal(str()) per line, float sums."""
+    total = Decimal('0.00')
+    for it in cart.values():
+        total += Decimal(str(it['price'])) * int(it['quantity'])
+    as_float = 0.0
+    for it in cart.values():
+        as_float += float(it.get('price', 0)) * int(it.get('quantity', 0))
+    return f"{float(total):.2f}", f"{as_float:.2f}"
+
+
+def _cents_cart_total(cart):
+    total = sum(item_cents(it) * int(it['quantity']) for it in cart.values())
+    return format_cents(total), format_cents(total)
+
+
+def _legacy_checkout(cart):
+    """Old checkout: quantize round trip per line, floats for template and JSON."""
+    rows, total = [], Decimal('0.00')
+    for key, it in cart.items():
+        qty = int(it.get('quantity', 0))
+        unit = Decimal(str(it.get('price', '0.00'))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        sub = unit * qty
+        total += sub
+        rows.append({'price': float(unit), 'subtotal': float(sub), 'quantity': qty})
+    grand = (total + Decimal('50.00')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return rows, float(grand)
+
+
+def _cents_checkout(cart):
+    rows, total = [], 0
+    for key, it in cart.items():
+        qty = int(it.get('quantity', 0))
+        unit = item_cents(it)
+        sub = unit * qty
+        total += sub
+        rows.append({'price_cents': unit, 'subtotal_cents': sub, 'quantity': qty})
+    return rows, total + SHIPPING_CENTS
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark: legacy Decimal/float money handling vs integer cents (cart + checkout)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=20, help='Cart lines per run')
+        parser.add_argument('--number', type=int, default=5000, help='Runs per measurement')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        n = options['lines']
+        legacy_cart = {
+            f"{i}_M": {'price': f"{19 + i % 50}.{(i * 7) % 100:02d}", 'quantity': 1 + i % 3}
+            for i in range(n)
+        }
+        cents_cart = {
+            k: {'price_cents': item_cents(v), 'quantity': v['quantity']}
+            for k, v in legacy_cart.items()
+        }
+
+        cases = [
+            ('cart total', _legacy_cart_total, _cents_cart_total),
+            ('checkout', _legacy_checkout, _cents_checkout),
+        ]
+        self.stdout.write(f"{n} cart lines, {options['number']} runs x {options['repeat']} repeats (best)")
+        for label, legacy, cents in cases:
+            t_old = min(timeit.repeat(lambda: legacy(legacy_cart), number=options['number'], repeat=options['repeat']))
+            t_new = min(timeit.repeat(lambda: cents(cents_cart), number=options['number'], repeat=options['repeat']))
+            per_old = t_old / options['number'] * 1e6
+            per_new = t_new / options['number'] * 1e6
+            self.stdout.write(
+                f"{label:<12} legacy {per_old:8.2f} us/op   cents {per_new:8.2f} us/op   "
+                f"{t_old / t_new if t_new else 0:5.2f}x faster"
+            )
@@ -0,0 +1,76 @@
+# shop/management/commands/bench_shared_pages.py
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from shop.benchutils import percentile
+from shop.models import Product
+from shop.pagecache import page_cache_metrics, reset_page_cache_metrics
+
+BADGE_RE = re.compile(rb'id="CartCount"[^>]*>\s*(\d+)')
+
+
+class Command(BaseCommand):
+    help = ('Hit one catalog page as many different visitors (anonymous, with a cart, logged in) '
+            'and report how many renders the shared page cache needed and what a served page costs.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/women_shop/')
+        parser.add_argument('--visitors', type=int, default=60)
+
+    def handle(self, *args, **options):
+        if options['visitors'] <= 0:
+            raise CommandError('--visitors must be positive')
+        product_ids = list(Product.objects.values_list('pk', flat=True)[:5])
+        if not product_ids:
+            raise CommandError('No products; run `manage.py seed` first')
+
+        # pages and sessions go to a private in-memory cache for the run
+        bench_caches = dict(settings.CACHES, default={
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench-shared-pages',
+        })
+        with override_settings(CACHES=bench_caches, SESSION_ENGINE='django.contrib.sessions.backends.cache',
+                               ALLOWED_HOSTS=['testserver']):
+            reset_page_cache_metrics()
+            visitors = []
+            for n in range(options['visitors']):
+                client = Client()
+                carts = n % 3  # a third anonymous, the rest with 1-2 cart lines
+                for pid in product_ids[:carts]:
+                    client.get(f'/add-to-cart/product/{pid}/?size=M')
+                if n % 4 == 3:
+                    session = client.session
+                    session['customer_id'] = n
+                    session.save()
+                visitors.append((client, carts))
+            reset_page_cache_metrics()
+
+            timings = []
+            for client, carts in visitors:
+                start = time.perf_counter()
+                response = client.get(options['path'])
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f"{options['path']} answered {response.status_code}")
+                if b'__PAGE_CACHE_HOLE' in response.content:
+                    raise CommandError('a hole was served unfilled')
+                badge = BADGE_RE.search(response.content)
+                if badge and int(badge.group(1)) != carts:
+                    raise CommandError(f'cart badge shows {badge.group(1)}, expected {carts}')
+            metrics = page_cache_metrics()
+
+        first, served = timings[0], sorted(timings[1:] or timings)
+        renders = metrics['miss'] + metrics['miss_uncached'] + metrics['rebuild']
+        ms = lambda v: v * 1000  # noqa: E731
+        self.stdout.write(f"path={options['path']} visitors={len(visitors)} "
+                          f"(anonymous={sum(1 for _, c in visitors if not c)})")
+        self.stdout.write(f"renders={renders} hits={metrics['hit']} stale={metrics['stale']}")
+        self.stdout.write(f"first (render): {ms(first):.2f}ms; served: mean={ms(sum(served) / len(served)):.2f}ms "
+                          f"p50={ms(percentile(served, 0.5)):.2f}ms p95={ms(percentile(served, 0.95)):.2f}ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(visitors)} personalized responses from {renders} render(s) of the shared page"
+        ))
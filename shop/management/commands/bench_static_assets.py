@@ -0,0 +1,68 @@
+# shop/management/commands/bench_static_assets.py
+import re
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+\.(?:css|js))"')
+
+
+class Command(BaseCommand):
+    help = ('Build static files into a temporary STATIC_ROOT and report the bytes a first and a '
+            'repeat visit to a page cost for its CSS / JS, plain vs. gzip / brotli.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', default='/faqs/', help='Page whose CSS / JS are fetched')
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp(prefix='bench_static_')
+        try:
+            with override_settings(STATIC_ROOT=root, STATIC_ASSET_SERVING=True, DEBUG=False,
+                                   ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                start = time.perf_counter()
+                call_command('collectstatic', interactive=False, verbosity=0)
+                self.stdout.write(f"collectstatic: {time.perf_counter() - start:.1f}s")
+                self._visit(options['page'])
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def _visit(self, page):
+        client = Client()
+        html = client.get(page).content.decode()
+        assets = sorted(set(ASSET_RE.findall(html)))
+        self.stdout.write(f"page={page} assets={len(assets)}")
+
+        totals = {}
+        for label, accept in (('identity', ''), ('gzip', 'gzip'), ('br', 'br, gzip')):
+            total = 0
+            for url in assets:
+                response = client.get(url, HTTP_ACCEPT_ENCODING=accept)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                total += len(body)
+                if label == 'identity':
+                    self.stdout.write(f"  {url}: {response.status_code} {len(body) / 1024:.1f} KB "
+                                      f"cache-control={response.get('Cache-Control')!r}")
+            totals[label] = total
+        for label, total in totals.items():
+            saved = (1 - total / totals['identity']) * 100 if totals['identity'] else 0
+            self.stdout.write(f"first visit, {label:<8}: {total / 1024:8.1f} KB ({saved:.0f}% saved)")
+
+        # repeat visit: immutable assets are not requested at all; the rest revalidate
+        immutable = revalidated = 0
+        for url in assets:
+            response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            if 'immutable' in response.get('Cache-Control', ''):
+                immutable += 1
+                continue
+            again = client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+            revalidated += again.status_code == 304
+        self.stdout.write(self.style.SUCCESS(
+            f"repeat visit: {immutable} of {len(assets)} assets served from browser cache without a "
+            f"request, {revalidated} revalidated with 304"
+        ))
@@ -0,0 +1,115 @@
+# shop/management/commands/bench_stock.py
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, transaction
+
+from shop.benchutils import throwaway_sqlite_db, journal_mode, percentile
+from shop.inventory import reserve_cart, release_expired, OutOfStock
+from shop.models import Stock, StockReservation
+
+
+class Command(BaseCommand):
+    help = ('Concurrency check for checkout stock reservation: many parallel checkouts '
+            'against limited stock on a throwaway SQLite (WAL) database. Fails on oversell.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help='Concurrent checkout threads')
+        parser.add_argument('--checkouts', type=int, default=500, help='Total checkout attempts')
+        parser.add_argument('--items', type=int, default=5, help='Distinct stocked items (size M)')
+        parser.add_argument('--stock', type=int, default=60, help='Initial quantity per item')
+        parser.add_argument('--lines', type=int, default=2, help='Cart lines per checkout')
+        parser.add_argument('--qty', type=int, default=1, help='Quantity per cart line')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with throwaway_sqlite_db(prefix='bench_stock_'):
+            self._run(options)
+
+    def _run(self, options):
+        mode = journal_mode()
+        n_items, initial = options['items'], options['stock']
+        Stock.objects.bulk_create(
+            Stock(category='product', item_id=i, size='M', quantity=initial) for i in range(1, n_items + 1)
+        )
+
+        rng = random.Random(options['seed'])
+        lines = min(options['lines'], n_items)
+        carts = []
+        for _ in range(options['checkouts']):
+            chosen = rng.sample(range(1, n_items + 1), lines)
+            carts.append({f"{i}_M": {'quantity': options['qty'], 'size': 'M'} for i in chosen})
+
+        results = {'ok': 0, 'out_of_stock': 0, 'locked': 0}
+        sold = {}
+        latencies = []
+
+        def worker(worker_no):
+            from django.db import connection as thread_conn
+            local = {'ok': 0, 'out_of_stock': 0, 'locked': 0}
+            local_sold, local_lat = {}, []
+            try:
+                for n in range(worker_no, len(carts), options['workers']):
+                    cart, holder = carts[n], f'bench-{n}'
+                    start = time.perf_counter()
+                    try:
+                        # checkout GET hold, then POST commit inside the order transaction
+                        reserve_cart(cart, holder)
+                        with transaction.atomic():
+                            reserve_cart(cart, holder, commit=True)
+                        local['ok'] += 1
+                        for key, item in cart.items():
+                            local_sold[key] = local_sold.get(key, 0) + item['quantity']
+                    except OutOfStock:
+                        local['out_of_stock'] += 1
+                    except OperationalError as exc:
+                        if 'locked' not in str(exc):
+                            raise
+                        local['locked'] += 1
+                    local_lat.append(time.perf_counter() - start)
+            finally:
+                thread_conn.close()
+            return local, local_sold, local_lat
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for local, local_sold, local_lat in pool.map(worker, range(options['workers'])):
+                for k, v in local.items():
+                    results[k] += v
+                for k, v in local_sold.items():
+                    sold[k] = sold.get(k, 0) + v
+                latencies.extend(local_lat)
+        elapsed = time.perf_counter() - started
+
+        # a hold that expired must go back to stock
+        release_expired()
+        leftover_holds = StockReservation.objects.count()
+
+        # verify: no oversell, and stock + sold adds up for every item
+        problems = []
+        for stock in Stock.objects.order_by('item_id'):
+            key = f"{stock.item_id}_M"
+            if sold.get(key, 0) > initial:
+                problems.append(f'{key}: oversold {sold[key]} > {initial}')
+            if stock.quantity != initial - sold.get(key, 0):
+                problems.append(f'{key}: quantity {stock.quantity} != {initial} - {sold.get(key, 0)}')
+        if leftover_holds:
+            problems.append(f'{leftover_holds} reservation rows left behind')
+
+        latencies.sort()
+
+        def pct(p):
+            return percentile(latencies, p) * 1000
+
+        self.stdout.write(f"journal_mode={mode} workers={options['workers']} "
+                          f"checkouts={options['checkouts']} items={n_items}x{initial} lines={lines}")
+        self.stdout.write(f"ok={results['ok']} out_of_stock={results['out_of_stock']} locked={results['locked']}")
+        self.stdout.write(f"elapsed={elapsed:.2f}s throughput={options['checkouts'] / elapsed:.1f} checkouts/s "
+                          f"p50={pct(0.50):.1f}ms p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms")
+        self.stdout.write('sold per item: ' + ', '.join(f'{k}={v}' for k, v in sorted(sold.items())))
+
+        if problems:
+            raise CommandError('Stock invariant violated: ' + '; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('No oversell: stock invariants hold'))
@@ -0,0 +1,185 @@
+# shop/management/commands/dedupe_media.py
+import hashlib
+import os
+import shutil
+from collections import defaultdict
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from shop import images
+from shop.models import CartItem, MediaBlob, Wishlist
+from shop.pagecache import bump_generation
+from shop.storage import BLOB_DIR, blob_name, blob_storage
+
+SKIP_DIRS = (images.DERIVATIVES_DIR, BLOB_DIR)
+
+# rows that keep a copied image URL instead of a file name
+URL_FIELDS = {
+    Wishlist: ('image_url', 'hover_url'),
+    CartItem: ('image_url',),
+}
+
+
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _repoint_session_carts(url_moves):
+    """
+    Rewrite the `image` URL of session cart lines; returns (sessions rewritten,
+    None), or (0, engine) when the session engine has no rows to rewrite.
+    """
+    store_class = import_module(settings.SESSION_ENGINE).SessionStore
+    if not hasattr(store_class, 'get_model_class'):
+        return 0, settings.SESSION_ENGINE
+    rewritten = 0
+    session_model = store_class.get_model_class()
+    for row in session_model.objects.filter(expire_date__gt=timezone.now()).iterator():
+        store = store_class(row.session_key)
+        data = store.decode(row.session_data)
+        changed = False
+        for item in (data.get('cart') or {}).values():
+            target = url_moves.get(item.get('image'))
+            if target:
+                item['image'] = target
+                changed = True
+        if changed:
+            session_model.objects.filter(pk=row.pk).update(session_data=store.encode(data))
+            rewritten += 1
+    return rewritten, None
+
+
+class Command(BaseCommand):
+    help = ('Move the catalog images into content-addressed blobs/: identical files collapse into '
+            'one, rows are repointed, reference counts rebuilt and the old copies removed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report duplicates and savings')
+        parser.add_argument('--keep-originals', action='store_true', help='Leave the old files in place')
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        storage = blob_storage()
+
+        # 1. hash every upload outside blobs/ and derivatives/
+        files = {}  # name -> (digest, size)
+        for dirpath, dirnames, filenames in os.walk(root):
+            if os.path.relpath(dirpath, root) == '.':
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                files[name] = (_digest(path), os.path.getsize(path))
+        groups = defaultdict(list)
+        for name, (digest, size) in files.items():
+            groups[digest].append(name)
+        total = sum(size for _, size in files.values())
+        unique = sum(files[names[0]][1] for names in groups.values())
+        duplicates = {digest: names for digest, names in groups.items() if len(names) > 1}
+        self.stdout.write(f"files={len(files)} bytes={total / 1024 / 1024:.1f} MB, distinct contents={len(groups)} "
+                          f"({unique / 1024 / 1024:.1f} MB); duplicate groups={len(duplicates)}")
+        for digest, names in sorted(duplicates.items(), key=lambda item: -len(item[1]))[:10]:
+            self.stdout.write(f"  {len(names)}x {files[names[0]][1] / 1024:.0f} KB: {', '.join(sorted(names))}")
+
+        # 2. legacy name -> blob name for everything the catalog references
+        referenced = defaultdict(list)  # name -> [(model, field)]
+        for model, fields in images.IMAGE_FIELDS.items():
+            for field in fields:
+                for name in model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}) \
+                        .values_list(field, flat=True).distinct():
+                    referenced[name].append((model, field))
+        moves, missing = {}, []
+        for name in referenced:
+            if name.startswith(BLOB_DIR + '/'):
+                continue
+            if name not in files:
+                missing.append(name)
+                continue
+            moves[name] = blob_name(files[name][0], name)
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{len(missing)} referenced files are missing and left as they are"))
+        self.stdout.write(f"referenced uploads={len(referenced)} to move={len(moves)} "
+                          f"-> distinct blobs={len(set(moves.values()))}")
+        if options['dry_run']:
+            return
+
+        # 3. write each distinct content once (hard link where possible)
+        for name, target in moves.items():
+            if not storage.exists(target):
+                target_path = storage.path(target)
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                try:
+                    os.link(os.path.join(root, name), target_path)
+                except OSError:
+                    shutil.copy2(os.path.join(root, name), target_path)
+
+        # 4. repoint the rows and rebuild the reference counts; copied URLs
+        #    (wishlist, DB and session carts) of every file step 6 may remove
+        #    move to the blob URL in the same transaction
+        by_digest = {files[name][0]: target for name, target in moves.items()}
+        url_moves = {
+            storage.url(name): storage.url(by_digest[digest])
+            for name, (digest, _) in files.items() if digest in by_digest
+        }
+        now = timezone.now()
+        with transaction.atomic():
+            for name, target in moves.items():
+                for model, field in referenced[name]:
+                    # new `updated`: the detail ETags (shop/conditional.py) must change with the image URL
+                    model.objects.filter(**{field: name}).update(**{field: target, 'updated': now})
+            repointed_urls = 0
+            for old_url, new_url in url_moves.items():
+                for model, fields in URL_FIELDS.items():
+                    for field in fields:
+                        repointed_urls += model.objects.filter(**{field: old_url}).update(**{field: new_url})
+            sessions, unsupported_engine = _repoint_session_carts(url_moves)
+            counts = defaultdict(int)
+            for model, fields in images.IMAGE_FIELDS.items():
+                for field in fields:
+                    for name in model.objects.filter(**{f'{field}__startswith': BLOB_DIR + '/'}) \
+                            .values_list(field, flat=True):
+                        counts[name] += 1
+            MediaBlob.objects.all().delete()
+            MediaBlob.objects.bulk_create(
+                MediaBlob(name=name, refcount=count, size=storage.size(name) if storage.exists(name) else 0)
+                for name, count in counts.items()
+            )
+        for model in images.IMAGE_FIELDS:
+            bump_generation(model)  # update() sent no post_save
+        self.stdout.write(f"repointed {repointed_urls} copied image URLs and {sessions} session carts")
+        if unsupported_engine:
+            self.stdout.write(self.style.WARNING(
+                f"session carts of {unsupported_engine} can't be rewritten; rerun with --keep-originals "
+                f"until those sessions expire"
+            ))
+
+        # 5. derivatives + metadata for the blob names
+        for target in sorted(set(moves.values())):
+            images.generate_derivatives(target)
+            meta = images.image_meta(target)
+            for model in images.IMAGE_FIELDS:
+                images.store_image_meta(model, target, meta)
+
+        # 6. drop the old copies whose content now lives in a blob
+        removed = freed = 0
+        if not options['keep_originals']:
+            stored = {files[name][0] for name in moves}
+            for name, (digest, size) in files.items():
+                if digest in stored:
+                    os.remove(os.path.join(root, name))
+                    images.delete_derivatives(name)
+                    removed += 1
+                    freed += size
+        blob_bytes = sum(storage.size(n) for n in set(moves.values()))
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(moves)} uploads -> {len(set(moves.values()))} blobs ({blob_bytes / 1024 / 1024:.1f} MB); "
+            f"removed {removed} old files ({freed / 1024 / 1024:.1f} MB); {len(counts)} blobs reference-counted"
+        ))
@@ -0,0 +1,45 @@
+# shop/management/commands/export_orders.py
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.exports import stream_orders, filter_orders, DEFAULT_CHUNK_SIZE, EXPORT_FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Stream CustomerOrder rows (one line per order item) as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--from', dest='date_from', help='Start date/datetime (inclusive), e.g. 2025-01-01')
+        parser.add_argument('--to', dest='date_to', help='End date/datetime (inclusive), e.g. 2025-01-31')
+        parser.add_argument('--customer', dest='customer_id', type=int, help='Only orders of this customer_id')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            qs = filter_orders(
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+                customer_id=options['customer_id'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size must be positive')
+
+        chunks = stream_orders(qs, fmt=options['format'], chunk_size=options['chunk_size'])
+
+        # write chunk by chunk so nothing accumulates in memory
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exported orders to {options['output']}"))
+        else:
+            out = sys.stdout
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
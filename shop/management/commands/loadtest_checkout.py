@@ -0,0 +1,332 @@
+# shop/management/commands/loadtest_checkout.py
+import contextvars
+import http.cookiejar
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from shop.benchutils import throwaway_sqlite_db, journal_mode, percentile, git_revision
+from shop.models import Category, Customer_Table, Product, Stock
+
+STEPS = ('login', 'add_to_cart', 'cart_detail', 'checkout_get', 'checkout_post')
+PASSWORD = 'loadtest-password'
+CHECKOUT_FORM = {
+    'first_name': 'Load', 'last_name': 'Test', 'email': 'loadtest@example.com',
+    'telephone': '0000000000', 'address': '1 Test Street', 'city': 'Testville',
+    'postcode': '00000', 'country': 'Testland', 'region_state': 'Test',
+    'payment_method': 'Cheque Payment',
+}
+
+
+class StepRecorder:
+    """Thread-safe per-step latency / status / query-count collection."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {step: {'latencies': [], 'queries': [], 'errors': 0, 'locked': 0, 'statuses': {}} for step in STEPS}
+
+    def record(self, step, seconds, status, queries=None, locked=0, error=False):
+        with self.lock:
+            d = self.data[step]
+            d['latencies'].append(seconds)
+            if queries is not None:
+                d['queries'].append(queries)
+            d['statuses'][str(status)] = d['statuses'].get(str(status), 0) + 1
+            d['locked'] += locked
+            d['errors'] += int(error)
+
+    def summary(self):
+        out = {}
+        for step, d in self.data.items():
+            lat = sorted(d['latencies'])
+            q = d['queries']
+            out[step] = {
+                'count': len(lat),
+                'errors': d['errors'],
+                'database_locked': d['locked'],
+                'statuses': d['statuses'],
+                'p50_ms': round(percentile(lat, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(lat, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(lat, 0.99) * 1000, 2),
+                'mean_ms': round(sum(lat) / len(lat) * 1000, 2) if lat else 0,
+                'max_ms': round(lat[-1] * 1000, 2) if lat else 0,
+                'queries_mean': round(sum(q) / len(q), 2) if q else None,
+                'queries_max': max(q) if q else None,
+            }
+        return out
+
+
+class QueryCounter:
+    """connection.execute_wrapper that counts queries and "database is locked" errors."""
+
+    def __init__(self):
+        self.queries = 0
+        self.locked = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            if 'locked' in str(exc):
+                self.locked += 1
+            raise
+
+
+# The counter of the request in flight. Context variables follow the request into
+# async views and their sync_to_async calls, so queries are counted on whichever
+# thread's connection runs them, not only the driver thread's.
+_active_counter = contextvars.ContextVar('loadtest_query_counter', default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _active_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def _watch_connection(sender=None, connection=None, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+class ClientDriver:
+    """Drives the views in-process through django.test.Client (query counts available)."""
+
+    def __init__(self, user_no=0):
+        # a client IP per virtual user: all from 127.0.0.1, logins would hit the
+        # per-IP login throttle (shop/throttling.py) instead of measuring checkout
+        remote_addr = f'10.{user_no >> 16 & 255}.{user_no >> 8 & 255}.{user_no & 255}'
+        self.client = Client(raise_request_exception=False, REMOTE_ADDR=remote_addr)
+
+    def request(self, method, path, data=None):
+        counter = QueryCounter()
+        _watch_connection(connection=connection)
+        token = _active_counter.set(counter)
+        try:
+            if method == 'POST':
+                response = self.client.post(path, data or {})
+            else:
+                response = self.client.get(path)
+        finally:
+            _active_counter.reset(token)
+        exc_info = getattr(response, 'exc_info', None)
+        locked = counter.locked or int(bool(exc_info) and 'locked' in str(exc_info[1]))
+        return response.status_code, response.get('Location', ''), counter.queries, locked
+
+    def close(self):
+        connection.close()
+
+
+class HttpDriver:
+    """Drives a running server over HTTP (cookies + CSRF handled, no query counts)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.jar), _NoRedirect(),
+        )
+
+    def _csrf(self):
+        for cookie in self.jar:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        body = None
+        headers = {'Referer': url}
+        if method == 'POST':
+            if not self._csrf():
+                self.request('GET', '/login')
+            form = dict(data or {}, csrfmiddlewaretoken=self._csrf())
+            body = urllib.parse.urlencode(form).encode()
+        try:
+            with self.opener.open(urllib.request.Request(url, data=body, headers=headers, method=method), timeout=60) as resp:
+                resp.read()
+                return resp.status, resp.headers.get('Location', ''), None, 0
+        except urllib.error.HTTPError as exc:
+            text = exc.read().decode('utf-8', 'replace')
+            return exc.code, exc.headers.get('Location', ''), None, int('database is locked' in text)
+
+    def close(self):
+        pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Load-test add_to_cart -> cart_detail -> checkout with concurrent virtual customers '
+            'and write a JSON report (p50/p95/p99, throughput, "database is locked", queries per step).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Concurrent virtual customers')
+        parser.add_argument('--iterations', type=int, default=5, help='Checkouts per virtual customer')
+        parser.add_argument('--products', type=int, default=20, help='Catalog products to seed')
+        parser.add_argument('--cart-lines', type=int, default=3, help='add_to_cart calls per checkout')
+        parser.add_argument('--stock', type=int, default=None,
+                            help='Seed this much stock per product/size (default: untracked)')
+        parser.add_argument('--base-url', help='Drive a running server (e.g. http://127.0.0.1:8000) instead of the test client; '
+                                               'its LOGIN_THROTTLE IP_RATE must allow --users logins from one address')
+        parser.add_argument('--in-place', action='store_true',
+                            help='Seed and run against the configured database instead of a throwaway copy')
+        parser.add_argument('--report', default='loadtest_report.json', help='JSON report path')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        # a running server uses its own (configured) database, so seed that one
+        in_place = options['in_place'] or bool(options['base_url'])
+        ctx = nullcontext() if in_place else throwaway_sqlite_db(prefix='loadtest_')
+        # the test client sends Host: testserver, which ALLOWED_HOSTS would reject
+        hosts = nullcontext() if options['base_url'] else override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        )
+        with ctx, hosts:
+            report = self._run(options, in_place)
+        with open(options['report'], 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['report']}"))
+
+    # ------------------------------------------------------------------ seeding
+    def _seed(self, options):
+        category, _ = Category.objects.get_or_create(slug='loadtest', defaults={'name': 'Loadtest'})
+        products = []
+        for i in range(options['products']):
+            p, _ = Product.objects.get_or_create(
+                slug=f'loadtest-product-{i}',
+                defaults={'category': category, 'title': f'Loadtest Product {i}', 'price': 10 + i, 'available': True},
+            )
+            products.append(p.product_id)
+        if options['stock'] is not None:
+            for pid in products:
+                for size in ('S', 'M', 'L'):
+                    Stock.objects.update_or_create(
+                        category='product', item_id=pid, size=size, defaults={'quantity': options['stock']},
+                    )
+        hashed = make_password(PASSWORD)
+        emails = []
+        for n in range(options['users']):
+            email = f'loadtest-{n}@example.com'
+            Customer_Table.objects.update_or_create(
+                email=email, defaults={'first_name': 'Load', 'last_name': f'User{n}', 'password': hashed},
+            )
+            emails.append(email)
+        return products, emails
+
+    # ------------------------------------------------------------------ run
+    def _run(self, options, in_place):
+        if options['users'] <= 0 or options['iterations'] <= 0:
+            raise CommandError('--users and --iterations must be positive')
+        products, emails = self._seed(options)
+        mode = journal_mode()
+        recorder = StepRecorder()
+        base_url = options['base_url']
+
+        def timed(driver, step, method, path, data=None, ok=None):
+            start = time.perf_counter()
+            try:
+                status, location, queries, locked = driver.request(method, path, data)
+            except OperationalError as exc:
+                recorder.record(step, time.perf_counter() - start, 'exception',
+                                locked=int('locked' in str(exc)), error=True)
+                return None, ''
+            error = status >= 500 or (ok is not None and not ok(status, location))
+            recorder.record(step, time.perf_counter() - start, status, queries, locked, error)
+            return status, location
+
+        def virtual_user(n):
+            rng = random.Random(options['seed'] * 1000 + n)
+            driver = HttpDriver(base_url) if base_url else ClientDriver(n)
+            orders = 0
+            try:
+                timed(driver, 'login', 'POST', '/login',
+                      {'customer[email]': emails[n], 'customer[password]': PASSWORD},
+                      ok=lambda s, loc: s == 302 and 'login' not in loc)
+                for _ in range(options['iterations']):
+                    for _ in range(options['cart_lines']):
+                        pid = rng.choice(products)
+                        size = rng.choice(('S', 'M', 'L'))
+                        timed(driver, 'add_to_cart', 'GET', f'/add-to-cart/product/{pid}/?size={size}',
+                              ok=lambda s, loc: s == 302)
+                    timed(driver, 'cart_detail', 'GET', '/cart/', ok=lambda s, loc: s == 200)
+                    timed(driver, 'checkout_get', 'GET', '/checkout/', ok=lambda s, loc: s == 200)
+                    status, location = timed(
+                        driver, 'checkout_post', 'POST', '/checkout/', CHECKOUT_FORM,
+                        ok=lambda s, loc: s == 302 and re.search(r'/index/?$', loc or '') is not None,
+                    )
+                    if status == 302 and re.search(r'/index/?$', location or ''):
+                        orders += 1
+            finally:
+                driver.close()
+            return orders
+
+        started = time.perf_counter()
+        connection_created.connect(_watch_connection)
+        try:
+            with ThreadPoolExecutor(max_workers=options['users']) as pool:
+                orders = sum(pool.map(virtual_user, range(options['users'])))
+        finally:
+            connection_created.disconnect(_watch_connection)
+        elapsed = time.perf_counter() - started
+
+        steps = recorder.summary()
+        total_requests = sum(s['count'] for s in steps.values())
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'git_revision': git_revision(),
+                'mode': 'http' if base_url else 'test_client',
+                'base_url': base_url,
+                'database': 'configured' if in_place else 'throwaway',
+                'journal_mode': mode,
+                'users': options['users'],
+                'iterations': options['iterations'],
+                'cart_lines': options['cart_lines'],
+                'products': options['products'],
+                'stock': options['stock'],
+            },
+            'totals': {
+                'elapsed_s': round(elapsed, 3),
+                'requests': total_requests,
+                'requests_per_s': round(total_requests / elapsed, 2) if elapsed else 0,
+                'orders': orders,
+                'orders_per_s': round(orders / elapsed, 2) if elapsed else 0,
+                'errors': sum(s['errors'] for s in steps.values()),
+                'database_locked': sum(s['database_locked'] for s in steps.values()),
+            },
+            'steps': steps,
+        }
+
+        self.stdout.write(f"{report['meta']['mode']} users={options['users']} iterations={options['iterations']} "
+                          f"journal_mode={mode} elapsed={elapsed:.2f}s")
+        self.stdout.write(f"{'step':<14}{'count':>7}{'err':>6}{'locked':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+        for step, s in steps.items():
+            q = '-' if s['queries_mean'] is None else f"{s['queries_mean']:.1f}"
+            self.stdout.write(f"{step:<14}{s['count']:>7}{s['errors']:>6}{s['database_locked']:>8}"
+                              f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{q:>9}")
+        t = report['totals']
+        self.stdout.write(f"throughput: {t['requests_per_s']} req/s, {t['orders_per_s']} orders/s "
+                          f"({t['orders']} orders, {t['errors']} errors, {t['database_locked']} locked)")
+        return report
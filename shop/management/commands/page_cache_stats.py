@@ -0,0 +1,23 @@
+# shop/management/commands/page_cache_stats.py
+from django.core.management.base import BaseCommand
+
+from shop.pagecache import page_cache_metrics, reset_page_cache_metrics
+
+
+class Command(BaseCommand):
+    help = ('Show page cache counters (hits, stale serves, misses, rebuilds, rebuild time). '
+            'Reads the configured cache, so it sees a running server only with a shared backend.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing')
+
+    def handle(self, *args, **options):
+        metrics = page_cache_metrics()
+        served = metrics['hit'] + metrics['stale'] + metrics['miss'] + metrics['miss_waited'] + metrics['miss_uncached']
+        for name, value in metrics.items():
+            self.stdout.write(f'{name:<16}{value:>12}')
+        if served:
+            self.stdout.write(f"{'hit_ratio':<16}{(metrics['hit'] + metrics['stale'] + metrics['miss_waited']) / served:>12.3f}")
+        if options['reset']:
+            reset_page_cache_metrics()
+            self.stdout.write('counters reset')
@@ -0,0 +1,12 @@
+# shop/management/commands/release_expired_reservations.py
+from django.core.management.base import BaseCommand
+
+from shop.inventory import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Return stock held by expired (abandoned) checkout reservations'
+
+    def handle(self, *args, **options):
+        released = release_expired()
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired reservation(s)'))
@@ -0,0 +1,19 @@
+# shop/management/commands/session_stats.py
+from django.core.management.base import BaseCommand
+
+from shop.sessions import reset_session_write_metrics, session_write_metrics
+
+
+class Command(BaseCommand):
+    help = ('Show session write counters (requests, requests that wrote the session, creates / saves / '
+            'deletes). Reads the configured cache, so it sees a running server only with a shared backend.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing')
+
+    def handle(self, *args, **options):
+        for name, value in session_write_metrics().items():
+            self.stdout.write(f'{name:<22}{value:>12}')
+        if options['reset']:
+            reset_session_write_metrics()
+            self.stdout.write('counters reset')
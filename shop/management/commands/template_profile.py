@@ -0,0 +1,81 @@
+# shop/management/commands/template_profile.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import Client
+from django.test.utils import override_settings
+
+from shop import templateprofile
+
+DEFAULT_URLS = (
+    '/index/', '/women_shop/', '/men_shop/', '/cosmetic/', '/jewellery/', '/bags/', '/shoes/',
+    '/faqs/', '/about_us/', '/Collections/', '/cart/', '/login', '/sign_up/',
+)
+
+
+class Command(BaseCommand):
+    help = ('Render pages with the template profiler on and print per-template render time '
+            'and node counts; --warm reports the cold compile cost that the startup warm-up removes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help=f"Paths to GET (default: {' '.join(DEFAULT_URLS)})")
+        parser.add_argument('--repeat', type=int, default=5, help='GETs per URL')
+        parser.add_argument('--top', type=int, default=20, help='Templates to list')
+        parser.add_argument('--warm', action='store_true', help='Time compiling every template from a cold cache')
+
+    def handle(self, *args, **options):
+        if options['repeat'] <= 0 or options['top'] <= 0:
+            raise CommandError('--repeat and --top must be positive')
+        if options['warm']:
+            self._warm(options)
+            return
+
+        client = Client()
+        templateprofile.reset()
+        statuses = {}
+        with override_settings(
+            PAGE_CACHE={'ENABLED': False},  # a cached page renders no templates
+            SESSION_ENGINE='django.contrib.sessions.backends.cache',  # no session rows
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        ):
+            try:
+                for url in options['urls'] or DEFAULT_URLS:
+                    for _ in range(options['repeat']):
+                        with templateprofile.collecting() as profile:
+                            response = client.get(url)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                        if profile.templates:
+                            templateprofile.record(profile)
+            finally:
+                templateprofile.uninstall()
+
+        result = templateprofile.report()
+        self.stdout.write(f"requests={result['requests']} statuses={statuses}")
+        self.stdout.write(f"{'template':<32} {'renders':>7} {'self ms':>9} {'avg ms':>8} "
+                          f"{'max ms':>8} {'nodes':>6} {'depth':>5}")
+        for row in result['templates'][:options['top']]:
+            self.stdout.write(
+                f"{row['template']:<32} {row['renders']:>7} {row['self_ms']:>9.2f} {row['avg_ms']:>8.3f} "
+                f"{row['max_ms']:>8.3f} {row['nodes']:>6} {row['include_depth']:>5}"
+            )
+        templateprofile.reset()
+
+    def _warm(self, options):
+        for backend in engines.all():
+            engine = getattr(backend, 'engine', None)
+            if engine is not None:
+                for loader in engine.template_loaders:
+                    loader.reset()
+        start = time.perf_counter()
+        results = templateprofile.warm_templates()
+        elapsed = time.perf_counter() - start
+        results.sort(key=lambda r: r[1], reverse=True)
+        for name, seconds, error in results[:options['top']]:
+            line = f"{name:<48} {seconds * 1000:>8.2f}ms"
+            self.stdout.write(line + (f"  FAILED: {error}" if error else ''))
+        failed = sum(1 for r in results if r[2])
+        self.stdout.write(self.style.SUCCESS(
+            f"compiled {len(results) - failed} templates in {elapsed * 1000:.0f}ms ({failed} failed)"
+        ))
@@ -0,0 +1,107 @@
+# shop/mediarefs.py
+"""
+Reference counts for the content-addressed catalog images (shop/storage.py).
+
+Every catalog image field that points at a blob holds one reference on its
+MediaBlob row: saving an item takes references on its new image names and
+drops them on the ones it no longer uses (pre_save remembers the old names),
+deleting an item drops all of its references. When a blob's count reaches
+zero, the blob, its file and its derivatives are removed once the
+transaction commits - after re-counting from the catalog tables, so a
+drifted counter can never delete a file that is still in use.
+
+Only names under blobs/ are counted; older uploads are moved there (and
+counted) by `manage.py dedupe_media`.
+"""
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .images import IMAGE_FIELDS, delete_derivatives
+from .models import MediaBlob
+from .storage import blob_storage, is_blob
+
+logger = logging.getLogger(__name__)
+
+
+def _names(instance, fields):
+    return [getattr(instance, field).name for field in fields if getattr(instance, field).name]
+
+
+def reference_count(name):
+    """References to `name` across every catalog image field (the source of truth)."""
+    return sum(
+        model.objects.filter(**{field: name}).count()
+        for model, fields in IMAGE_FIELDS.items()
+        for field in fields
+    )
+
+
+def acquire(name, count=1):
+    if not is_blob(name):
+        return
+    if MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + count):
+        return
+    storage = blob_storage()
+    size = storage.size(name) if storage.exists(name) else 0
+    _, created = MediaBlob.objects.get_or_create(name=name, defaults={'size': size, 'refcount': count})
+    if not created:
+        MediaBlob.objects.filter(name=name).update(refcount=F('refcount') + count)
+
+
+def release(name, count=1):
+    if not is_blob(name):
+        return
+    MediaBlob.objects.filter(name=name).update(refcount=Greatest(F('refcount') - count, 0))
+    transaction.on_commit(lambda: collect(name))
+
+
+def collect(name):
+    """Delete an unreferenced blob with its file and derivatives; returns True if it was deleted."""
+    actual = reference_count(name)
+    if actual:
+        MediaBlob.objects.filter(name=name).update(refcount=actual)
+        return False
+    deleted, _ = MediaBlob.objects.filter(name=name, refcount=0).delete()
+    if not deleted:
+        return False
+    storage = blob_storage()
+    if storage.exists(name):
+        storage.delete(name)
+    delete_derivatives(name)
+    logger.info('media: deleted unreferenced %s', name)
+    return True
+
+
+def _remember_old_names(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._media_names_before = []
+        return
+    row = sender.objects.filter(pk=instance.pk).values_list(*IMAGE_FIELDS[sender]).first()
+    instance._media_names_before = [name for name in row or () if name]
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = Counter(getattr(instance, '_media_names_before', []))
+    after = Counter(_names(instance, IMAGE_FIELDS[sender]))
+    for name, count in (after - before).items():
+        acquire(name, count)
+    for name, count in (before - after).items():
+        release(name, count)
+
+
+def _on_delete(sender, instance, **kwargs):
+    for name, count in Counter(_names(instance, IMAGE_FIELDS[sender])).items():
+        release(name, count)
+
+
+for _model in IMAGE_FIELDS:
+    pre_save.connect(_remember_old_names, sender=_model, dispatch_uid=f'mediarefs-pre-save-{_model.__name__}')
+    post_save.connect(_on_save, sender=_model, dispatch_uid=f'mediarefs-save-{_model.__name__}')
+    post_delete.connect(_on_delete, sender=_model, dispatch_uid=f'mediarefs-delete-{_model.__name__}')
@@ -0,0 +1,155 @@
+# shop/membership.py
+"""
+Per-customer "in wishlist" / "in cart" membership for listing and detail pages.
+
+Each item is packed into one int, (item_id << 3) | category_code, and the
+sets are kept in the session as sorted int lists:
+
+  - session['wishlist_members']: built with ONE values_list query the first
+    time it's needed after login, then kept up to date by add_to_wishlist /
+    remove_from_wishlist (no further queries).
+  - session['cart_members']: derived from session['cart'] (never queried) and
+    refreshed by every cart mutation.
+
+Within a request the lists are turned into frozensets once, so marking any
+number of cards is O(1) per card with zero extra queries
+(see templatetags/membership_extras.py).
+"""
+from .models import Wishlist, Product, Cosmetic, Jewellery, Shoes, Bag
+from .sessions import set_if_changed
+from .utils import parse_cart_key
+
+WISHLIST_SESSION_KEY = 'wishlist_members'
+CART_SESSION_KEY = 'cart_members'
+
+# 3 bits of category; wishlist uses 'bags', the cart 'bag' -> same code
+CATEGORY_CODES = {
+    'product': 1,
+    'cosmetic': 2,
+    'jewellery': 3,
+    'shoes': 4,
+    'shoe': 4,
+    'bag': 5,
+    'bags': 5,
+}
+
+MODEL_CATEGORIES = {
+    Product: 'product',
+    Cosmetic: 'cosmetic',
+    Jewellery: 'jewellery',
+    Shoes: 'shoes',
+    Bag: 'bag',
+}
+
+# per-request frozenset cache attribute
+_REQUEST_CACHE_ATTR = '_membership_sets'
+
+
+def pack(category, item_id):
+    """Pack (category, item_id) into one int; None for unknown categories/ids."""
+    code = CATEGORY_CODES.get(category)
+    if code is None or item_id is None:
+        return None
+    try:
+        return (int(item_id) << 3) | code
+    except (TypeError, ValueError):
+        return None
+
+
+def pack_object(obj):
+    """Pack a catalog model instance, a shop/cards.py card, or a card dict carrying it under 'obj'."""
+    if isinstance(obj, dict):
+        obj = obj.get('obj')
+    category = getattr(obj, 'card_category', None) or MODEL_CATEGORIES.get(type(obj))
+    if category is None:
+        return None
+    return pack(category, obj.pk)
+
+
+def _request_cache(request):
+    cache = getattr(request, _REQUEST_CACHE_ATTR, None)
+    if cache is None:
+        cache = {}
+        setattr(request, _REQUEST_CACHE_ATTR, cache)
+    return cache
+
+
+def _store(request, session_key, members):
+    if session_key == CART_SESSION_KEY:
+        # a missing cart set is derived from the (then empty) cart: [] needn't be written
+        set_if_changed(request.session, session_key, sorted(members), default=[])
+    else:
+        set_if_changed(request.session, session_key, sorted(members))  # missing = not built yet
+    _request_cache(request)[session_key] = frozenset(members)
+
+
+# ---- wishlist ----
+def wishlist_members(request):
+    """frozenset of packed wishlist items for the logged-in customer (empty for guests)."""
+    cache = _request_cache(request)
+    if WISHLIST_SESSION_KEY in cache:
+        return cache[WISHLIST_SESSION_KEY]
+
+    customer_id = request.session.get('customer_id')
+    if not customer_id:
+        members = frozenset()
+    elif WISHLIST_SESSION_KEY in request.session:
+        members = frozenset(request.session[WISHLIST_SESSION_KEY])
+    else:
+        rows = Wishlist.objects.filter(customer_id=customer_id).values_list('category', 'item_product_id')
+        members = frozenset(p for p in (pack(c or 'product', i) for c, i in rows) if p is not None)
+        _store(request, WISHLIST_SESSION_KEY, members)
+    cache[WISHLIST_SESSION_KEY] = members
+    return members
+
+
+def add_wishlist_member(request, category, item_id):
+    packed = pack(category, item_id)
+    if packed is None or WISHLIST_SESSION_KEY not in request.session:
+        return  # built lazily on next read
+    _store(request, WISHLIST_SESSION_KEY, set(request.session[WISHLIST_SESSION_KEY]) | {packed})
+
+
+def discard_wishlist_member(request, category, item_id):
+    packed = pack(category, item_id)
+    if packed is None or WISHLIST_SESSION_KEY not in request.session:
+        return
+    _store(request, WISHLIST_SESSION_KEY, set(request.session[WISHLIST_SESSION_KEY]) - {packed})
+
+
+def reset_wishlist_members(request):
+    """Forget the cached set (e.g. on login) so it's rebuilt for the current customer."""
+    request.session.pop(WISHLIST_SESSION_KEY, None)
+    _request_cache(request).pop(WISHLIST_SESSION_KEY, None)
+
+
+# ---- cart ----
+def _pack_cart(cart):
+    members = set()
+    for key, item in (cart or {}).items():
+        category, item_id, _ = parse_cart_key(key, item)
+        packed = pack(category, item_id)
+        if packed is not None:
+            members.add(packed)
+    return members
+
+
+def refresh_cart_members(request, cart=None):
+    """Recompute the cart set from session['cart'] (call after every cart mutation)."""
+    if cart is None:
+        cart = request.session.get('cart', {})
+    _store(request, CART_SESSION_KEY, _pack_cart(cart))
+
+
+def cart_members(request):
+    """frozenset of packed items currently in the session cart."""
+    cache = _request_cache(request)
+    if CART_SESSION_KEY in cache:
+        return cache[CART_SESSION_KEY]
+    if CART_SESSION_KEY in request.session:
+        members = frozenset(request.session[CART_SESSION_KEY])
+    else:
+        # sessions from before membership tracking: derive once, no query
+        members = frozenset(_pack_cart(request.session.get('cart', {})))
+    cache[CART_SESSION_KEY] = members
+    return members
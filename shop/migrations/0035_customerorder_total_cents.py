@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:02
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+
+def _to_cents(value):
+    try:
+        d = Decimal(repr(value) if isinstance(value, float) else str(value))
+        return int((d * 100).to_integral_value(rounding=ROUND_HALF_UP))
+    except Exception:
+        return 0
+
+
+def forwards(apps, schema_editor):
+    """Copy float totals / order item amounts into integer cents."""
+    CustomerOrder = apps.get_model('shop', 'CustomerOrder')
+    for order in CustomerOrder.objects.all().iterator(chunk_size=500):
+        items = order.order_items if isinstance(order.order_items, list) else []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            for field in ('price', 'subtotal'):
+                if field in item:
+                    item[f'{field}_cents'] = _to_cents(item.pop(field))
+        order.total_cents = _to_cents(order.total_price or 0)
+        order.save(update_fields=['total_cents', 'order_items'])
+
+
+def backwards(apps, schema_editor):
+    CustomerOrder = apps.get_model('shop', 'CustomerOrder')
+    for order in CustomerOrder.objects.all().iterator(chunk_size=500):
+        items = order.order_items if isinstance(order.order_items, list) else []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            for field in ('price', 'subtotal'):
+                if f'{field}_cents' in item:
+                    item[field] = int(item.pop(f'{field}_cents')) / 100
+        order.total_price = (order.total_cents or 0) / 100
+        order.save(update_fields=['total_price', 'order_items'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0034_alter_wishlist_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customerorder',
+            name='total_cents',
+            field=models.BigIntegerField(default=0, help_text='Order total incl. shipping, in cents'),
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(
+            model_name='customerorder',
+            name='total_price',
+        ),
+    ]
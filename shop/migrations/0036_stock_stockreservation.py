@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0035_customerorder_total_cents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Stock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('product', 'Product'), ('cosmetic', 'Cosmetic'), ('jewellery', 'Jewellery'), ('shoes', 'Shoes'), ('bag', 'Bag')], max_length=20)),
+                ('item_id', models.IntegerField()),
+                ('size', models.CharField(blank=True, default='', max_length=10)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'stock',
+                'unique_together': {('category', 'item_id', 'size')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('holder', models.CharField(db_index=True, max_length=64)),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='shop.stock')),
+            ],
+        ),
+    ]
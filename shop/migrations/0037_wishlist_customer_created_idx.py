@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0036_stock_stockreservation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wishlist',
+            index=models.Index(fields=['customer_id', 'created_at'], name='wishlist_customer_created_idx'),
+        ),
+    ]
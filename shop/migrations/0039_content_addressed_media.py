@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:36
+
+import shop.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0038_catalog_image_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='bag',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='bags/'),
+        ),
+        migrations.AlterField(
+            model_name='bag',
+            name='image_hover',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='bags/'),
+        ),
+        migrations.AlterField(
+            model_name='cosmetic',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='cosmetics/'),
+        ),
+        migrations.AlterField(
+            model_name='cosmetic',
+            name='image_hover',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='cosmetics/hover/'),
+        ),
+        migrations.AlterField(
+            model_name='jewellery',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='jewellery/'),
+        ),
+        migrations.AlterField(
+            model_name='jewellery',
+            name='image_hover',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='jewellery/hover/'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='hover_image',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='products/hover/'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='products/'),
+        ),
+        migrations.AlterField(
+            model_name='shoes',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='shoes/'),
+        ),
+        migrations.AlterField(
+            model_name='shoes',
+            name='image_hover',
+            field=models.ImageField(blank=True, null=True, storage=shop.storage.blob_storage, upload_to='shoes/hover/'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:52
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def forwards(apps, schema_editor):
+    """Existing bags / shoes were last changed no later than now: start from created_at."""
+    for model_name in ('Bag', 'Shoes'):
+        apps.get_model('shop', model_name).objects.update(updated=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0039_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bag',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='cosmetic',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='jewellery',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoes',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:55
+
+from django.db import migrations, models
+
+# session cart category -> model whose `name` a line's product_title was copied from
+NAMED_CATEGORIES = {'cosmetic': 'Cosmetic', 'jewellery': 'Jewellery', 'bag': 'Bag', 'shoes': 'Shoes'}
+
+
+def classify_existing(apps, schema_editor):
+    """
+    Rows saved before the category column all hold some model's id in
+    product_id. Where the stored title isn't that Product's but is the name of
+    exactly one other catalog item with that id, the row belongs to that item.
+    """
+    CartItem = apps.get_model('shop', 'CartItem')
+    product_titles = dict(apps.get_model('shop', 'Product').objects.values_list('pk', 'title'))
+    names = {
+        category: dict(apps.get_model('shop', model_name).objects.values_list('pk', 'name'))
+        for category, model_name in NAMED_CATEGORIES.items()
+    }
+    for item in CartItem.objects.only('pk', 'product_id', 'product_title'):
+        if not item.product_title or product_titles.get(item.product_id) == item.product_title:
+            continue
+        matches = [c for c, by_id in names.items() if by_id.get(item.product_id) == item.product_title]
+        if len(matches) == 1:
+            CartItem.objects.filter(pk=item.pk).update(category=matches[0])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0040_catalog_updated'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='cartitem',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='cartitem',
+            name='category',
+            field=models.CharField(default='product', max_length=20),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cartitem',
+            unique_together={('cart', 'category', 'product_id', 'size')},
+        ),
+        migrations.RunPython(classify_existing, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.urls import reverse
 from multiselectfield import MultiSelectField
+from .money import format_cents
+from .storage import blob_storage
 
 class Customer_Table(models.Model):
     customer_id = models.AutoField(primary_key=True)  # unique, auto-increment
@@ -32,11 +34,43 @@ class Category(models.Model):
     def get_absolute_url(self):
         return reverse('category_detail', args=[self.slug])
 
+class MediaBlob(models.Model):
+    """
+    A content-addressed catalog image file (shop/storage.py) and how many
+    catalog image fields point at it; deleted with its file at zero
+    (shop/mediarefs.py).
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount} refs)'
+
+
+class ImageMeta(models.Model):
+    """
+    Dimensions, dominant colour and a tiny blurred placeholder (data: URI) of
+    the main `image`, filled in on save by shop/images.py so cards can
+    reserve their box and paint a placeholder before the image loads.
+    """
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
+    # image name the fields above were computed for
+    image_meta_source = models.CharField(max_length=255, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
 # ✅ Function to return default sizes
 def default_sizes():
     return ['S', 'M', 'L', 'XL', 'XXL']
 
-class Product(models.Model):
+class Product(ImageMeta):
     product_id = models.AutoField(primary_key=True)
     category = models.ForeignKey('Category', related_name='products', on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
@@ -100,8 +134,8 @@ class Product(models.Model):
     )
 
     price = models.DecimalField(max_digits=8, decimal_places=2)
-    image = models.ImageField(upload_to='products/', blank=True, null=True)
-    hover_image = models.ImageField(upload_to='products/hover/', blank=True, null=True)
+    image = models.ImageField(upload_to='products/', blank=True, null=True, storage=blob_storage)
+    hover_image = models.ImageField(upload_to='products/hover/', blank=True, null=True, storage=blob_storage)
     available = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
@@ -149,6 +183,8 @@ class Cart(models.Model):
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    # session cart category (shop/utils.py CART_CATEGORY_MODELS); product_id is that model's id
+    category = models.CharField(max_length=20, default='product')
     product_id = models.IntegerField()                  # store product id (avoid FK migration pain)
     product_title = models.CharField(max_length=255, blank=True)
     image_url = models.CharField(max_length=500, blank=True)
@@ -159,7 +195,7 @@ class CartItem(models.Model):
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ('cart', 'product_id', 'size')
+        unique_together = ('cart', 'category', 'product_id', 'size')
 
     def __str__(self):
         return f'{self.quantity} x {self.product_title or self.product_id} ({self.size})'
@@ -184,21 +220,26 @@ class CustomerOrder(models.Model):
     # Order info
     order_notes = models.TextField(blank=True)
     payment_method = models.CharField(max_length=50)
-    order_items = models.JSONField()  # Store products as list of dicts
-    total_price = models.FloatField(default=0.0)
+    order_items = models.JSONField()  # list of dicts with price_cents / subtotal_cents
+    total_cents = models.BigIntegerField(default=0, help_text="Order total incl. shipping, in cents")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Order #{self.id} by {self.first_name} {self.last_name}"
 
+    def total_display(self):
+        return f"${format_cents(self.total_cents)}"
+    total_display.short_description = "Total"
 
-class Cosmetic(models.Model):
+
+class Cosmetic(ImageMeta):
     cosmetic_product_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=8, decimal_places=2)
-    image = models.ImageField(upload_to='cosmetics/', blank=True, null=True)
-    image_hover = models.ImageField(upload_to='cosmetics/hover/', blank=True, null=True)
+    image = models.ImageField(upload_to='cosmetics/', blank=True, null=True, storage=blob_storage)
+    image_hover = models.ImageField(upload_to='cosmetics/hover/', blank=True, null=True, storage=blob_storage)
     short_desc = models.TextField(blank=True, help_text="Short description of the product")
+    updated = models.DateTimeField(auto_now=True)
 
     # Collection Choices (checkbox / multiple selection)
     COLLECTION_CHOICES = [
@@ -227,13 +268,14 @@ class Cosmetic(models.Model):
     def __str__(self):
         return self.name
 
-class Jewellery(models.Model):
+class Jewellery(ImageMeta):
     jewellery_product_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=200)
     price = models.DecimalField(max_digits=8, decimal_places=2)
-    image = models.ImageField(upload_to='jewellery/', blank=True, null=True)
-    image_hover = models.ImageField(upload_to='jewellery/hover/', blank=True, null=True)
+    image = models.ImageField(upload_to='jewellery/', blank=True, null=True, storage=blob_storage)
+    image_hover = models.ImageField(upload_to='jewellery/hover/', blank=True, null=True, storage=blob_storage)
     short_desc = models.TextField(blank=True, help_text="Short description of the product")
+    updated = models.DateTimeField(auto_now=True)
 
     # Collection Choices (multi-select)
     COLLECTION_CHOICES = [
@@ -253,7 +295,7 @@ class Jewellery(models.Model):
         return self.name
 
 
-class Bag(models.Model):
+class Bag(ImageMeta):
     COLLECTION_CHOICES = [
         ('Most_Selling', 'Most Selling'),
         ('Trending', 'Trending'),
@@ -265,9 +307,10 @@ class Bag(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     collection = models.CharField(max_length=50, choices=COLLECTION_CHOICES, blank=True, null=True)
     desc = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='bags/', blank=True, null=True)
-    image_hover = models.ImageField(upload_to='bags/', blank=True, null=True)
+    image = models.ImageField(upload_to='bags/', blank=True, null=True, storage=blob_storage)
+    image_hover = models.ImageField(upload_to='bags/', blank=True, null=True, storage=blob_storage)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Bag"
@@ -281,7 +324,7 @@ class Bag(models.Model):
         return reverse('bag_info', args=[str(self.bag_product_id)])
 
 
-class Shoes(models.Model):
+class Shoes(ImageMeta):
     COLLECTION_CHOICES = [
         ('Most_Selling', 'Most Selling'),
         ('Trending', 'Trending'),
@@ -293,9 +336,10 @@ class Shoes(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     collection = models.CharField(max_length=50, choices=COLLECTION_CHOICES, blank=True, null=True)
     desc = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='shoes/', blank=True, null=True)
-    image_hover = models.ImageField(upload_to='shoes/hover/', blank=True, null=True)
+    image = models.ImageField(upload_to='shoes/', blank=True, null=True, storage=blob_storage)
+    image_hover = models.ImageField(upload_to='shoes/hover/', blank=True, null=True, storage=blob_storage)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Shoe"
@@ -337,6 +381,45 @@ class Wishlist(models.Model):
     hover_url = models.URLField(max_length=500, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # wishlist page: WHERE customer_id = ? ORDER BY created_at DESC
+            models.Index(fields=['customer_id', 'created_at'], name='wishlist_customer_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.customer_id}"
+
+
+class Stock(models.Model):
+    """On-hand quantity per catalog item and size ('' for items without sizes)."""
+    CATEGORY_CHOICES = [
+        ('product', 'Product'),
+        ('cosmetic', 'Cosmetic'),
+        ('jewellery', 'Jewellery'),
+        ('shoes', 'Shoes'),
+        ('bag', 'Bag'),
+    ]
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)  # same codes as session cart keys
+    item_id = models.IntegerField()
+    size = models.CharField(max_length=10, blank=True, default='')
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('category', 'item_id', 'size')
+        verbose_name_plural = "stock"
+
+    def __str__(self):
+        return f"{self.category} #{self.item_id} {self.size or '-'}: {self.quantity}"
+
+
+class StockReservation(models.Model):
+    """Stock held for an in-progress checkout; released back when it expires."""
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='reservations')
+    holder = models.CharField(max_length=64, db_index=True)  # session key of the checkout
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.stock} for {self.holder}"
@@ -0,0 +1,88 @@
+# shop/money.py
+"""
+Integer-cents money helpers.
+
+Cart, checkout and order amounts are carried as plain ints (cents) end to end:
+  - session cart items store 'price_cents'
+  - CustomerOrder.total_cents and order_items[*]['price_cents' / 'subtotal_cents']
+Decimal is only used at the catalog boundary (model DecimalFields), converted
+once with to_cents(). Formatting for templates / JSON goes through format_cents().
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+SHIPPING_CENTS = 5000
+
+# size surcharges (clothes / shoes), in cents
+SIZE_PRICE_OFFSETS_CENTS = {
+    'S': 0,
+    'M': 500,
+    'L': 1000,
+    'XL': 1500,
+    'XXL': 2000,
+}
+SIZE_ORDER = ['S', 'M', 'L', 'XL', 'XXL']
+
+
+def to_cents(value, default=0):
+    """
+    Convert a money amount to int cents (ROUND_HALF_UP).
+    Accepts Decimal (model fields), str like "12.5" / "12.50" (legacy session
+    prices), float (legacy order JSON) and int (whole currency units).
+    Returns `default` for empty or unparseable values.
+    """
+    if value is None or value == '' or isinstance(value, bool):
+        return default
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, str):
+        s = value.strip()
+        # fast path for the common "123" / "123.4" / "123.45" shapes
+        whole, _, frac = s.partition('.')
+        digits = whole[1:] if whole[:1] == '-' else whole
+        if digits.isdigit() and len(frac) <= 2 and (not frac or frac.isdigit()):
+            cents = int(digits) * 100 + int(frac.ljust(2, '0') or 0)
+            return -cents if whole[:1] == '-' else cents
+        value = s
+    try:
+        if isinstance(value, float):
+            value = repr(value)
+        d = Decimal(value) if not isinstance(value, Decimal) else value
+        return int((d * 100).to_integral_value(rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError, TypeError):
+        return default
+
+
+def format_cents(cents):
+    """Format int cents as a plain "1234.50" string (no currency sign)."""
+    try:
+        cents = int(cents)
+    except (TypeError, ValueError):
+        cents = 0
+    sign = '-' if cents < 0 else ''
+    units, rem = divmod(abs(cents), 100)
+    return f"{sign}{units}.{rem:02d}"
+
+
+def cents_to_decimal(cents):
+    """Return int cents as a 2-place Decimal (for DecimalField writes)."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def item_cents(item, field='price'):
+    """
+    Read an amount from a cart/order item dict as int cents.
+    Prefers the '<field>_cents' key and falls back to the legacy '<field>'
+    value (string in old sessions, float in old order JSON).
+    """
+    value = item.get(f'{field}_cents')
+    if value is not None:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+    return to_cents(item.get(field), 0)
+
+
+def size_price_cents(base_cents, size):
+    """Apply the size surcharge (if any) to a base price in cents."""
+    return base_cents + SIZE_PRICE_OFFSETS_CENTS.get((size or '').upper(), 0)
@@ -0,0 +1,379 @@
+# shop/pagecache.py
+"""
+Response cache for the catalog views, invalidated by per-model generations.
+
+    @page_cache(Product, Category)
+    def women_shop(request): ...
+
+Key = view + URL kwargs + normalized GET filters (shared by all visitors). Each entry
+records the generation of every model the view depends on; saving or deleting
+a Product / Cosmetic / Jewellery / Bag / Shoes / Category bumps that model's
+generation (post_save / post_delete below), which makes exactly the pages
+depending on it stale - no TTL guessing.
+
+Stale-while-revalidate:
+  - fresh (same generations, younger than SOFT_TTL)  -> served ('hit')
+  - stale (generation bumped or older than SOFT_TTL) -> served as is
+    ('stale') while ONE worker rebuilds it in the background: the rebuild is
+    guarded by a lock key (cache.add, LOCK_TIMEOUT) so rebuilds never stack
+    up, and runs on a small bounded thread pool (REBUILD_WORKERS)
+  - missing / older than HARD_TTL -> the lock holder builds it inline
+    ('miss'); other requests for the same page wait up to MISS_WAIT seconds
+    for that build instead of all rendering it at once (dogpile)
+  - detail pages (@page_cache(..., stale_on_change=False)) are only served
+    stale for age: once a generation changed, the item may be gone or
+    different, so the entry is dropped and rebuilt inline like a miss
+A render that can't be stored (404, redirect, session-dependent page)
+removes the entry instead of leaving the old page to be served until
+HARD_TTL ('rebuild_dropped' when it happens in the background).
+Counters for each outcome plus rebuild times are kept in the cache
+(page_cache_metrics(), `manage.py page_cache_stats`).
+
+Shared copies: the key has no per-visitor part. While a page is captured,
+the per-visitor bits (login link, cart badge, messages, wishlist / cart
+state of each card) render as holes (shop/holes.py) and
+{% csrf_token %} renders as a placeholder (the csrf_placeholder context
+processor); both are filled in for the requesting visitor every time the
+page is served. So one stored page serves everybody - crawlers, first-time
+visitors, customers with a cart. A view that still reads the session while
+being captured is personal: it is served but never stored.
+
+variant() names the visitor's personal state ('anon', or a digest of
+customer id, cart count and cart / wishlist membership) for callers that
+need to tell visitors apart, e.g. the ETags of shop/conditional.py.
+
+Generations live in the same cache as the pages, so with several worker
+processes CACHES must be shared (Redis / Memcached) for invalidation to reach
+every worker; LocMemCache is per process.
+
+Settings (all optional):
+
+    PAGE_CACHE = {
+        'ENABLED': True,
+        'CACHE_ALIAS': 'default',
+        'SOFT_TTL': 5 * 60,          # fresh for; then served stale while rebuilt
+        'HARD_TTL': 24 * 60 * 60,    # never served after this (cache timeout)
+        'LOCK_TIMEOUT': 30,          # max time one rebuild holds the lock
+        'MISS_WAIT': 2.0,            # how long a miss waits for another worker's build
+        'REBUILD_WORKERS': 2,        # background rebuild threads per process
+    }
+"""
+import copy
+import hashlib
+from importlib import import_module
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models.signals import post_save, post_delete
+from django.http import Http404, HttpResponse
+from django.middleware.csrf import get_token
+
+from .holes import CAPTURE_ATTR, fill
+from .membership import cart_members, wishlist_members
+from .models import Product, Cosmetic, Jewellery, Bag, Shoes, Category
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'SOFT_TTL': 5 * 60,
+    'HARD_TTL': 24 * 60 * 60,
+    'LOCK_TIMEOUT': 30,
+    'MISS_WAIT': 2.0,
+    'REBUILD_WORKERS': 2,
+}
+
+METRICS = ('hit', 'stale', 'miss', 'miss_waited', 'miss_uncached', 'rebuild', 'rebuild_dropped', 'rebuild_error',
+           'rebuild_ms')
+
+# models whose save/delete invalidates cached pages
+TRACKED_MODELS = (Product, Cosmetic, Jewellery, Bag, Shoes, Category)
+
+CSRF_PLACEHOLDER = '__PAGE_CACHE_CSRF_TOKEN__'
+_CAPTURE_ATTR = CAPTURE_ATTR
+
+
+def page_cache_settings():
+    return dict(DEFAULTS, **getattr(settings, 'PAGE_CACHE', {}))
+
+
+def _cache():
+    return caches[page_cache_settings()['CACHE_ALIAS']]
+
+
+# ---- generations ----
+def _generation_key(model):
+    return f'pagecache:gen:{model._meta.label_lower}'
+
+
+def generations(models):
+    """Current generation per model (missing counters start at a time-based value)."""
+    cache = _cache()
+    keys = [_generation_key(m) for m in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # time-based start: an evicted counter never restarts at an old value
+            cache.add(key, time.time_ns() // 1000, timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_generation(model):
+    cache = _cache()
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+def _on_catalog_change(sender, **kwargs):
+    bump_generation(sender)
+
+
+for _model in TRACKED_MODELS:
+    post_save.connect(_on_catalog_change, sender=_model, dispatch_uid=f'pagecache-save-{_model.__name__}')
+    post_delete.connect(_on_catalog_change, sender=_model, dispatch_uid=f'pagecache-delete-{_model.__name__}')
+
+
+# ---- keys ----
+def normalized_query(request):
+    """GET params as a stable string: keys sorted, values sorted, blanks dropped."""
+    parts = []
+    for key in sorted(request.GET):
+        values = sorted({v for v in request.GET.getlist(key) if v != ''})
+        for value in values:
+            parts.append(f'{key}={value}')
+    return '&'.join(parts)
+
+
+def variant(request):
+    session = request.session
+    customer_id = session.get('customer_id')
+    if not customer_id and not session.get('cart'):
+        return 'anon'
+    personal = (
+        customer_id,
+        session.get('cart_count', 0),
+        sorted(cart_members(request)),
+        sorted(wishlist_members(request)),
+    )
+    return 'user-' + hashlib.sha1(repr(personal).encode()).hexdigest()[:16]
+
+
+def page_key(request, view_name, view_kwargs):
+    raw = '|'.join([
+        view_name,
+        repr(sorted(view_kwargs.items())),
+        normalized_query(request),
+    ])
+    return 'pagecache:page:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+# ---- metrics (in the cache, so shared by all workers of a shared backend) ----
+def _count(name, amount=1):
+    cache = _cache()
+    key = f'pagecache:metric:{name}'
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def _record_rebuild_ms(ms):
+    _count('rebuild_ms', ms)
+    cache = _cache()
+    # max is best effort (read-modify-write)
+    if ms > (cache.get('pagecache:metric:rebuild_ms_max') or 0):
+        cache.set('pagecache:metric:rebuild_ms_max', ms, timeout=None)
+
+
+def page_cache_metrics():
+    cache = _cache()
+    values = cache.get_many([f'pagecache:metric:{n}' for n in METRICS + ('rebuild_ms_max',)])
+    metrics = {n: values.get(f'pagecache:metric:{n}', 0) for n in METRICS + ('rebuild_ms_max',)}
+    builds = metrics['rebuild'] + metrics['miss']
+    metrics['rebuild_ms_avg'] = round(metrics['rebuild_ms'] / builds, 1) if builds else 0
+    return metrics
+
+
+def reset_page_cache_metrics():
+    _cache().delete_many([f'pagecache:metric:{n}' for n in METRICS + ('rebuild_ms_max',)])
+
+
+# ---- CSRF placeholder ----
+def csrf_placeholder(request):
+    """Context processor: while capturing, {% csrf_token %} renders a placeholder."""
+    if getattr(request, _CAPTURE_ATTR, False):
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
+
+
+def _personalize(request, content):
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    return fill(request, content)
+
+
+def _serve(request, entry, status):
+    response = HttpResponse(_personalize(request, entry['content']), content_type=entry['content_type'])
+    response['X-Page-Cache'] = status
+    return response
+
+
+def _render(view, request, args, kwargs):
+    """Run the view with holes and the CSRF placeholder on; returns (response, cacheable)."""
+    session = request.session
+    accessed_before, session.accessed = session.accessed, False
+    setattr(request, _CAPTURE_ATTR, True)
+    try:
+        response = view(request, *args, **kwargs)
+    finally:
+        setattr(request, _CAPTURE_ATTR, False)
+        personal, session.accessed = session.accessed, session.accessed or accessed_before
+    if personal:
+        logger.warning('page cache: %s read the session while captured; not stored', request.path)
+    # not a plain page (redirect / error / streaming / view-set cookie / session-dependent)
+    cacheable = (response.status_code == 200 and not response.streaming and not response.cookies
+                 and not personal)
+    return response, cacheable
+
+
+def _build(view, request, args, kwargs, key, models, conf):
+    """Render and store one entry; returns (response, entry or None)."""
+    gens = generations(models)
+    start = time.perf_counter()
+    response, cacheable = _render(view, request, args, kwargs)
+    if not cacheable:
+        # never leave the previous page to be served for a page that now 404s / redirects
+        caches[conf['CACHE_ALIAS']].delete(key)
+        return response, None
+    entry = {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'gens': gens,
+        'created': time.time(),
+    }
+    caches[conf['CACHE_ALIAS']].set(key, entry, timeout=conf['HARD_TTL'])
+    _record_rebuild_ms(round((time.perf_counter() - start) * 1000))
+    return response, entry
+
+
+# ---- background rebuilds ----
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _rebuild_executor(conf):
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=conf['REBUILD_WORKERS'], thread_name_prefix='page-rebuild')
+    return _executor
+
+
+def _background_rebuild(view, request, args, kwargs, key, models, conf):
+    cache = caches[conf['CACHE_ALIAS']]
+    try:
+        _, entry = _build(view, request, args, kwargs, key, models, conf)
+        _count('rebuild' if entry is not None else 'rebuild_dropped')
+    except Http404:
+        cache.delete(key)  # the item is gone: stop serving its page
+        _count('rebuild_dropped')
+    except Exception:
+        _count('rebuild_error')
+        logger.exception('page cache rebuild failed for %s', request.path)
+    finally:
+        cache.delete(key + ':lock')
+        connections.close_all()  # this pool thread's DB connections
+
+
+def _rebuild_request(request):
+    """
+    Detached copy of the request for a background render: own attributes and
+    an empty, never-saved session, so the rebuild thread never touches the
+    live request's session (shared pages don't depend on it anyway).
+    """
+    clone = copy.copy(request)
+    clone.META = dict(request.META)
+    clone.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    return clone
+
+
+# ---- decorator ----
+def page_cache(*models, stale_on_change=True):
+    """
+    Cache GET/HEAD 200 responses of a catalog view with stale-while-revalidate;
+    entries go stale when any of `models` changes. stale_on_change=False
+    (detail pages) rebuilds inline instead of serving a page whose models changed.
+    """
+    def decorator(view):
+        view_name = f'{view.__module__}.{view.__qualname__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            conf = page_cache_settings()
+            if not conf['ENABLED'] or request.method not in ('GET', 'HEAD') or args:
+                return view(request, *args, **kwargs)
+
+            cache = caches[conf['CACHE_ALIAS']]
+            key = page_key(request, view_name, kwargs)
+            lock_key = key + ':lock'
+            entry = cache.get(key)
+
+            if entry is not None:
+                age = time.time() - entry['created']
+                changed = entry['gens'] != generations(models)
+                if not changed and age < conf['SOFT_TTL']:
+                    _count('hit')
+                    return _serve(request, entry, 'hit')
+                if changed and not stale_on_change:
+                    cache.delete(key)  # -> hard miss below
+                    entry = None
+            if entry is not None:
+                # stale: serve it; the first request to take the lock rebuilds in the background
+                _count('stale')
+                if cache.add(lock_key, 1, timeout=conf['LOCK_TIMEOUT']):
+                    _rebuild_executor(conf).submit(
+                        _background_rebuild, view, _rebuild_request(request), args, kwargs, key, models, conf,
+                    )
+                return _serve(request, entry, 'stale')
+
+            # hard miss: one builder, everyone else briefly waits for its result
+            if not cache.add(lock_key, 1, timeout=conf['LOCK_TIMEOUT']):
+                deadline = time.monotonic() + conf['MISS_WAIT']
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        _count('miss_waited')
+                        return _serve(request, entry, 'hit')
+                # builder is slow or died: render for this request without storing
+                response, _ = _render(view, request, args, kwargs)
+                if not response.streaming:
+                    response.content = _personalize(request, response.content)
+                _count('miss_uncached')
+                return response
+
+            try:
+                response, entry = _build(view, request, args, kwargs, key, models, conf)
+            finally:
+                cache.delete(lock_key)
+            _count('miss')
+            if entry is None:
+                if not response.streaming:
+                    response.content = _personalize(request, response.content)
+                return response
+            return _serve(request, entry, 'miss')
+        return wrapper
+    return decorator
@@ -0,0 +1,97 @@
+# shop/revalidation.py
+"""
+Checkout-time revalidation of the session cart.
+
+The session stores the unit price seen when the item was added. Before an
+order is built, every line is re-resolved against the catalog with ONE query
+per category present in the cart (at most one per catalog model), so the
+query count doesn't grow with cart size:
+  - price changed        -> line price_cents updated
+  - item unavailable     -> line removed (Product.available is False)
+  - item deleted         -> line removed
+"""
+from django.db.models import Q
+
+from .models import CartItem
+from .money import to_cents, size_price_cents
+from .utils import CART_CATEGORY_MODELS, parse_cart_key
+
+PRICE_CHANGED = 'price_changed'
+UNAVAILABLE = 'unavailable'
+MISSING = 'missing'
+
+
+def _current_catalog(lines_by_category):
+    """
+    {category: {item_id: (price, available)}} using one values() query per category.
+    """
+    catalog = {}
+    for category, item_ids in lines_by_category.items():
+        model, id_field = CART_CATEGORY_MODELS[category]
+        fields = [id_field, 'price']
+        has_available = any(f.name == 'available' for f in model._meta.concrete_fields)
+        if has_available:
+            fields.append('available')
+        rows = model.objects.filter(**{f'{id_field}__in': item_ids}).values_list(*fields)
+        catalog[category] = {
+            row[0]: (row[1], row[2] if has_available else True) for row in rows
+        }
+    return catalog
+
+
+def revalidate_cart(cart):
+    """
+    Re-check price and availability of every line in `cart` (mutated in place).
+    Returns a list of change dicts:
+        {'key', 'name', 'reason', 'old_cents', 'new_cents', 'category', 'item_id', 'size'}
+    Lines whose key can't be mapped to a catalog model are left untouched.
+    """
+    parsed = {}
+    lines_by_category = {}
+    for key, item in cart.items():
+        category, item_id, size = parse_cart_key(key, item)
+        if item_id is None or category not in CART_CATEGORY_MODELS:
+            continue
+        parsed[key] = (category, item_id, size)
+        lines_by_category.setdefault(category, set()).add(item_id)
+
+    catalog = _current_catalog(lines_by_category)
+
+    changes = []
+    for key, (category, item_id, size) in parsed.items():
+        item = cart[key]
+        name = item.get('name') or 'An item'
+        old_cents = item.get('price_cents')
+        current = catalog[category].get(item_id)
+
+        if current is None or not current[1]:
+            del cart[key]
+            changes.append({
+                'key': key, 'name': name,
+                'reason': MISSING if current is None else UNAVAILABLE,
+                'old_cents': old_cents, 'new_cents': None,
+                'category': category, 'item_id': item_id, 'size': size,
+            })
+            continue
+
+        new_cents = size_price_cents(to_cents(current[0]), size)
+        if old_cents != new_cents:
+            item['price_cents'] = new_cents
+            item.pop('price', None)  # legacy string price
+            changes.append({
+                'key': key, 'name': name, 'reason': PRICE_CHANGED,
+                'old_cents': old_cents, 'new_cents': new_cents,
+                'category': category, 'item_id': item_id, 'size': size,
+            })
+    return changes
+
+
+def drop_removed_lines_from_db_cart(customer_id, changes):
+    """Delete DB CartItem rows for lines revalidation removed (single DELETE, keyed by category too)."""
+    cond = Q()
+    for change in changes:
+        if change['reason'] == PRICE_CHANGED:
+            continue
+        cond |= Q(category=change['category'], product_id=change['item_id'], size=change['size'][:10])
+    if cond:
+        CartItem.objects.filter(cond, cart__customer_id=customer_id).delete()
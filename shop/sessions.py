@@ -0,0 +1,103 @@
+# shop/sessions.py
+"""
+Session engine that counts its writes (SESSION_ENGINE = 'shop.sessions').
+
+The database backend, unchanged, except that every write (create, update,
+delete) is counted on the session object; SessionWriteMetricsMiddleware adds
+the counts of each request to counters in the cache:
+
+    requests              requests seen
+    requests_with_writes  requests that wrote the session at least once
+    creates / saves / deletes
+
+(session_write_metrics(), `manage.py session_stats`).
+
+Writes should only happen on real state changes. `session[key] = value`
+always marks the session modified, even when the value is the same, so
+views that keep a derived value in the session (cart_count, ...) use
+set_if_changed(). Django never saves a session that holds no data, so a
+visitor who only browses - nothing in the cart, not logged in - never gets a
+django_session row or a session cookie.
+
+Settings:
+
+    SESSION_WRITE_METRICS = True   # counters on/off
+"""
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+METRICS = ('requests', 'requests_with_writes', 'creates', 'saves', 'deletes')
+
+_MISSING = object()
+
+
+def set_if_changed(session, key, value, default=_MISSING):
+    """
+    session[key] = value, leaving the session unmodified if it already holds
+    `value` - or holds nothing and `value` is the `default` readers assume.
+    """
+    current = session.get(key, default)
+    if current is not _MISSING and current == value:
+        return False
+    session[key] = value
+    return True
+
+
+class SessionStore(DBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self.writes = {'creates': 0, 'saves': 0, 'deletes': 0}
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return super().save(must_create=must_create)  # create() -> save(must_create=True), counted there
+        super().save(must_create=must_create)
+        self.writes['creates' if must_create else 'saves'] += 1
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        self.writes['deletes'] += 1
+
+
+# ---- metrics ----
+def _count(name, amount=1):
+    key = f'sessions:metric:{name}'
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+
+
+def session_write_metrics():
+    values = cache.get_many([f'sessions:metric:{n}' for n in METRICS])
+    metrics = {n: values.get(f'sessions:metric:{n}', 0) for n in METRICS}
+    writes = metrics['creates'] + metrics['saves'] + metrics['deletes']
+    metrics['writes_per_request'] = round(writes / metrics['requests'], 3) if metrics['requests'] else 0
+    return metrics
+
+
+def reset_session_write_metrics():
+    cache.delete_many([f'sessions:metric:{n}' for n in METRICS])
+
+
+class SessionWriteMetricsMiddleware:
+    """Counts session writes per request; goes before SessionMiddleware so it sees its save."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SESSION_WRITE_METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        _count('requests')
+        writes = getattr(getattr(request, 'session', None), 'writes', None)
+        if writes and any(writes.values()):
+            _count('requests_with_writes')
+            for name, amount in writes.items():
+                if amount:
+                    _count(name, amount)
+        return response
@@ -0,0 +1,227 @@
+# shop/staticassets.py
+"""
+Fingerprinted, precompressed static files and the middleware that serves them.
+
+Build step (`manage.py collectstatic`, with STORAGES['staticfiles'] set to
+PrecompressedManifestStaticFilesStorage):
+  - every file is also written as name.<content hash>.ext and listed in
+    staticfiles.json; {% static %} resolves to the hashed name when DEBUG is off
+  - text-like hashed files (css / js / svg / fonts other than woff*) get .gz
+    siblings, and .br siblings when the `brotli` package is installed; a
+    sibling is only kept when it is actually smaller, and hashed names never
+    change content, so re-runs skip existing siblings
+  - url() references in the CSS to files that don't exist in static/ are left
+    as they are (logged) instead of failing the build
+  - until collectstatic has run (no staticfiles.json, or a file added since),
+    {% static %} falls back to the unhashed name instead of raising (logged
+    once per process), so a missed deploy step gives uncached assets rather
+    than a 500 on every page
+
+Serving (STATIC_ASSET_SERVING, StaticAssetMiddleware) for GET/HEAD under STATIC_URL:
+  - picks the .br / .gz sibling the client accepts (Accept-Encoding, q=0
+    honoured), with Content-Encoding and Vary: Accept-Encoding
+  - hashed names: Cache-Control "public, max-age=31536000, immutable", so
+    repeat visits don't even revalidate; other names get a short max-age
+  - ETag / Last-Modified with 304s, and a FileResponse so the WSGI server's
+    file wrapper (sendfile) streams the body without copying it through Python
+Under `runserver` with DEBUG on, staticfiles serves static/ itself as before.
+"""
+import gzip
+import logging
+import mimetypes
+import os
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # optional: no .br siblings without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.eot', '.ttf', '.otf', '.map', '.json', '.txt', '.xml', '.ico')
+MIN_COMPRESS_SIZE = 512
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_MAX_AGE = 60
+
+# Accept-Encoding token -> sibling suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False  # names missing from the manifest resolve unhashed (stored_name below)
+    _warned_uncollected = False
+
+    def stored_name(self, name):
+        # {% static %}: a name the manifest doesn't list (collectstatic not run yet, or
+        # the file added since) is linked unhashed; said once per process, not per render
+        clean_name = urlsplit(unquote(name)).path.strip()
+        if self.hashed_files.get(self.hash_key(clean_name)) is None:
+            if not self._warned_uncollected:
+                self._warned_uncollected = True
+                logger.warning('static: %s is not in %s (has collectstatic run?); linking unhashed names',
+                               clean_name, self.manifest_name)
+            return name
+        return super().stored_name(name)
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            # a url() in some CSS pointing at a file that isn't in static/
+            logger.warning('static: %s is referenced but missing; left unhashed', name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            for compressed_name in self.compress(hashed_name):
+                yield hashed_name, compressed_name, True
+
+    def compress(self, name):
+        """Write the .gz / .br siblings of one stored file; returns the names written."""
+        if not name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+            return []
+        written = []
+        data = None
+        for _, suffix in ENCODINGS:
+            if suffix == '.br' and brotli is None:
+                continue
+            target = name + suffix
+            if self.exists(target):
+                continue
+            if data is None:
+                with self.open(name) as original:
+                    data = original.read()
+                if len(data) < MIN_COMPRESS_SIZE:
+                    return written
+            if suffix == '.br':
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                self._save(target, ContentFile(compressed))
+                written.append(target)
+        return written
+
+
+def accepted_encodings(header):
+    """Content codings acceptable per an Accept-Encoding header (q=0 excluded)."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class StaticAssetMiddleware:
+    """Serve STATIC_ROOT (built by collectstatic) with precompressed siblings and far-future caching."""
+
+    def __init__(self, get_response):
+        prefix = settings.STATIC_URL or ''
+        if not getattr(settings, 'STATIC_ASSET_SERVING', False) or not settings.STATIC_ROOT or not prefix.startswith('/'):
+            raise MiddlewareNotUsed  # off, or static files come from another host / CDN
+        self.get_response = get_response
+        self.prefix = prefix
+        self.root = str(settings.STATIC_ROOT)
+        self.max_age = getattr(settings, 'STATIC_ASSET_MAX_AGE', DEFAULT_MAX_AGE)
+        self._immutable = None
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            response = self.serve(request, request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def immutable_names(self):
+        """Hashed names from the collectstatic manifest (read once per process)."""
+        if self._immutable is None:
+            self._immutable = frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return self._immutable
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        encoding = None
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for coding, suffix in ENCODINGS:
+            if coding in accepted:
+                try:
+                    stat = os.stat(path + suffix)
+                except OSError:
+                    continue
+                path += suffix
+                encoding = coding
+                break
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(stat.st_mtime),
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': (
+                IMMUTABLE_CACHE_CONTROL if name in self.immutable_names() else f'public, max-age={self.max_age}'
+            ),
+        }
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            not_modified = if_none_match.strip() == '*' or etag in [t.strip() for t in if_none_match.split(',')]
+        else:
+            not_modified = not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime)
+        if not_modified:
+            response = HttpResponseNotModified()
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'text/javascript'):
+            content_type += '; charset=utf-8'
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response.headers.pop('Content-Disposition', None)
+        response['Content-Length'] = str(stat.st_size)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -0,0 +1,89 @@
+# shop/storage.py
+"""
+Content-addressed storage for the catalog images.
+
+An upload is stored under the SHA-256 of its bytes, whatever it was called:
+
+    blobs/3f/3fa2c1...e9.jpg
+
+so uploading the same picture twice - for one product or for a product and a
+bag - writes it once and every row points at the same file (and the same
+derivatives, /img/ cache entries and CDN object). Nothing is ever
+overwritten with different content, so blob files can be cached forever.
+
+Used by the catalog ImageFields via storage=blob_storage (STORAGES['blobs']);
+files are written to a temp name and renamed into place, so a concurrent
+identical upload never sees a partial file. Which rows use a blob, and
+deleting it once none do, is handled by shop/mediarefs.py.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.files.utils import validate_file_name
+
+BLOB_DIR = 'blobs'
+DIGEST_CHARS = 40
+
+
+def file_digest(content):
+    """Hex SHA-256 of a File's bytes (leaves it rewound)."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(digest, original_name):
+    ext = os.path.splitext(original_name)[1].lower()
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[:DIGEST_CHARS]}{ext}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_DIR + '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+        name = blob_name(file_digest(content), name)
+        validate_file_name(name, allow_relative_path=True)
+        if not self.exists(name):
+            self._save_atomic(name, content)
+        return name
+
+    def _save_atomic(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.upload-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                for chunk in content.chunks():
+                    handle.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp, self.file_permissions_mode)
+            # same name = same bytes, so losing a race to another writer is harmless
+            os.replace(tmp, full_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def get_available_name(self, name, max_length=None):
+        return name  # identical content shares the name; nothing to disambiguate
+
+
+def blob_storage():
+    """Storage of the catalog ImageFields (a callable, so migrations reference it instead of a serialized instance)."""
+    return storages['blobs']
@@ -0,0 +1,267 @@
+# shop/templateprofile.py
+"""
+Opt-in template render profiler and the startup template warm-up.
+
+Profiler (TEMPLATE_PROFILING = True):
+  - Template._render is wrapped so every render of a template - the page
+    itself, its {% extends %} parents and every {% include %} - is timed.
+    Per request we keep, per template: renders, inclusive time, self time
+    (inclusive minus the templates rendered inside it), node count and
+    include depth.
+  - TemplateProfilerMiddleware adds an X-Template-Profile header (total time
+    plus the top templates by self time) and folds the request into a
+    per-process aggregate, served as JSON at /__debug__/templates/
+    (?reset=1 clears it) and printed by `manage.py template_profile`.
+  - Off by default: the middleware removes itself (MiddlewareNotUsed) and
+    Template._render is left untouched.
+
+Warm-up (TEMPLATE_WARMUP = True, run from wsgi.py / asgi.py):
+  warm_templates() compiles every template the loaders can see into the
+  cached loader, so the first request on a new worker doesn't pay the parse
+  cost (index_copy.html alone is ~186 KB of source).
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.template import engines, TemplateSyntaxError
+from django.template.base import Node, Template
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'X-Template-Profile'
+HEADER_TOP = 5
+
+_current = ContextVar('template_profile', default=None)
+_original_render = None
+_install_lock = threading.Lock()
+
+
+def profiling_enabled():
+    return getattr(settings, 'TEMPLATE_PROFILING', False)
+
+
+# ---- per-request collection ----
+def node_count(template):
+    """Nodes in this template's own tree (includes / parents not followed); cached on the template."""
+    count = getattr(template, '_profile_node_count', None)
+    if count is None:
+        count = len(template.nodelist.get_nodes_by_type(Node))
+        template._profile_node_count = count
+    return count
+
+
+class RequestProfile:
+    def __init__(self):
+        self.templates = {}   # name -> {'renders', 'total', 'self', 'nodes', 'depth'}
+        self.total = 0.0      # time in top-level renders
+        self._stack = []      # child time accumulated per open render
+
+    def enter(self):
+        self._stack.append(0.0)
+
+    def leave(self, template, elapsed):
+        child = self._stack.pop()
+        depth = len(self._stack)
+        if self._stack:
+            self._stack[-1] += elapsed
+        else:
+            self.total += elapsed
+        name = template.origin.template_name or template.name or '<string>'
+        stats = self.templates.get(name)
+        if stats is None:
+            stats = self.templates[name] = {
+                'renders': 0, 'total': 0.0, 'self': 0.0, 'nodes': node_count(template), 'depth': depth,
+            }
+        stats['renders'] += 1
+        stats['total'] += elapsed
+        stats['self'] += elapsed - child
+        stats['depth'] = min(stats['depth'], depth)
+
+    def header_value(self):
+        top = sorted(self.templates.items(), key=lambda item: item[1]['self'], reverse=True)[:HEADER_TOP]
+        parts = [
+            f"total={self.total * 1000:.2f}ms",
+            f"templates={len(self.templates)}",
+            f"nodes={sum(s['nodes'] * s['renders'] for s in self.templates.values())}",
+        ]
+        parts += [
+            f"{name};self={s['self'] * 1000:.2f}ms;total={s['total'] * 1000:.2f}ms;"
+            f"nodes={s['nodes']};renders={s['renders']}"
+            for name, s in top
+        ]
+        return ', '.join(parts)
+
+
+def _profiled_render(self, context):
+    profile = _current.get()
+    if profile is None:
+        return _original_render(self, context)
+    profile.enter()
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        profile.leave(self, time.perf_counter() - start)
+
+
+def install():
+    """Wrap Template._render (idempotent)."""
+    global _original_render
+    with _install_lock:
+        if _original_render is None:
+            _original_render = Template._render
+            Template._render = _profiled_render
+
+
+def uninstall():
+    global _original_render
+    with _install_lock:
+        if _original_render is not None:
+            Template._render = _original_render
+            _original_render = None
+
+
+@contextmanager
+def collecting():
+    """Collect template timings for the enclosed block; yields the RequestProfile."""
+    install()
+    profile = RequestProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+# ---- per-process aggregate ----
+_aggregate = {}
+_aggregate_requests = 0
+_aggregate_lock = threading.Lock()
+
+
+def record(profile):
+    global _aggregate_requests
+    with _aggregate_lock:
+        _aggregate_requests += 1
+        for name, s in profile.templates.items():
+            agg = _aggregate.get(name)
+            if agg is None:
+                agg = _aggregate[name] = {
+                    'requests': 0, 'renders': 0, 'total': 0.0, 'self': 0.0, 'max': 0.0,
+                    'nodes': s['nodes'], 'depth': s['depth'],
+                }
+            agg['requests'] += 1
+            agg['renders'] += s['renders']
+            agg['total'] += s['total']
+            agg['self'] += s['self']
+            agg['max'] = max(agg['max'], s['total'])
+            agg['nodes'] = s['nodes']
+            agg['depth'] = min(agg['depth'], s['depth'])
+
+
+def report():
+    """Aggregate so far, templates sorted by total self time (ms)."""
+    with _aggregate_lock:
+        rows = [
+            {
+                'template': name,
+                'requests': a['requests'],
+                'renders': a['renders'],
+                'self_ms': round(a['self'] * 1000, 3),
+                'total_ms': round(a['total'] * 1000, 3),
+                'avg_ms': round(a['total'] * 1000 / a['renders'], 3),
+                'max_ms': round(a['max'] * 1000, 3),
+                'nodes': a['nodes'],
+                'include_depth': a['depth'],
+            }
+            for name, a in _aggregate.items()
+        ]
+        requests = _aggregate_requests
+    rows.sort(key=lambda row: row['self_ms'], reverse=True)
+    return {'requests': requests, 'templates': rows}
+
+
+def reset():
+    global _aggregate_requests
+    with _aggregate_lock:
+        _aggregate.clear()
+        _aggregate_requests = 0
+
+
+class TemplateProfilerMiddleware:
+    """Times the templates rendered for each request; only active with TEMPLATE_PROFILING."""
+
+    def __init__(self, get_response):
+        if not profiling_enabled():
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collecting() as profile:
+            response = self.get_response(request)
+        if profile.templates:
+            response[HEADER] = profile.header_value()
+            record(profile)
+        return response
+
+
+def report_view(request):
+    """JSON aggregate for /__debug__/templates/ (only routed when profiling is on)."""
+    if request.GET.get('reset'):
+        reset()
+    return JsonResponse(report())
+
+
+# ---- warm-up ----
+def template_names(engine):
+    """Every template file under the engine's loader directories."""
+    names = set()
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            for directory in inner.get_dirs():
+                directory = str(directory)
+                for root, _, files in os.walk(directory):
+                    for filename in files:
+                        if filename.endswith(('.html', '.txt', '.xml')):
+                            names.add(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates():
+    """
+    Compile every template into the cached loader. Returns [(name, seconds, error)];
+    templates that fail to compile are logged and skipped.
+    """
+    results = []
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name in template_names(engine):
+            start = time.perf_counter()
+            error = None
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as exc:
+                error = str(exc)
+                logger.warning('template warm-up: %s does not compile: %s', name, exc)
+            results.append((name, time.perf_counter() - start, error))
+    return results
+
+
+def warm_up():
+    """Startup hook for wsgi.py / asgi.py (TEMPLATE_WARMUP)."""
+    if not getattr(settings, 'TEMPLATE_WARMUP', True):
+        return
+    start = time.perf_counter()
+    results = warm_templates()
+    logger.info('template warm-up: %d templates compiled in %.0fms',
+                sum(1 for _, _, error in results if error is None), (time.perf_counter() - start) * 1000)
@@ -0,0 +1,56 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from shop.imagecache import resized_url
+from shop.images import derivative_settings, media_name, srcsets
+
+register = template.Library()
+
+
+def _meta_attrs(meta):
+    """width / height + inline placeholder background from an ImageMeta item."""
+    if meta is None or not getattr(meta, 'image_width', None) or not getattr(meta, 'image_height', None):
+        return ''
+    background = meta.image_color or 'transparent'
+    if meta.image_placeholder:
+        background += f' url("{meta.image_placeholder}") center / cover no-repeat'
+    return format_html(
+        ' width="{}" height="{}" style="height:auto;aspect-ratio:{}/{};background:{}"',
+        meta.image_width, meta.image_height, meta.image_width, meta.image_height, background,
+    )
+
+
+@register.simple_tag
+def responsive_img(url, alt='', css_class='', sizes=None, meta=None, **attrs):
+    """
+    {% responsive_img product.image_url alt=product.title css_class="primary blur-up" meta=product %}
+
+    <picture> with WebP + JPEG srcsets when the media image has derivatives,
+    otherwise the same plain <img src> the cards used before. meta (a catalog
+    item) reserves the image box and paints its stored blurred placeholder.
+    """
+    extra = format_html(
+        '{}{}', _meta_attrs(meta), format_html_join('', ' {}="{}"', ((k.replace('_', '-'), v) for k, v in attrs.items())),
+    )
+    sets = srcsets(url)
+    if sets is None:
+        return format_html('<img class="{}" src="{}" alt="{}" title="{}" loading="lazy"{}>',
+                           css_class, url, alt, alt, extra)
+    webp, jpeg, fallback = sets
+    sizes = sizes or derivative_settings()['SIZES']
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img class="{}" src="{}" srcset="{}" sizes="{}" alt="{}" title="{}" loading="lazy" decoding="async"{}>'
+        '</picture>',
+        webp, sizes, css_class, fallback, jpeg, sizes, alt, alt, extra,
+    )
+
+
+@register.filter
+def resized(url, size):
+    """{{ product.image_url|resized:"360x504" }} -> /img/360x504/... for media images (others unchanged)."""
+    name = media_name(url)
+    if name is None:
+        return url
+    width, _, height = size.partition('x')
+    return resized_url(name, int(width), int(height or 0))
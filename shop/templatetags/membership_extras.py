@@ -0,0 +1,19 @@
+from django import template
+
+from shop.membership import pack_object, wishlist_members, cart_members
+
+register = template.Library()
+
+
+@register.filter
+def in_wishlist(obj, request):
+    """{% if product|in_wishlist:request %} - O(1), no query per card."""
+    packed = pack_object(obj)
+    return packed is not None and bool(request) and packed in wishlist_members(request)
+
+
+@register.filter
+def in_cart(obj, request):
+    """{% if product|in_cart:request %} - O(1), no query per card."""
+    packed = pack_object(obj)
+    return packed is not None and bool(request) and packed in cart_members(request)
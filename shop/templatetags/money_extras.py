@@ -0,0 +1,14 @@
+from django import template
+
+from shop.money import format_cents
+
+register = template.Library()
+
+
+@register.filter
+def money(cents):
+    """Render int cents as "12.50" (use as ${{ item.price_cents|money }})."""
+    if cents is None or cents == '':
+        return ''
+    return format_cents(cents)
+
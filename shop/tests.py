@@ -1,3 +1,303 @@
-from django.test import TestCase
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO, StringIO
+from threading import Barrier, Thread
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from . import imagecache
+from .hashing import acheck_password
+from .inventory import OutOfStock, release_expired, reserve_cart
+from .models import Customer_Table, Stock, StockReservation
+from .throttling import CacheBucketStore, LocalBucketStore, LoginThrottle
+
+
+def _cart(*lines):
+    """Session cart of product lines (item_id, size, quantity)."""
+    return {f"{item_id}_{size}": {'quantity': qty, 'size': size} for item_id, size, qty in lines}
+
+
+class ReserveCartTests(TestCase):
+    def setUp(self):
+        self.dress = Stock.objects.create(category='product', item_id=1, size='M', quantity=3)
+        self.lipstick = Stock.objects.create(category='cosmetic', item_id=1, size='', quantity=2)
+
+    def test_hold_decrements_stock_and_writes_reservations(self):
+        cart = _cart((1, 'M', 2))
+        cart['cosmetic_1'] = {'quantity': 1}
+        reserve_cart(cart, 'holder-a')
+        self.dress.refresh_from_db()
+        self.lipstick.refresh_from_db()
+        self.assertEqual((self.dress.quantity, self.lipstick.quantity), (1, 1))
+        self.assertEqual(StockReservation.objects.filter(holder='holder-a').count(), 2)
+
+    def test_reentering_checkout_refreshes_the_hold(self):
+        reserve_cart(_cart((1, 'M', 2)), 'holder-a')
+        reserve_cart(_cart((1, 'M', 1)), 'holder-a')
+        self.dress.refresh_from_db()
+        self.assertEqual(self.dress.quantity, 2)
+        self.assertEqual(StockReservation.objects.get(holder='holder-a').quantity, 1)
+
+    def test_commit_is_final_and_leaves_no_hold(self):
+        reserve_cart(_cart((1, 'M', 1)), 'holder-a')
+        reserve_cart(_cart((1, 'M', 1)), 'holder-a', commit=True)
+        self.dress.refresh_from_db()
+        self.assertEqual(self.dress.quantity, 2)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_untracked_items_are_not_limited(self):
+        self.assertEqual(reserve_cart(_cart((99, 'M', 50)), 'holder-a'), [])
+
+    def test_out_of_stock_rolls_back_every_line(self):
+        cart = _cart((1, 'M', 1))
+        cart['cosmetic_1'] = {'quantity': 5}
+        with self.assertRaises(OutOfStock) as raised:
+            reserve_cart(cart, 'holder-a')
+        self.assertEqual(raised.exception.lines, [{
+            'key': 'cosmetic_1', 'category': 'cosmetic', 'item_id': 1, 'size': '',
+            'requested': 5, 'available': 2,
+        }])
+        self.dress.refresh_from_db()
+        self.lipstick.refresh_from_db()
+        self.assertEqual((self.dress.quantity, self.lipstick.quantity), (3, 2))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_expired_holds_go_back_to_stock(self):
+        reserve_cart(_cart((1, 'M', 2)), 'abandoned', ttl=60)
+        reserve_cart(_cart((1, 'M', 1)), 'active', ttl=60 * 60)
+        self.assertEqual(release_expired(now=timezone.now() + timedelta(minutes=5)), 1)
+        self.dress.refresh_from_db()
+        self.assertEqual(self.dress.quantity, 2)
+        self.assertEqual(list(StockReservation.objects.values_list('holder', flat=True)), ['active'])
+
+    def test_expired_holds_of_the_same_item_are_released_before_reserving(self):
+        reserve_cart(_cart((1, 'M', 3)), 'abandoned', ttl=0)
+        reserve_cart(_cart((1, 'M', 3)), 'holder-a')  # would be short without the release
+        self.assertEqual(list(StockReservation.objects.values_list('holder', flat=True)), ['holder-a'])
+
+    def test_release_expired_reservations_command(self):
+        reserve_cart(_cart((1, 'M', 2)), 'abandoned', ttl=0)
+        out = StringIO()
+        call_command('release_expired_reservations', stdout=out)
+        self.assertIn('Released 1 expired reservation(s)', out.getvalue())
+        self.dress.refresh_from_db()
+        self.assertEqual(self.dress.quantity, 3)
+
+
+class ReserveCartConcurrencyTests(TransactionTestCase):
+    THREADS = 12
+    STOCK = 5
+
+    def test_parallel_checkouts_never_oversell(self):
+        stock = Stock.objects.create(category='product', item_id=1, size='M', quantity=self.STOCK)
+        barrier = Barrier(self.THREADS)
+        outcomes = []
+
+        def checkout(n):
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        reserve_cart(_cart((1, 'M', 1)), f'holder-{n}', commit=True)
+                        outcomes.append('sold')
+                    except OutOfStock:
+                        outcomes.append('out_of_stock')
+                    except OperationalError as exc:
+                        # the in-memory test database reports contention instead of waiting
+                        if 'locked' not in str(exc):
+                            raise
+                        continue
+                    return
+            finally:
+                connection.close()
+
+        threads = [Thread(target=checkout, args=(n,)) for n in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('sold'), self.STOCK)
+        self.assertEqual(outcomes.count('out_of_stock'), self.THREADS - self.STOCK)
+        stock.refresh_from_db()
+        self.assertEqual(stock.quantity, 0)
+
+
+@override_settings(LOGIN_THROTTLE={'ENABLED': False}, ALLOWED_HOSTS=['testserver'])
+class AsyncLoginTests(TestCase):
+    PASSWORD = 'correct horse battery'
+
+    def setUp(self):
+        self.customers = [
+            Customer_Table.objects.create(
+                email=f'async-{n}@example.com', first_name=f'Async{n}', last_name='User',
+                password=make_password(self.PASSWORD),
+            )
+            for n in range(2)
+        ]
+
+    def _login(self, client, email, password):
+        return client.post('/login', {'customer[email]': email, 'customer[password]': password})
+
+    async def test_login_sets_the_session_and_redirects(self):
+        client = AsyncClient()
+        response = await self._login(client, 'async-0@example.com', self.PASSWORD)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], '/index/')
+        session = await client.asession()
+        self.assertEqual(await session.aget('customer_id'), self.customers[0].customer_id)
+
+    async def test_wrong_password_and_unknown_email_stay_on_the_form(self):
+        client = AsyncClient()
+        for email, password in (('async-0@example.com', 'wrong'), ('nobody@example.com', self.PASSWORD)):
+            response = await self._login(client, email, password)
+            self.assertEqual(response.status_code, 200)
+        session = await client.asession()
+        self.assertIsNone(await session.aget('customer_id'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=2)
+    async def test_hashes_run_in_parallel_without_blocking_the_event_loop(self):
+        # each hash waits for the other one and for the loop to tick meanwhile:
+        # only passes if both run at once on pool threads while the loop stays free
+        barrier, loop_ticked = Barrier(2, timeout=10), threading.Event()
+        loop_thread = threading.get_ident()
+        hash_threads = []
+
+        def hashing(password, encoded, setter=None):
+            hash_threads.append(threading.current_thread().name)
+            self.assertNotEqual(threading.get_ident(), loop_thread)
+            barrier.wait()
+            self.assertTrue(loop_ticked.wait(timeout=10))
+            return check_password(password, encoded, setter)
+
+        async def tick():
+            await asyncio.sleep(0.01)
+            loop_ticked.set()
+
+        encoded = self.customers[0].password
+        with mock.patch('shop.hashing.check_password', hashing):
+            ok, bad, _ = await asyncio.gather(
+                acheck_password(self.PASSWORD, encoded), acheck_password('wrong', encoded), tick(),
+            )
+        self.assertEqual((ok, bad), (True, False))
+        self.assertEqual(len(hash_threads), 2)
+        self.assertTrue(all(name.startswith('password-hash') for name in hash_threads))
+
+    async def test_sign_up_stores_a_hashed_password(self):
+        response = await AsyncClient().post('/sign_up/', {
+            'first_name': 'New', 'last_name': 'Customer', 'email': 'new@example.com',
+            'password': self.PASSWORD, 'phone': '0123456789', 'address': '1 Street', 'city': 'Town',
+        })
+        self.assertEqual(response.status_code, 302)
+        customer = await Customer_Table.objects.aget(email='new@example.com')
+        self.assertNotEqual(customer.password, self.PASSWORD)
+        self.assertTrue(check_password(self.PASSWORD, customer.password))
+
+
+class LoginThrottleTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.throttle = self._throttle(LocalBucketStore())
+
+    def _throttle(self, store):
+        return LoginThrottle(store, ip_rate=(3, 60), email_rate=(2, 300), clock=lambda: self.now)
+
+    def _request(self, ip='10.0.0.1'):
+        return RequestFactory().post('/login', REMOTE_ADDR=ip)
+
+    def test_exhausted_ip_bucket_rejects_with_retry_after(self):
+        for n in range(3):
+            self.assertEqual(self.throttle.hit(self._request(), f'user{n}@example.com'), 0)
+        self.assertEqual(self.throttle.hit(self._request(), 'user9@example.com'), 20)  # 1 token per 20s
+        self.assertEqual(self.throttle.hit(self._request('10.0.0.2'), 'user9@example.com'), 0)
+
+    def test_ip_bucket_refills_over_time(self):
+        for n in range(3):
+            self.throttle.hit(self._request(), f'user{n}@example.com')
+        self.now += 10
+        self.assertEqual(self.throttle.hit(self._request(), 'user3@example.com'), 10)
+        self.now += 10
+        self.assertEqual(self.throttle.hit(self._request(), 'user3@example.com'), 0)
+        self.assertGreater(self.throttle.hit(self._request(), 'user4@example.com'), 0)
+
+    def test_exhausted_email_bucket_rejects_from_any_ip(self):
+        for n in range(2):
+            self.assertEqual(self.throttle.hit(self._request(f'10.0.1.{n}'), 'victim@example.com'), 0)
+        self.assertEqual(self.throttle.hit(self._request('10.0.1.9'), 'Victim@Example.com '), 150)
+
+    def test_succeeded_resets_only_the_email_bucket(self):
+        for _ in range(2):
+            self.throttle.hit(self._request(), 'user@example.com')
+        self.assertGreater(self.throttle.hit(self._request(), 'user@example.com'), 0)  # email empty; IP now empty too
+        self.throttle.succeeded('user@example.com')
+        self.assertEqual(self.throttle.hit(self._request('10.0.0.2'), 'user@example.com'), 0)
+        self.assertEqual(self.throttle.hit(self._request(), 'other@example.com'), 20)
+
+    def test_disabled_throttle_never_rejects(self):
+        throttle = LoginThrottle(LocalBucketStore(), ip_rate=(1, 60), enabled=False)
+        for _ in range(5):
+            self.assertEqual(throttle.hit(self._request(), 'user@example.com'), 0)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'login-throttle-tests',
+    }})
+    def test_cache_store_keeps_the_same_buckets(self):
+        throttle = self._throttle(CacheBucketStore())
+        for n in range(3):
+            self.assertEqual(throttle.hit(self._request(), f'user{n}@example.com'), 0)
+        self.assertEqual(throttle.hit(self._request(), 'user9@example.com'), 20)
+        self.now += 20
+        self.assertEqual(throttle.hit(self._request(), 'user9@example.com'), 0)
+
+
+class ResizedImageTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix='imagecache_tests_')
+        os.makedirs(os.path.join(self.tmp, 'media', 'products'))
+        Image.new('RGB', (800, 600), 'red').save(os.path.join(self.tmp, 'media', 'products', 'red.jpg'))
+        overrides = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp, 'media'), ALLOWED_HOSTS=['testserver'],
+            IMAGE_RESIZE={'SIZES': ('360x0',), 'CACHE_DIR': os.path.join(self.tmp, 'cache')},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def _get(self):
+        response = self.client.get('/img/360x0/products/red.jpg', HTTP_ACCEPT='image/webp')
+        self.assertEqual(response.status_code, 200)
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (360, 270)))
+
+    def test_renders_once_then_serves_the_cached_file(self):
+        with mock.patch.object(imagecache, 'render', wraps=imagecache.render) as render:
+            self._get()
+            self._get()
+        self.assertEqual(render.call_count, 1)
+
+    def test_file_evicted_right_after_it_is_stored_is_served_from_memory(self):
+        store = imagecache.DiskLRU.store
+
+        def store_then_evict(lru, path, data):
+            store(lru, path, data)
+            os.remove(path)
+
+        with mock.patch.object(imagecache.DiskLRU, 'store', store_then_evict):
+            self._get()
+
+    def test_evicted_cached_file_is_rendered_again(self):
+        self._get()
+        shutil.rmtree(os.path.join(self.tmp, 'cache'))
+        with mock.patch.object(imagecache, 'render', wraps=imagecache.render) as render:
+            self._get()
+        self.assertEqual(render.call_count, 1)
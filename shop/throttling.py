@@ -0,0 +1,201 @@
+# shop/throttling.py
+"""
+Token-bucket throttling for login attempts.
+
+login_view asks the throttle BEFORE the customer lookup and the PBKDF2
+check_password, so a credential-stuffing burst is rejected for the price of a
+dict lookup instead of pinning a worker's CPU on hashing.
+
+Two buckets are charged per attempt:
+  - per client IP      (one source hammering many emails)
+  - per email address  (many sources hammering one account)
+
+Each bucket holds up to `capacity` tokens and refills continuously at
+capacity / period tokens per second. An attempt costs one token from each;
+when either bucket is empty the attempt is rejected with a retry-after.
+
+Stores:
+  - 'local' (default): in-process dict, bounded (LRU eviction), thread-safe.
+    Limits are per worker process.
+  - 'cache': any configured Django cache (e.g. Redis / Memcached) so all
+    workers share the buckets. The read-modify-write is not atomic, so under
+    heavy concurrency a few extra attempts can slip through; the CPU bound
+    still holds.
+
+Settings (all optional):
+
+    LOGIN_THROTTLE = {
+        'ENABLED': True,
+        'STORE': 'local',            # or 'cache'
+        'CACHE_ALIAS': 'default',    # for STORE='cache'
+        'IP_RATE': (20, 60),         # 20 attempts, refilled over 60s
+        'EMAIL_RATE': (5, 300),      # 5 attempts, refilled over 5 min
+        'MAX_KEYS': 100000,          # local store size bound
+        'TRUST_X_FORWARDED_FOR': False,
+    }
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULTS = {
+    'ENABLED': True,
+    'STORE': 'local',
+    'CACHE_ALIAS': 'default',
+    'IP_RATE': (20, 60),
+    'EMAIL_RATE': (5, 300),
+    'MAX_KEYS': 100000,
+    'TRUST_X_FORWARDED_FOR': False,
+}
+
+
+def _refill(tokens, last, now, capacity, period):
+    """Tokens available at `now` for a bucket last seen at (tokens, last)."""
+    return min(capacity, tokens + (now - last) * capacity / period)
+
+
+class LocalBucketStore:
+    """In-process token buckets: {key: (tokens, last_ts)}, LRU-bounded."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def take(self, key, capacity, period, now):
+        """Consume one token. Returns seconds to wait (0.0 when allowed)."""
+        with self.lock:
+            tokens, last = self.buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, last, now, capacity, period)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self.buckets[key] = (tokens, now)
+                wait = (1 - tokens) * period / capacity
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return wait
+
+    def reset(self, key):
+        with self.lock:
+            self.buckets.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """Token buckets in a Django cache, shared across worker processes."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, period, now):
+        tokens, last = self.cache.get(key) or (capacity, now)
+        tokens = _refill(tokens, last, now, capacity, period)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) * period / capacity
+        # entry can expire once the bucket would be full again
+        self.cache.set(key, (tokens, now), timeout=math.ceil(period) + 1)
+        return wait
+
+    def reset(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        pass  # entries expire on their own
+
+
+class LoginThrottle:
+    def __init__(self, store, ip_rate=(20, 60), email_rate=(5, 300), enabled=True,
+                 trust_forwarded=False, clock=time.monotonic):
+        self.store = store
+        self.ip_rate = tuple(ip_rate)
+        self.email_rate = tuple(email_rate)
+        self.enabled = enabled
+        self.trust_forwarded = trust_forwarded
+        self.clock = clock
+
+    @classmethod
+    def from_settings(cls):
+        conf = dict(DEFAULTS, **getattr(settings, 'LOGIN_THROTTLE', {}))
+        if conf['STORE'] == 'cache':
+            store = CacheBucketStore(conf['CACHE_ALIAS'])
+        else:
+            store = LocalBucketStore(conf['MAX_KEYS'])
+        # a cache store shares wall-clock timestamps between processes
+        clock = time.time if conf['STORE'] == 'cache' else time.monotonic
+        return cls(store, conf['IP_RATE'], conf['EMAIL_RATE'], conf['ENABLED'],
+                   conf['TRUST_X_FORWARDED_FOR'], clock)
+
+    def client_ip(self, request):
+        if self.trust_forwarded:
+            forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR', '') or 'unknown'
+
+    @staticmethod
+    def _email_key(email):
+        # hashed so raw addresses don't end up as cache keys
+        return 'login-throttle:email:' + hashlib.sha1(email.strip().lower().encode()).hexdigest()
+
+    def hit(self, request, email):
+        """
+        Charge one login attempt. Returns 0 when allowed, otherwise the number
+        of seconds (rounded up) until the next attempt would be accepted.
+        """
+        if not self.enabled:
+            return 0
+        now = self.clock()
+        wait = self.store.take('login-throttle:ip:' + self.client_ip(request), *self.ip_rate, now)
+        if wait:
+            return math.ceil(wait)
+        return math.ceil(self.store.take(self._email_key(email), *self.email_rate, now))
+
+    async def ahit(self, request, email):
+        """hit() for async views; only a shared cache store does blocking I/O."""
+        if isinstance(self.store, LocalBucketStore):
+            return self.hit(request, email)
+        return await sync_to_async(self.hit, thread_sensitive=False)(request, email)
+
+    async def asucceeded(self, email):
+        if isinstance(self.store, LocalBucketStore):
+            return self.succeeded(email)
+        return await sync_to_async(self.succeeded, thread_sensitive=False)(email)
+
+    def succeeded(self, email):
+        """A correct password refills the account's bucket (the IP bucket keeps counting)."""
+        if self.enabled:
+            self.store.reset(self._email_key(email))
+
+
+_login_throttle = None
+
+
+def get_login_throttle():
+    global _login_throttle
+    if _login_throttle is None:
+        _login_throttle = LoginThrottle.from_settings()
+    return _login_throttle
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _login_throttle
+    if setting in ('LOGIN_THROTTLE', 'CACHES'):
+        _login_throttle = None
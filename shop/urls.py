@@ -37,6 +37,8 @@ urlpatterns = [
     path('shoes/', views.shoes, name='shoes'),
     path('shoes/<int:shoes_product_id>/', views.shoes_info, name='shoes_info'),
 
+    path('img/<int:width>x<int:height>/<path:path>', views.resized_image, name='resized_image'),
+
     path('faqs/', views.faqs, name='faqs'),
     path('about_us/', views.about_us, name='about_us'),
     path('contact/', views.contact_view, name='contact'),
@@ -48,6 +50,7 @@ urlpatterns = [
     # path('add-to-wishlist/<int:product_id>/', views.add_to_wishlist, name='add_to_wishlist'),
     path('add-to-wishlist/<str:category>/<int:item_id>/', views.add_to_wishlist, name='add_to_wishlist'),
     path('wishlist/remove/<int:wishlist_id>/', views.remove_from_wishlist, name='remove_from_wishlist'),
+    path('wishlist/move-to-cart/', views.move_wishlist_to_cart, name='move_wishlist_to_cart'),
 
 ]
 
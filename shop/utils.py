@@ -1,6 +1,55 @@
 # shop/utils.py
-from decimal import Decimal, ROUND_HALF_UP
-from .models import Cart, CartItem, Customer_Table, Product
+from django.utils import timezone
+
+from .models import Cart, CartItem, Customer_Table, Product, Cosmetic, Jewellery, Shoes, Bag
+from .money import to_cents, item_cents, cents_to_decimal
+from .sessions import set_if_changed
+
+# session cart category code -> (model, id field on model)
+CART_CATEGORY_MODELS = {
+    'product':   (Product,   'product_id'),
+    'cosmetic':  (Cosmetic,  'cosmetic_product_id'),
+    'jewellery': (Jewellery, 'jewellery_product_id'),
+    'shoes':     (Shoes,     'shoes_product_id'),
+    'bag':       (Bag,       'bag_product_id'),
+}
+
+
+def parse_cart_key(key, item=None):
+    """
+    Split a session cart key into (category, item_id, size).
+      - "<id>_<SIZE>" / "<id>"      -> ('product', id, SIZE or '')
+      - "<category>_<id>"           -> (category, id, item size or '')
+    item_id is None when the key can't be parsed.
+    """
+    size = ((item or {}).get('size') or '').upper()
+    first, _, rest = str(key).partition('_')
+    if first.isdigit():
+        return 'product', int(first), (size or rest.upper())
+    try:
+        item_id = int(rest)
+    except ValueError:
+        item_id = None
+    return first, item_id, size
+
+
+def cart_key_for(category, item_id, size=''):
+    """Session cart key for a line, built like add_to_cart does (parse_cart_key inverts it)."""
+    if category == 'product' and size:
+        return f"{item_id}_{size}"
+    return f"{category}_{item_id}"
+
+
+def cart_item_lookup(key, item=None):
+    """
+    CartItem filter kwargs {category, product_id, size} for a session cart line,
+    or None when the key can't be parsed.
+    """
+    category, item_id, size = parse_cart_key(key, item)
+    if item_id is None or category not in CART_CATEGORY_MODELS:
+        return None
+    return {'category': category, 'product_id': item_id, 'size': size[:10]}
+
 
 def get_or_create_cart_for_customer(customer):
     cart, _ = Cart.objects.get_or_create(customer=customer)
@@ -9,28 +58,22 @@ def get_or_create_cart_for_customer(customer):
 def sync_session_item_to_db(customer, key, item):
     """
     Merge one session item into DB cart (increments quantity).
-    item is a dict with keys product_id, name, price (string), quantity, image, size.
+    item is a dict with keys product_id, name, price_cents (int), quantity, image, size.
     """
     cart = get_or_create_cart_for_customer(customer)
-    try:
-        pid = int(item.get('product_id') or key.split('_')[0])
-    except Exception:
+    lookup = cart_item_lookup(key, item)
+    if lookup is None:
         return
 
-    size = (item.get('size') or '')[:10]  # normalize
     qty = int(item.get('quantity') or 0)
-    try:
-        price = Decimal(str(item.get('price') or '0.00')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-    except Exception:
-        price = Decimal('0.00')
+    price = cents_to_decimal(item_cents(item))
 
     title = item.get('name') or ''
     image = item.get('image') or ''
 
     ci, created = CartItem.objects.get_or_create(
         cart=cart,
-        product_id=pid,
-        size=size,
+        **lookup,
         defaults={'quantity': qty, 'price': price, 'product_title': title, 'image_url': image}
     )
     if not created:
@@ -43,6 +86,54 @@ def sync_session_item_to_db(customer, key, item):
         ci.save()
 
 
+def sync_session_items_to_db(customer, items):
+    """
+    Bulk variant of sync_session_item_to_db for {key: item} (quantities are
+    added to existing rows). One SELECT for the existing rows, then one
+    bulk_create + one bulk_update, instead of a get_or_create/save per item.
+    """
+    cart = get_or_create_cart_for_customer(customer)
+    wanted = {}
+    for key, item in items.items():
+        lookup = cart_item_lookup(key, item)
+        if lookup is None:
+            continue
+        wanted[(lookup['category'], lookup['product_id'], lookup['size'])] = item
+
+    if not wanted:
+        return
+    existing = {
+        (ci.category, ci.product_id, ci.size): ci
+        for ci in CartItem.objects.filter(cart=cart, product_id__in={pid for _, pid, _ in wanted})
+    }
+    to_create, to_update = [], []
+    now = timezone.now()
+    for (category, pid, size), item in wanted.items():
+        qty = int(item.get('quantity') or 0)
+        price = cents_to_decimal(item_cents(item))
+        title = item.get('name') or ''
+        image = item.get('image') or ''
+        ci = existing.get((category, pid, size))
+        if ci is None:
+            to_create.append(CartItem(
+                cart=cart, category=category, product_id=pid, size=size, quantity=qty,
+                price=price, product_title=title, image_url=image,
+            ))
+            continue
+        ci.quantity = int(ci.quantity) + qty
+        ci.price = price
+        ci.updated = now  # bulk_update skips auto_now
+        if title:
+            ci.product_title = title
+        if image:
+            ci.image_url = image
+        to_update.append(ci)
+    if to_create:
+        CartItem.objects.bulk_create(to_create)
+    if to_update:
+        CartItem.objects.bulk_update(to_update, ['quantity', 'price', 'product_title', 'image_url', 'updated'])
+
+
 def sync_session_cart_to_db(customer, session_cart):
     for key, item in session_cart.items():
         sync_session_item_to_db(customer, key, item)
@@ -55,22 +146,22 @@ def load_db_cart_into_session(request, customer):
     cart = get_or_create_cart_for_customer(customer)
     session_cart = {}
     for ci in cart.items.all():
-        size = ci.size or ''
-        if size:
-            key = f"{ci.product_id}_{size}"
-        else:
-            key = f"{ci.product_id}"
+        # same key add_to_cart gives the line, so it re-parses to the same category
+        key = cart_key_for(ci.category, ci.product_id, ci.size or '')
         session_cart[key] = {
             'product_id': ci.product_id,
             'name': ci.product_title or '',
-            'price': f"{ci.price:.2f}",
+            'price_cents': to_cents(ci.price),
             'quantity': int(ci.quantity),
             'image': ci.image_url or '',
             'size': ci.size or ''
         }
-    request.session['cart'] = session_cart
-    request.session['cart_count'] = sum(int(i.get('quantity', 0)) for i in session_cart.values())
-    request.session.modified = True
+    # an empty DB cart for an empty session cart changes nothing: no session write
+    set_if_changed(request.session, 'cart', session_cart, default={})
+    set_if_changed(request.session, 'cart_count', sum(int(i.get('quantity', 0)) for i in session_cart.values()), default=0)
+    # local import: membership imports parse_cart_key from this module
+    from .membership import refresh_cart_members
+    refresh_cart_members(request, session_cart)
 
 
 def clear_db_cart_for_customer(customer):
@@ -1,5 +1,6 @@
 # shop/views.py
 from django.shortcuts import render, get_object_or_404, redirect
+from django.core.paginator import Paginator
 from django.templatetags.static import static
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_POST,require_http_methods
@@ -7,34 +8,87 @@ from django.contrib import messages
 from django.contrib.messages import get_messages
 from decimal import Decimal, ROUND_HALF_UP
 from .forms import SignUpForm
-from django.contrib.auth.hashers import check_password
+from asgiref.sync import sync_to_async
+from .hashing import acheck_password
 from django.db import transaction
-from .utils import sync_session_item_to_db, sync_session_cart_to_db, load_db_cart_into_session, get_or_create_cart_for_customer,clear_db_cart_for_customer
+from .utils import cart_item_lookup, sync_session_item_to_db, sync_session_items_to_db, sync_session_cart_to_db, load_db_cart_into_session, get_or_create_cart_for_customer,clear_db_cart_for_customer
 from .models import Product, Category, Customer_Table, Cart, CartItem, CustomerOrder, Cosmetic, Jewellery, Bag, Shoes, ContactMessage, CustomerOrder, Wishlist
+from .inventory import reserve_cart, OutOfStock
+from .revalidation import revalidate_cart, drop_removed_lines_from_db_cart, PRICE_CHANGED
+from .throttling import get_login_throttle
+from .pagecache import page_cache
+from .conditional import detail_conditional
+from .cards import CARD_FIELDS, CardURLs, ProductCard
+from .homepage import homepage_context
+from .filters import canonical_filter_url, order_like_choices, PRICE_RANGES
+from .sessions import set_if_changed
+from .membership import refresh_cart_members, add_wishlist_member, discard_wishlist_member, reset_wishlist_members
+from . import imagecache
+from .money import to_cents, format_cents, item_cents, cents_to_decimal, size_price_cents, SHIPPING_CENTS, SIZE_ORDER
 import json
  
-def sign_up(request):
+# ---- auth views (async: hashing on the bounded pool in shop/hashing.py) ----
+# templates read request.session, so rendering (lazy session load) runs on the sync thread
+arender = sync_to_async(render)
+
+
+async def sign_up(request):
     if request.method == 'POST':
         form = SignUpForm(request.POST)
-        if form.is_valid():
-            form.save()
+        # validation queries the DB (duplicate email check)
+        if await sync_to_async(form.is_valid)():
+            await form.asave()
             messages.success(request, "Account created successfully Please Login here!")
             return redirect('login')
         else:
             messages.error(request, "Please correct the errors below.")
     else:
         form = SignUpForm()
-    return render(request, 'shop/sign_up.html', {'form': form})
+    return await arender(request, 'shop/sign_up.html', {'form': form})
 
 
-def login_view(request):
+def _complete_login(request, customer):
     """
-    Authenticate customer (simple DB-backed email + hashed password check).
-    On successful login:
+    Sync part of a successful login (session + DB cart work):
       - merge guest session cart into DB cart
       - reload DB cart into session (merged result)
       - set session customer info
     """
+    # Merge guest session cart into DB cart if session has items
+    session_cart = request.session.get('cart', {}) or {}
+    if session_cart:
+        try:
+            # safe: sync will create cart & items as needed
+            sync_session_cart_to_db(customer, session_cart)
+        except Exception:
+            # don't break login on sync failure; log in production
+            pass
+
+    # Load DB cart into session (this will override or merge keys from DB)
+    try:
+        load_db_cart_into_session(request, customer)
+    except Exception:
+        # unexpected error loading DB cart should not stop login
+        pass
+
+    # set login session keys
+    request.session['customer_id'] = customer.customer_id
+    request.session['customer_name'] = getattr(customer, 'first_name', '')
+    reset_wishlist_members(request)
+    # ensure cart_count exists (load_db_cart_into_session sets it already)
+    request.session.setdefault('cart_count', sum(int(it.get('quantity', 0)) for it in request.session.get('cart', {}).values()))
+    request.session.modified = True
+
+
+async def login_view(request):
+    """
+    Authenticate customer (simple DB-backed email + hashed password check).
+    Attempts are throttled per IP and per email (shop/throttling.py) before
+    any lookup or hashing; over the limit -> 429 with Retry-After.
+    The customer lookup uses the async ORM and check_password runs on the
+    bounded hashing pool, so concurrent logins don't queue behind each other.
+    On success the session / cart work runs in _complete_login.
+    """
     if request.method == "POST":
         email = request.POST.get('customer[email]', '').strip()
         password = request.POST.get('customer[password]', '').strip()
@@ -42,48 +96,36 @@ def login_view(request):
         # basic validation
         if not email or not password:
             messages.error(request, "Please enter both email and password.")
-            return render(request, 'shop/login.html')
+            return await arender(request, 'shop/login.html')
+
+        # throttle before the lookup / PBKDF2 hashing so a burst can't pin the CPU
+        throttle = get_login_throttle()
+        retry_after = await throttle.ahit(request, email)
+        if retry_after:
+            messages.error(request, f"Too many login attempts. Please try again in {retry_after} seconds.")
+            response = await arender(request, 'shop/login.html', status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
 
         try:
-            customer = Customer_Table.objects.get(email=email)
+            customer = await Customer_Table.objects.aget(email=email)
         except Customer_Table.DoesNotExist:
             messages.error(request, "Email not found. Please create an account.")
-            return render(request, 'shop/login.html')
+            return await arender(request, 'shop/login.html')
 
         # Password check (assumes stored password is hashed and check_password works)
-        if not check_password(password, customer.password):
+        if not await acheck_password(password, customer.password):
             messages.error(request, "Incorrect password.")
-            return render(request, 'shop/login.html')
-
-        # Merge guest session cart into DB cart if session has items
-        session_cart = request.session.get('cart', {}) or {}
-        if session_cart:
-            try:
-                # safe: sync will create cart & items as needed
-                sync_session_cart_to_db(customer, session_cart)
-            except Exception:
-                # don't break login on sync failure; log in production
-                pass
-
-        # Load DB cart into session (this will override or merge keys from DB)
-        try:
-            load_db_cart_into_session(request, customer)
-        except Exception:
-            # unexpected error loading DB cart should not stop login
-            pass
+            return await arender(request, 'shop/login.html')
+        await throttle.asucceeded(email)
 
-        # set login session keys
-        request.session['customer_id'] = customer.customer_id
-        request.session['customer_name'] = getattr(customer, 'first_name', '')
-        # ensure cart_count exists (load_db_cart_into_session sets it already)
-        request.session.setdefault('cart_count', sum(int(it.get('quantity', 0)) for it in request.session.get('cart', {}).values()))
-        request.session.modified = True
+        await sync_to_async(_complete_login)(request, customer)
 
         messages.success(request, f"Welcome back, {customer.first_name or 'Customer'}!")
         return redirect('index')
 
     # GET -> show login template
-    return render(request, 'shop/login.html')
+    return await arender(request, 'shop/login.html')
 
 
 def logout_view(request):
@@ -93,51 +135,14 @@ def logout_view(request):
     return redirect('login')
 
 
+@page_cache(Product, Category)
 def index(request):
-    categories = Category.objects.all()
-
-    def get_products(slug, limit=None):
-        """Fetch products by slug (fallback: all products) and enrich them."""
-        try:
-            category = Category.objects.get(slug=slug)
-            qs = category.products.filter(available=True).order_by('-created')
-        except Category.DoesNotExist:
-            qs = Product.objects.filter(available=True).order_by('-created')
-
-        if limit:
-            qs = qs[:limit]
-
-        # --- enrich each product ---
-        placeholder = static('images/product-images/placeholder.jpg')
-        placeholder_hover = static('images/product-images/placeholder_hover.jpg')
-
-        products = list(qs)
-        for p in products:
-            p.image_url = p.image.url if getattr(p, 'image', None) and hasattr(p.image, 'url') else placeholder
-            p.hover_url = (
-                p.hover_image.url
-                if getattr(p, 'hover_image', None) and hasattr(p.hover_image, 'url')
-                else (p.image.url if getattr(p, 'image', None) and hasattr(p.image, 'url') else placeholder_hover)
-            )
-            p.sizes_list = getattr(p, 'sizes', []) or []
-            p.colors_list = getattr(p, 'colors', []) or []
-        return products
-
-    womens_products = get_products('women_dresses', limit=6)
-    mens_products = get_products('mens_wear', limit=6)
-    women_featured_collection = get_products('women_featured_collection', limit=6)  # Added featured products
-    men_featured_collection = get_products('men_featured_collection', limit=6)  # Added featured products
-
-
-    return render(request, 'shop/index.html', {
-        'categories': categories,
-        'womens_products': womens_products,
-        'mens_products': mens_products,
-        'women_featured_products': women_featured_collection, 
-        'men_featured_products':men_featured_collection, # Pass to template
-    })
+    # four carousels from one window query, cached until the catalog changes (shop/homepage.py)
+    return render(request, 'shop/index.html', homepage_context())
 
 
+@detail_conditional(Product, 'pk', 'shop/product_info.html', related=(Category,))
+@page_cache(Product, Category, stale_on_change=False)
 def product_info(request, pk):
     """
     Product detail page by numeric product_id (pk).
@@ -145,17 +150,6 @@ def product_info(request, pk):
     """
     product = get_object_or_404(Product, product_id=pk)
 
-    # --- Local constants for this function only ---
-    SIZE_PRICE_OFFSETS = {
-        'S': Decimal('0'),
-        'M': Decimal('5'),
-        'L': Decimal('10'),
-        'XL': Decimal('15'),
-        'XXL': Decimal('20'),
-    }
-    SIZE_ORDER = ['S', 'M', 'L', 'XL', 'XXL']
-    # ---------------------------------------------
-
     # placeholders
     placeholder = static('images/product-detail-page/product-placeholder.jpg')
     placeholder_hover = static('images/product-detail-page/product-placeholder-hover.jpg')
@@ -179,21 +173,18 @@ def product_info(request, pk):
     if not gallery_images:
         gallery_images = [placeholder, placeholder_hover]
 
-    # base price
-    try:
-        base_price = Decimal(str(product.price))
-    except Exception:
-        base_price = Decimal('0.00')
+    # base price (cents)
+    base_cents = to_cents(product.price)
 
     # sizes with prices
     sizes_with_prices = []
     for size in SIZE_ORDER:
-        offset = SIZE_PRICE_OFFSETS.get(size, Decimal('0'))
-        price = (base_price + offset).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        price_cents = size_price_cents(base_cents, size)
         sizes_with_prices.append({
             'size': size,
-            'price': price,
-            'price_str': f"{price:.2f}"
+            'price': cents_to_decimal(price_cents),
+            'price_cents': price_cents,
+            'price_str': format_cents(price_cents),
         })
 
     context = {
@@ -216,16 +207,6 @@ def add_to_cart(request, category, item_id):
       - products/shoes with size: "<item_id>_<SIZE>"  (same as original)
       - others: "<category>_<item_id>"
     """
-    # local constants for price offsets (unchanged)
-    SIZE_PRICE_OFFSETS = {
-        'S': Decimal('0'),
-        'M': Decimal('5'),
-        'L': Decimal('10'),
-        'XL': Decimal('15'),
-        'XXL': Decimal('20'),
-    }
-    SIZE_ORDER = ['S', 'M', 'L', 'XL', 'XXL']
-
     # find the object depending on category
     obj = None
     if category == 'product':
@@ -257,19 +238,8 @@ def add_to_cart(request, category, item_id):
             selected_size = available_sizes[0] if available_sizes else SIZE_ORDER[0]
         selected_size = selected_size.upper()
 
-    # compute base price
-    try:
-        base_price = Decimal(str(getattr(obj, 'price', 0)))
-    except Exception:
-        base_price = Decimal('0.00')
-
-    if selected_size:
-        offset = SIZE_PRICE_OFFSETS.get(selected_size, Decimal('0'))
-        final_price = (base_price + offset).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-    else:
-        final_price = base_price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-
-    final_price_str = f"{final_price:.2f}"
+    # compute unit price in cents (size surcharge only when size applies)
+    final_price_cents = size_price_cents(to_cents(getattr(obj, 'price', 0)), selected_size)
 
     # build cart key: keep legacy product style "<id>_<SIZE>" when size present,
     # otherwise use "<category>_<id>"
@@ -284,7 +254,8 @@ def add_to_cart(request, category, item_id):
         cart[cart_key]['quantity'] = int(cart[cart_key].get('quantity', 0)) + 1
         cart[cart_key].setdefault('name', getattr(obj, 'title', getattr(obj, 'name', 'Item')))
         cart[cart_key].setdefault('image', image_url)
-        cart[cart_key]['price'] = final_price_str
+        cart[cart_key]['price_cents'] = final_price_cents
+        cart[cart_key].pop('price', None)  # drop legacy string price
         if selected_size:
             cart[cart_key]['size'] = selected_size
     else:
@@ -292,7 +263,7 @@ def add_to_cart(request, category, item_id):
             # keep old product_id field when applicable, else include category/item id
             'product_id': getattr(obj, 'product_id', getattr(obj, 'cosmetic_product_id', None)),
             'name': getattr(obj, 'title', getattr(obj, 'name', 'Item')),
-            'price': final_price_str,
+            'price_cents': final_price_cents,
             'quantity': 1,
             'image': image_url,
         }
@@ -302,6 +273,7 @@ def add_to_cart(request, category, item_id):
     request.session['cart'] = cart
     request.session['cart_count'] = sum(int(item.get('quantity', 0)) for item in cart.values())
     request.session.modified = True
+    refresh_cart_members(request, cart)
 
     # Optional DB sync for logged-in customers (keeps your existing behavior)
     cust_id = request.session.get('customer_id')
@@ -342,15 +314,6 @@ def cart_detail(request):
     cart = request.session.get('cart', {})  # session cart
     updated = False
 
-    # local constants for price offsets (used when size applies)
-    SIZE_PRICE_OFFSETS = {
-        'S': Decimal('0'),
-        'M': Decimal('5'),
-        'L': Decimal('10'),
-        'XL': Decimal('15'),
-        'XXL': Decimal('20'),
-    }
-
     placeholder = static('images/product-images/default-product.jpg')
     display_cart = {}
 
@@ -358,9 +321,16 @@ def cart_detail(request):
         quantity = int(item.get('quantity', 0))
         name = item.get('name')
         image = item.get('image')
-        price_str = item.get('price')  # stored as string
+        price_cents = item.get('price_cents')  # int cents (None when missing)
         size = item.get('size') if item.get('size') else None
 
+        # upgrade legacy string prices to int cents once
+        if price_cents is None and item.get('price') not in (None, ''):
+            price_cents = item_cents(item)
+            cart[key]['price_cents'] = price_cents
+            cart[key].pop('price', None)
+            updated = True
+
         # Decide key format:
         # 1) Legacy product/shoe with size: "<id>_<SIZE>" where first part is numeric -> consider as product_id
         # 2) New category keys: "<category>_<id>" -> category is non-numeric (e.g., 'cosmetic', 'bag', 'jewelry', 'shoe')
@@ -450,33 +420,27 @@ def cart_detail(request):
 
             # price: if size applies, recalculate using offsets
             if size:
-                try:
-                    base_price = Decimal(str(getattr(product_obj, 'price', '0.00')))
-                except Exception:
-                    base_price = Decimal('0.00')
-                offset = SIZE_PRICE_OFFSETS.get(size.upper(), Decimal('0'))
-                recalculated = (base_price + offset).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                recalculated_str = f"{recalculated:.2f}"
-                if price_str != recalculated_str:
-                    price_str = recalculated_str
-                    cart[key]['price'] = price_str
+                recalculated = size_price_cents(to_cents(getattr(product_obj, 'price', 0)), size)
+                if price_cents != recalculated:
+                    price_cents = recalculated
+                    cart[key]['price_cents'] = price_cents
                     cart[key]['size'] = size.upper()
                     updated = True
             else:
                 # no size — ensure price present (use DB price)
-                if not price_str:
-                    price_str = f"{Decimal(str(getattr(product_obj, 'price', '0.00'))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP):.2f}"
-                    cart[key]['price'] = price_str
+                if price_cents is None:
+                    price_cents = to_cents(getattr(product_obj, 'price', 0))
+                    cart[key]['price_cents'] = price_cents
                     updated = True
         else:
             # DB object not found — ensure defaults
             name = name or "Unknown product"
-            price_str = price_str or "0.00"
+            price_cents = price_cents or 0
             image = image or placeholder
             if cart.get(key) is None:
                 cart[key] = {}
             cart[key].setdefault('name', name)
-            cart[key].setdefault('price', price_str)
+            cart[key].setdefault('price_cents', price_cents)
             cart[key].setdefault('image', image)
             updated = True
 
@@ -494,7 +458,8 @@ def cart_detail(request):
             'item_id': item_id,
             'name': name,
             'image': image,
-            'price': price_str,
+            'price_cents': price_cents,
+            'subtotal_cents': price_cents * quantity,
             'quantity': quantity,
             'size': display_size,
         }
@@ -503,23 +468,15 @@ def cart_detail(request):
     if updated:
         request.session['cart'] = cart
         request.session.modified = True
+        refresh_cart_members(request, cart)
 
-    # calculate total
-    total = Decimal('0.00')
-    for it in display_cart.values():
-        try:
-            total += Decimal(str(it['price'])) * int(it['quantity'])
-        except Exception:
-            continue
-    try:
-        total_price = float(total)
-    except Exception:
-        total_price = 0.0
+    # calculate total (int cents)
+    total_cents = sum(it['subtotal_cents'] for it in display_cart.values())
 
-    # update cart_count
-    request.session['cart_count'] = sum(int(it.get('quantity', 0)) for it in cart.values())
+    # update cart_count (written only when it changed)
+    set_if_changed(request.session, 'cart_count', sum(int(it.get('quantity', 0)) for it in cart.values()), default=0)
 
-    return render(request, 'shop/cart.html', {'cart': display_cart, 'total_price': total_price})
+    return render(request, 'shop/cart.html', {'cart': display_cart, 'total_cents': total_cents})
 
 
 @require_POST
@@ -536,23 +493,6 @@ def update_cart(request):
         except Exception:
             return default
 
-    # Helper to parse a session cart key into (product_id:int, size:str|None)
-    def parse_cart_key(key):
-        if isinstance(key, str) and '_' in key:
-            pid_part, size_part = key.split('_', 1)
-            try:
-                pid = int(pid_part)
-            except Exception:
-                pid = None
-            size = size_part or ''
-        else:
-            try:
-                pid = int(key)
-            except Exception:
-                pid = None
-            size = ''
-        return pid, (size.upper() if size else '')
-
     # Find logged-in customer (if any)
     customer = None
     cust_id = request.session.get('customer_id')
@@ -596,24 +536,25 @@ def update_cart(request):
 
             # apply change to session cart
             if new_qty <= 0:
+                # prepare DB removal (the line's category/size, before it's gone)
+                if customer:
+                    db_changes.append(('remove', cart_item_lookup(pid_key, cart[pid_key])))
                 # remove from session
                 del cart[pid_key]
                 changed = True
-                # prepare DB removal
-                if customer:
-                    db_changes.append(('remove', pid_key))
             else:
                 if cart[pid_key].get('quantity') != new_qty:
                     cart[pid_key]['quantity'] = new_qty
                     changed = True
                     # prepare DB set
                     if customer:
-                        db_changes.append(('set', pid_key, new_qty))
+                        db_changes.append(('set', pid_key, new_qty, cart_item_lookup(pid_key, cart[pid_key])))
 
         if changed:
             request.session['cart'] = cart
             request.session['cart_count'] = sum(int(i.get('quantity', 0)) for i in cart.values())
             request.session.modified = True
+            refresh_cart_members(request, cart)
 
         # Apply DB changes in a single transaction
         if customer and db_changes:
@@ -621,20 +562,18 @@ def update_cart(request):
                 db_cart = get_or_create_cart_for_customer(customer)
                 for change in db_changes:
                     if change[0] == 'remove':
-                        key = change[1]
-                        pid, size = parse_cart_key(key)
-                        if pid is None:
+                        lookup = change[1]
+                        if lookup is None:
                             continue
                         # remove cartitem if exists
-                        CartItem.objects.filter(cart=db_cart, product_id=pid, size=(size or '')).delete()
+                        CartItem.objects.filter(cart=db_cart, **lookup).delete()
                     elif change[0] == 'set':
-                        _, key, qty = change
-                        pid, size = parse_cart_key(key)
-                        if pid is None:
+                        _, key, qty, lookup = change
+                        if lookup is None:
                             continue
                         # update or create the DB CartItem (set exact qty)
                         try:
-                            ci = CartItem.objects.get(cart=db_cart, product_id=pid, size=(size or ''))
+                            ci = CartItem.objects.get(cart=db_cart, **lookup)
                             if qty <= 0:
                                 ci.delete()
                             else:
@@ -644,33 +583,21 @@ def update_cart(request):
                             if qty > 0:
                                 # create with price from session item if present
                                 sess_item = cart.get(key)
-                                price = sess_item and sess_item.get('price') or '0.00'
-                                from decimal import Decimal
-                                try:
-                                    price_dec = Decimal(str(price))
-                                except Exception:
-                                    price_dec = Decimal('0.00')
                                 CartItem.objects.create(
                                     cart=db_cart,
-                                    product_id=pid,
-                                    size=(size or ''),
+                                    **lookup,
                                     quantity=qty,
-                                    price=price_dec,
+                                    price=cents_to_decimal(item_cents(sess_item) if sess_item else 0),
                                     product_title=sess_item.get('name') if sess_item else '',
                                     image_url=sess_item.get('image') if sess_item else '',
                                 )
 
-        # compute totals for response
-        total_price = 0.0
-        for item in cart.values():
-            try:
-                total_price += float(item.get('price', 0)) * int(item.get('quantity', 0))
-            except Exception:
-                continue
+        # compute totals for response (int cents)
+        total_cents = sum(item_cents(item) * to_int(item.get('quantity', 0)) for item in cart.values())
 
         return JsonResponse({
             'cart_count': request.session.get('cart_count', 0),
-            'total_price': f"{total_price:.2f}",
+            'total_price': format_cents(total_cents),
         })
 
     # Non-AJAX (regular form submit)
@@ -686,36 +613,35 @@ def update_cart(request):
             del cart[pid_str]
             changed = True
             if customer:
-                db_changes.append(('remove', pid_str))
+                db_changes.append(('remove', cart_item_lookup(pid_str, item)))
         else:
             if item.get('quantity') != qty:
                 cart[pid_str]['quantity'] = qty
                 changed = True
                 if customer:
-                    db_changes.append(('set', pid_str, qty))
+                    db_changes.append(('set', pid_str, qty, cart_item_lookup(pid_str, item)))
 
     if changed:
         request.session['cart'] = cart
         request.session['cart_count'] = sum(int(i.get('quantity', 0)) for i in cart.values())
         request.session.modified = True
+        refresh_cart_members(request, cart)
 
     if customer and db_changes:
         with transaction.atomic():
             db_cart = get_or_create_cart_for_customer(customer)
             for change in db_changes:
                 if change[0] == 'remove':
-                    _, key = change
-                    pid, size = parse_cart_key(key)
-                    if pid is None:
+                    _, lookup = change
+                    if lookup is None:
                         continue
-                    CartItem.objects.filter(cart=db_cart, product_id=pid, size=(size or '')).delete()
+                    CartItem.objects.filter(cart=db_cart, **lookup).delete()
                 elif change[0] == 'set':
-                    _, key, qty = change
-                    pid, size = parse_cart_key(key)
-                    if pid is None:
+                    _, key, qty, lookup = change
+                    if lookup is None:
                         continue
                     try:
-                        ci = CartItem.objects.get(cart=db_cart, product_id=pid, size=(size or ''))
+                        ci = CartItem.objects.get(cart=db_cart, **lookup)
                         if qty <= 0:
                             ci.delete()
                         else:
@@ -724,18 +650,11 @@ def update_cart(request):
                     except CartItem.DoesNotExist:
                         if qty > 0:
                             sess_item = cart.get(key)
-                            price = sess_item and sess_item.get('price') or '0.00'
-                            from decimal import Decimal
-                            try:
-                                price_dec = Decimal(str(price))
-                            except Exception:
-                                price_dec = Decimal('0.00')
                             CartItem.objects.create(
                                 cart=db_cart,
-                                product_id=pid,
-                                size=(size or ''),
+                                **lookup,
                                 quantity=qty,
-                                price=price_dec,
+                                price=cents_to_decimal(item_cents(sess_item) if sess_item else 0),
                                 product_title=sess_item.get('name') if sess_item else '',
                                 image_url=sess_item.get('image') if sess_item else '',
                             )
@@ -750,6 +669,7 @@ def remove_from_cart(request, key):
     """
     cart = request.session.get('cart', {})
     removed = False
+    lookup = cart_item_lookup(key, cart.get(key))  # DB row of this line (category, id, size)
 
     if key in cart:
         del cart[key]
@@ -757,6 +677,7 @@ def remove_from_cart(request, key):
         request.session['cart'] = cart
         request.session['cart_count'] = sum(int(i.get('quantity', 0)) for i in cart.values())
         request.session.modified = True
+        refresh_cart_members(request, cart)
 
     # If logged-in, remove DB CartItem
     cust_id = request.session.get('customer_id')
@@ -765,75 +686,105 @@ def remove_from_cart(request, key):
             customer = Customer_Table.objects.get(customer_id=cust_id)
         except Customer_Table.DoesNotExist:
             customer = None
-        if customer:
-            # parse key
-            if isinstance(key, str) and '_' in key:
-                pid_part, size_part = key.split('_', 1)
-                try:
-                    pid = int(pid_part)
-                except Exception:
-                    pid = None
-                size = (size_part or '')
-            else:
-                try:
-                    pid = int(key)
-                except Exception:
-                    pid = None
-                size = ''
-            if pid is not None:
-                try:
-                    cart_obj = Cart.objects.get(customer=customer)
-                except Cart.DoesNotExist:
-                    cart_obj = None
-                if cart_obj:
-                    CartItem.objects.filter(cart=cart_obj, product_id=pid, size=(size or '')).delete()
+        if customer and lookup is not None:
+            try:
+                cart_obj = Cart.objects.get(customer=customer)
+            except Cart.DoesNotExist:
+                cart_obj = None
+            if cart_obj:
+                CartItem.objects.filter(cart=cart_obj, **lookup).delete()
 
     # AJAX or JSON request -> return JSON summary
     if request.headers.get('x-requested-with') == 'XMLHttpRequest' or request.content_type == 'application/json':
-        total_price = 0.0
+        total_cents = 0
         for item in cart.values():
             try:
-                total_price += float(item['price']) * int(item['quantity'])
+                total_cents += item_cents(item) * int(item['quantity'])
             except Exception:
                 continue
         return JsonResponse({
             'removed': removed,
             'cart_count': request.session.get('cart_count', 0),
-            'total_price': f"{total_price:.2f}",
+            'total_price': format_cents(total_cents),
         })
 
     return redirect('cart_detail')
 
 
+def _out_of_stock_messages(request, cart, exc):
+    """One error message per cart line that couldn't be reserved."""
+    for line in exc.lines:
+        name = (cart.get(line['key']) or {}).get('name') or 'An item'
+        size = f" (size {line['size']})" if line['size'] else ''
+        if line['available']:
+            messages.error(request, f"Only {line['available']} left of {name}{size}. Please update your cart.")
+        else:
+            messages.error(request, f"{name}{size} is out of stock. Please remove it from your cart.")
+
+
+def _cart_change_messages(request, changes):
+    """One warning per cart line that revalidation changed or removed."""
+    for change in changes:
+        if change['reason'] == PRICE_CHANGED:
+            old = f"${format_cents(change['old_cents'])} → " if change['old_cents'] is not None else ''
+            messages.warning(request, f"The price of {change['name']} changed: {old}${format_cents(change['new_cents'])}.")
+        else:
+            messages.warning(request, f"{change['name']} is no longer available and was removed from your cart.")
+
+
 def checkout(request):
     """
     Show checkout page / process order.
     - Uses session cart to display items and build order
-    - On POST: creates CustomerOrder, clears DB cart and session cart
+    - Re-checks every line's price / availability (one query per category)
+    - On GET: holds stock for the cart (expires if the checkout is abandoned)
+    - On POST: reserves stock atomically, creates CustomerOrder, clears DB cart and session cart
     """
     cart = request.session.get('cart', {}) or {}
     if not cart:
         messages.warning(request, "Your cart is empty!")
         return redirect('index')
 
+    # revalidate prices / availability against the catalog before anything else
+    cart_changes = revalidate_cart(cart)
+    if cart_changes:
+        _cart_change_messages(request, cart_changes)
+        request.session['cart'] = cart
+        request.session['cart_count'] = sum(int(it.get('quantity', 0)) for it in cart.values())
+        request.session.modified = True
+        refresh_cart_members(request, cart)
+        cust_id = request.session.get('customer_id')
+        if cust_id:
+            try:
+                drop_removed_lines_from_db_cart(cust_id, cart_changes)
+            except Exception:
+                pass
+        if not cart:
+            return redirect('cart_detail')
+        if request.method == "POST":
+            # don't place an order at prices the customer hasn't seen
+            return redirect('checkout')
+
+    # stock holds are keyed by the session of this checkout
+    if not request.session.session_key:
+        request.session.save()
+    stock_holder = request.session.session_key
+
     # Prepare display and database-friendly representation
     display_cart_for_template = {}
     display_cart_for_db = []
-    total_price = Decimal('0.00')
+    total_cents = 0
 
-    # iterate session cart
+    # iterate session cart (all amounts are int cents)
     for pid_key, item in cart.items():
         try:
             quantity = int(item.get('quantity', 0))
         except Exception:
             quantity = 0
-        try:
-            unit_price = Decimal(str(item.get('price', '0.00'))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        except Exception:
-            unit_price = Decimal('0.00')
+        unit_cents = item_cents(item)
 
-        subtotal = unit_price * max(quantity, 0)
-        total_price += subtotal
+        subtotal_cents = unit_cents * max(quantity, 0)
+        total_cents += subtotal_cents
 
         size = item.get('size', '') or ''
         name = item.get('name') or item.get('product_title') or 'Unknown item'
@@ -841,24 +792,28 @@ def checkout(request):
         # For template
         display_cart_for_template[pid_key] = {
             'name': name,
-            'price': float(unit_price),
+            'price_cents': unit_cents,
             'quantity': quantity,
             'size': size,
-            'subtotal': float(subtotal),
+            'subtotal_cents': subtotal_cents,
         }
 
         # For DB storage in order (simple serializable dict)
         display_cart_for_db.append({
             'product_name': name,
-            'price': float(unit_price),
+            'price_cents': unit_cents,
             'quantity': quantity,
             'size': size,
-            'subtotal': float(subtotal),
+            'subtotal_cents': subtotal_cents,
             'session_key': pid_key,
         })
 
-    shipping = Decimal('50.00')
-    total_with_shipping = (total_price + shipping).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    checkout_context = {
+        'cart': display_cart_for_template,
+        'total_cents': total_cents,
+        'shipping_cents': SHIPPING_CENTS,
+        'total_with_shipping_cents': total_cents + SHIPPING_CENTS,
+    }
 
     if request.method == "POST":
         # require customer logged in (cust_id is numeric stored in session)
@@ -885,12 +840,7 @@ def checkout(request):
         # Minimal validation
         if not first_name or not last_name or not address or not city:
             messages.error(request, "Please fill required address and name fields.")
-            return render(request, 'shop/checkout.html', {
-                'cart': display_cart_for_template,
-                'total_price': float(total_price),
-                'shipping': float(shipping),
-                'total_with_shipping': float(total_with_shipping),
-            })
+            return render(request, 'shop/checkout.html', checkout_context)
 
         # Save order inside a transaction (so clearing cart happens after successful creation)
         try:
@@ -898,6 +848,9 @@ def checkout(request):
                 # fetch customer instance
                 customer = Customer_Table.objects.get(customer_id=cust_id)
 
+                # final stock decrement for every line (all or nothing); replaces the GET hold
+                reserve_cart(cart, stock_holder, commit=True)
+
                 # create CustomerOrder (assumes order_items is JSONField or similar)
                 order = CustomerOrder.objects.create(
                     customer_id=cust_id,
@@ -915,7 +868,7 @@ def checkout(request):
                     payment_method=payment_method,
                     order_notes=order_notes,
                     order_items=display_cart_for_db,
-                    total_price=float(total_with_shipping),
+                    total_cents=total_cents + SHIPPING_CENTS,
                 )
 
                 # Clear DB cart for this customer so it's not reloaded on future login
@@ -929,37 +882,39 @@ def checkout(request):
                 request.session['cart'] = {}
                 request.session['cart_count'] = 0
                 request.session.modified = True
+                refresh_cart_members(request, {})
 
         except Customer_Table.DoesNotExist:
             messages.error(request, "Customer record not found. Please login again.")
             return redirect('login')
+        except OutOfStock as exc:
+            _out_of_stock_messages(request, cart, exc)
+            return redirect('cart_detail')
         except Exception as exc:
             # Unexpected error while creating order
             messages.error(request, "There was an error processing your order. Please try again.")
             # optionally log exc in production
-            return render(request, 'shop/checkout.html', {
-                'cart': display_cart_for_template,
-                'total_price': float(total_price),
-                'shipping': float(shipping),
-                'total_with_shipping': float(total_with_shipping),
-            })
+            return render(request, 'shop/checkout.html', checkout_context)
 
         messages.success(request, "Your order has been placed successfully!")
         return redirect('index')
 
-    # GET -> render checkout form with cart contents
-    # ensure cart_count is accurate for templates
-    request.session['cart_count'] = sum(int(it.get('quantity', 0)) for it in cart.values())
-    request.session.modified = True
+    # GET -> hold stock while the customer fills in the form
+    try:
+        reserve_cart(cart, stock_holder)
+    except OutOfStock as exc:
+        _out_of_stock_messages(request, cart, exc)
+        return redirect('cart_detail')
 
-    return render(request, 'shop/checkout.html', {
-        'cart': display_cart_for_template,
-        'total_price': float(total_price),
-        'shipping': float(shipping),
-        'total_with_shipping': float(total_with_shipping),
-    })
+    # render checkout form with cart contents
+    # ensure cart_count is accurate for templates (written only when it changed)
+    set_if_changed(request.session, 'cart_count', sum(int(it.get('quantity', 0)) for it in cart.values()), default=0)
 
+    return render(request, 'shop/checkout.html', checkout_context)
 
+
+@canonical_filter_url
+@page_cache(Product, Category)
 def women_shop(request):
     # --- Base queryset: all women products available ---
     base_qs = Product.objects.filter(category__name__istartswith='women', available=True)
@@ -985,64 +940,45 @@ def women_shop(request):
             price_qs |= base_qs.filter(price__gte=low, price__lte=high)
         base_qs = price_qs
 
-    # --- Prepare products list with Python-side filters for collections, sizes, colors ---
+    # --- Prepare product cards with Python-side filters for collections, sizes, colors ---
+    # (a .values() projection into slotted cards, shop/cards.py; built only for kept rows)
     products = []
-    placeholder = static('images/product-images/placeholder.jpg')
-    placeholder_hover = static('images/product-images/placeholder_hover.jpg')
+    urls = CardURLs('images/product-images/placeholder.jpg', 'images/product-images/placeholder_hover.jpg')
 
-    for p in base_qs.order_by('-created'):
+    for row in base_qs.order_by('-created').values(*CARD_FIELDS):
         # Collection filter
-        if selected_collections and not any(sc in (p.collection_cat or []) for sc in selected_collections):
+        if selected_collections and not any(sc in (row['collection_cat'] or []) for sc in selected_collections):
             continue
         # Size filter
-        if selected_sizes and not any(sz in (p.sizes or []) for sz in selected_sizes):
+        if selected_sizes and not any(sz in (row['sizes'] or []) for sz in selected_sizes):
             continue
         # Color filter
-        if selected_colors and not any(cl in (p.colors or []) for cl in selected_colors):
+        if selected_colors and not any(cl in (row['colors'] or []) for cl in selected_colors):
             continue
-
-        # Enrich product object for template
-        p.image_url = getattr(p.image, 'url', placeholder)
-        p.hover_url = getattr(p.hover_image, 'url', getattr(p.image, 'url', placeholder_hover))
-        p.sizes_list = list(p.sizes or [])
-        p.colors_list = list(p.colors or [])
-        products.append(p)
+        products.append(ProductCard.from_row(row, urls))
 
     # --- Build filter options (all available values) ---
     women_products = Product.objects.filter(category__name__istartswith='women')
 
-    # Collections (first-seen order)
-    collections = []
-    for p in women_products:
-        for c in (p.collection_cat or []):
-            if c not in collections:
-                collections.append(c)
-
-    # Sizes (first-seen order)
-    sizes = []
-    for p in women_products:
-        for s in (p.sizes or []):
-            if s not in sizes:
-                sizes.append(s)
+    # Collections / sizes: only values existing in DB, in canonical (CHOICES) order
+    # so a submitted filter form is already a canonical URL (shop/filters.py)
+    collections_in_db, sizes_in_db, colors_in_db = set(), set(), set()
+    for collection_cat, sizes, colors in women_products.values_list('collection_cat', 'sizes', 'colors'):
+        collections_in_db.update(collection_cat or [])
+        sizes_in_db.update(sizes or [])
+        colors_in_db.update(colors or [])
+    collections = order_like_choices('collection', collections_in_db)
+    sizes = order_like_choices('size', sizes_in_db)
 
     # Colors (use COLOR_CHOICES order, only existing in DB)
     color_master_list = [c[0] for c in Product.COLOR_CHOICES]
-    colors_in_db = set()
-    for p in women_products:
-        colors_in_db.update(p.colors or [])
     colors = [c for c in color_master_list if c in colors_in_db]
 
     # Brands
-    brands = [b for b in women_products.values_list('brand', flat=True).distinct() if b]
+    brands = order_like_choices('brand', women_products.values_list('brand', flat=True).distinct())
 
     # Price ranges (display vs filter)
-    price_ranges = []
-    step = 50
-    for i in range(0, 500, step):
-        if i == 0:
-            price_ranges.append((f"{i}-{i+step}", f"${i} - ${i+step}"))
-        else:
-            price_ranges.append((f"{i+1}-{i+step}", f"${i} - ${i+step}"))
+    price_ranges = PRICE_RANGES
 
     # --- Prepare context for template ---
     context = {
@@ -1063,6 +999,8 @@ def women_shop(request):
     return render(request, 'shop/women_shop.html', context)
 
 
+@canonical_filter_url
+@page_cache(Product, Category)
 def men_shop(request):
     # --- Base queryset: all men products available ---
     base_qs = Product.objects.filter(category__name__istartswith='men', available=True)
@@ -1088,64 +1026,45 @@ def men_shop(request):
             price_qs |= base_qs.filter(price__gte=low, price__lte=high)
         base_qs = price_qs
 
-    # --- Prepare products list with Python-side filters for collections, sizes, colors ---
+    # --- Prepare product cards with Python-side filters for collections, sizes, colors ---
+    # (a .values() projection into slotted cards, shop/cards.py; built only for kept rows)
     products = []
-    placeholder = static('images/product-images/placeholder.jpg')
-    placeholder_hover = static('images/product-images/placeholder_hover.jpg')
+    urls = CardURLs('images/product-images/placeholder.jpg', 'images/product-images/placeholder_hover.jpg')
 
-    for p in base_qs.order_by('-created'):
+    for row in base_qs.order_by('-created').values(*CARD_FIELDS):
         # Collection filter
-        if selected_collections and not any(sc in (p.collection_cat or []) for sc in selected_collections):
+        if selected_collections and not any(sc in (row['collection_cat'] or []) for sc in selected_collections):
             continue
         # Size filter
-        if selected_sizes and not any(sz in (p.sizes or []) for sz in selected_sizes):
+        if selected_sizes and not any(sz in (row['sizes'] or []) for sz in selected_sizes):
             continue
         # Color filter
-        if selected_colors and not any(cl in (p.colors or []) for cl in selected_colors):
+        if selected_colors and not any(cl in (row['colors'] or []) for cl in selected_colors):
             continue
-
-        # Enrich product object for template
-        p.image_url = getattr(p.image, 'url', placeholder)
-        p.hover_url = getattr(p.hover_image, 'url', getattr(p.image, 'url', placeholder_hover))
-        p.sizes_list = list(p.sizes or [])
-        p.colors_list = list(p.colors or [])
-        products.append(p)
+        products.append(ProductCard.from_row(row, urls))
 
     # --- Build filter options (all available values) ---
     men_products = Product.objects.filter(category__name__istartswith='men')
 
-    # Collections (first-seen order)
-    collections = []
-    for p in men_products:
-        for c in (p.collection_cat or []):
-            if c not in collections:
-                collections.append(c)
-
-    # Sizes (first-seen order)
-    sizes = []
-    for p in men_products:
-        for s in (p.sizes or []):
-            if s not in sizes:
-                sizes.append(s)
+    # Collections / sizes: only values existing in DB, in canonical (CHOICES) order
+    # so a submitted filter form is already a canonical URL (shop/filters.py)
+    collections_in_db, sizes_in_db, colors_in_db = set(), set(), set()
+    for collection_cat, sizes, colors in men_products.values_list('collection_cat', 'sizes', 'colors'):
+        collections_in_db.update(collection_cat or [])
+        sizes_in_db.update(sizes or [])
+        colors_in_db.update(colors or [])
+    collections = order_like_choices('collection', collections_in_db)
+    sizes = order_like_choices('size', sizes_in_db)
 
     # Colors (use COLOR_CHOICES order, only existing in DB)
     color_master_list = [c[0] for c in Product.COLOR_CHOICES]
-    colors_in_db = set()
-    for p in men_products:
-        colors_in_db.update(p.colors or [])
     colors = [c for c in color_master_list if c in colors_in_db]
 
     # Brands
-    brands = [b for b in men_products.values_list('brand', flat=True).distinct() if b]
+    brands = order_like_choices('brand', men_products.values_list('brand', flat=True).distinct())
 
     # Price ranges (display vs filter)
-    price_ranges = []
-    step = 50
-    for i in range(0, 500, step):
-        if i == 0:
-            price_ranges.append((f"{i}-{i+step}", f"${i} - ${i+step}"))
-        else:
-            price_ranges.append((f"{i+1}-{i+step}", f"${i} - ${i+step}"))
+    price_ranges = PRICE_RANGES
 
     # --- Prepare context for template ---
     context = {
@@ -1166,6 +1085,7 @@ def men_shop(request):
     return render(request, 'shop/men_shop.html', context)
 
 
+@page_cache(Cosmetic)
 def cosmetic(request):
     """
     Build three collection lists for the cosmetics slider:
@@ -1234,6 +1154,8 @@ def cosmetic(request):
     return render(request, 'shop/cosmetic.html', context)
 
 
+@detail_conditional(Cosmetic, 'cosmetic_product_id', 'shop/cosmetic_info.html')
+@page_cache(Cosmetic, stale_on_change=False)
 def cosmetic_info(request, cosmetic_product_id):
     """
     Cosmetic product detail page by numeric cosmetic_product_id.
@@ -1283,6 +1205,7 @@ def cosmetic_info(request, cosmetic_product_id):
     return render(request, 'shop/cosmetic_info.html', context)
 
 
+@page_cache(Jewellery)
 def jewellery(request):
     """
     Build three collection lists for the jewellery slider:
@@ -1351,6 +1274,8 @@ def jewellery(request):
     return render(request, 'shop/jewellery.html', context)
 
 
+@detail_conditional(Jewellery, 'jewellery_product_id', 'shop/jewellery_info.html')
+@page_cache(Jewellery, stale_on_change=False)
 def jewellery_info(request, jewellery_product_id):
     """
     Jewellery product detail page by numeric jewellery_product_id.
@@ -1398,6 +1323,7 @@ def jewellery_info(request, jewellery_product_id):
     return render(request, 'shop/jewellery_info.html', context)
 
 
+@page_cache(Bag)
 def bags(request):
     """
     Build three collection lists for the bags slider:
@@ -1466,6 +1392,8 @@ def bags(request):
     return render(request, 'shop/bags.html', context)
 
 
+@detail_conditional(Bag, 'bag_product_id', 'shop/bags_info.html')
+@page_cache(Bag, stale_on_change=False)
 def bags_info(request, bag_product_id):
     """
     Bag product detail page by numeric bag_product_id.
@@ -1513,6 +1441,7 @@ def bags_info(request, bag_product_id):
     return render(request, 'shop/bags_info.html', context)
 
 
+@page_cache(Shoes)
 def shoes(request):
     """
     Build three collection lists for the shoes slider:
@@ -1581,6 +1510,8 @@ def shoes(request):
     return render(request, 'shop/shoes.html', context)
 
 
+@detail_conditional(Shoes, 'shoes_product_id', 'shop/shoes_info.html')
+@page_cache(Shoes, stale_on_change=False)
 def shoes_info(request, shoes_product_id):
     """
     Shoes product detail page by numeric shoes_product_id.
@@ -1628,6 +1559,12 @@ def shoes_info(request, shoes_product_id):
     return render(request, 'shop/shoes_info.html', context)
 
 
+@require_http_methods(['GET', 'HEAD'])
+def resized_image(request, width, height, path):
+    """/img/<w>x<h>/<media path>: resized from MEDIA_ROOT via the disk cache (shop/imagecache.py)."""
+    return imagecache.serve(request, width, height, path)
+
+
 def faqs(request):
     return render(request, 'shop/faqs.html')
 
@@ -1688,15 +1625,15 @@ def order_view(request):
         for it in items:
             normalized_items.append({
                 'name': it.get('product_name') or it.get('name') or '',
-                'price': it.get('price', 0),
+                'price_cents': item_cents(it, 'price'),
                 'size': it.get('size', '-'),
                 'quantity': it.get('quantity', 0),
-                'subtotal': it.get('subtotal', 0),
+                'subtotal_cents': item_cents(it, 'subtotal'),
             })
 
         orders.append({
             'created_at': order.created_at,
-            'total_price': order.total_price,
+            'total_cents': order.total_cents,
             'order_items': normalized_items,
         })
 
@@ -1816,6 +1753,8 @@ def add_to_wishlist(request, category, item_id):
         }
     )
 
+    add_wishlist_member(request, category, item_id)
+
     if created:
         messages.success(request, f"'{title}' added to your wishlist ❤️")
     else:
@@ -1825,23 +1764,41 @@ def add_to_wishlist(request, category, item_id):
 
 
 # ---- wishlist_view ----
+WISHLIST_PAGE_SIZE = 24
+
+
 def wishlist_view(request):
     """
-    Shows the user's wishlist. Returns enriched items with:
+    Shows the user's wishlist (paginated). Returns enriched items with:
     id, category, product_id (item_product_id), title, price (string), image_url, hover_url, detail_url
+    Catalog objects for the page are hydrated with one in_bulk() query per category.
     """
     customer_id = request.session.get('customer_id')
     if not customer_id:
         messages.warning(request, "Please log in to view your wishlist.")
         return redirect('login')
 
-    raw_items = Wishlist.objects.filter(customer_id=customer_id).order_by('-created_at')
+    # served by the (customer_id, created_at) index
+    raw_items = Wishlist.objects.filter(customer_id=customer_id).order_by('-created_at', '-id')
+    page_obj = Paginator(raw_items, WISHLIST_PAGE_SIZE).get_page(request.GET.get('page'))
+    rows = list(page_obj.object_list)
+
+    # group this page's rows by category -> one in_bulk query per category
+    ids_by_category = {}
+    for w in rows:
+        category = w.category or 'product'
+        if w.item_product_id and category in CATEGORY_MAP:
+            ids_by_category.setdefault(category, set()).add(w.item_product_id)
+    objects_by_category = {}
+    for category, ids in ids_by_category.items():
+        model, model_id_field, _ = CATEGORY_MAP[category]
+        objects_by_category[category] = model.objects.in_bulk(ids, field_name=model_id_field)
 
     enriched = []
-    for w in raw_items:
+    for w in rows:
         # basic values from wishlist row
         title = w.title or ''
-        price = (w.price if w.price is not None else Decimal('0.00'))
+        price_cents = to_cents(w.price)
         image = w.image_url or ''
         hover = w.hover_url or image
 
@@ -1854,55 +1811,43 @@ def wishlist_view(request):
         elif product_id:
             detail_url = f"/product/{product_id}/"
 
-        # try to enrich from product model if we have a mapping and product_id
-        model_info = CATEGORY_MAP.get((w.category or 'product'))
-        if model_info and product_id:
-            model, model_id_field, detail_template = model_info
-            # try to fetch product object (safe .filter().first())
-            obj = model.objects.filter(**{model_id_field: product_id}).first()
-            if obj:
-                # fill missing data from product object
-                if not title:
-                    title = getattr(obj, 'title', None) or getattr(obj, 'name', '') or title
-                if not image:
-                    img_field = getattr(obj, 'image', None)
-                    if img_field and hasattr(img_field, 'url'):
-                        image = img_field.url
-                if not hover:
-                    hover_field = getattr(obj, 'image_hover', None)
-                    if hover_field and hasattr(hover_field, 'url'):
-                        hover = hover_field.url
-                # prefer object's price if wishlist row had zero/empty
-                try:
-                    obj_price = Decimal(str(getattr(obj, 'price', '0') or '0'))
-                    if obj_price and (not price or Decimal(price) == Decimal('0.00')):
-                        price = obj_price
-                except Exception:
-                    pass
-                # build detail url from template
-                try:
-                    detail_url = detail_template.format(id=product_id)
-                except Exception:
-                    detail_url = f"/{w.category}/{product_id}/"
-
-        # ensure price string formatted
-        try:
-            price_str = f"{Decimal(price).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP):.2f}"
-        except Exception:
-            price_str = "0.00"
+        # enrich from the hydrated product object (if any)
+        category = w.category or 'product'
+        obj = objects_by_category.get(category, {}).get(product_id)
+        if obj:
+            _, _, detail_template = CATEGORY_MAP[category]
+            # fill missing data from product object
+            if not title:
+                title = getattr(obj, 'title', None) or getattr(obj, 'name', '') or title
+            if not image:
+                img_field = getattr(obj, 'image', None)
+                if img_field and hasattr(img_field, 'url'):
+                    image = img_field.url
+            if not hover:
+                hover_field = getattr(obj, 'image_hover', None)
+                if hover_field and hasattr(hover_field, 'url'):
+                    hover = hover_field.url
+            # prefer object's price if wishlist row had zero/empty
+            if not price_cents:
+                price_cents = to_cents(getattr(obj, 'price', 0))
+            # build detail url from template
+            try:
+                detail_url = detail_template.format(id=product_id)
+            except Exception:
+                detail_url = f"/{w.category}/{product_id}/"
 
         enriched.append({
             'id': w.id,
             'category': w.category,
             'product_id': product_id,
             'title': title,
-            'price': price_str,
+            'price': format_cents(price_cents),
             'image_url': image,
             'hover_url': hover or image,
             'detail_url': detail_url,
         })
 
-    return render(request, 'shop/wishlist.html', {'wishlist_items': enriched})
+    return render(request, 'shop/wishlist.html', {'wishlist_items': enriched, 'page_obj': page_obj})
 
 
 def remove_from_wishlist(request, wishlist_id):
@@ -1913,6 +1858,7 @@ def remove_from_wishlist(request, wishlist_id):
 
     wishlist_item = get_object_or_404(Wishlist, id=wishlist_id, customer_id=customer_id)
     wishlist_item.delete()
+    discard_wishlist_member(request, wishlist_item.category or 'product', wishlist_item.item_product_id)
     messages.success(request, "Item removed from your wishlist.")
     return redirect('wishlist_view')
 
@@ -1921,3 +1867,127 @@ def remove_from_wishlist(request, wishlist_id):
 
 
 
+
+
+# wishlist category -> session cart category (wishlist uses 'bags', the cart 'bag')
+WISHLIST_TO_CART_CATEGORY = {'bags': 'bag'}
+
+
+@require_POST
+def move_wishlist_to_cart(request):
+    """
+    Move the selected wishlist rows to the cart in one round trip.
+    Accepts form field `wishlist_ids` (repeated) or JSON {"ids": [...]}.
+      - one query for the wishlist rows, one in_bulk query per category
+      - session cart + DB cart updated and wishlist rows deleted (one DELETE)
+        inside a single transaction
+    JSON requests get {moved, skipped, cart_count}; forms redirect to the cart.
+    """
+    wants_json = request.content_type == 'application/json'
+    customer_id = request.session.get('customer_id')
+    if not customer_id:
+        if wants_json:
+            return JsonResponse({'error': 'login required'}, status=401)
+        messages.warning(request, "Please log in first.")
+        return redirect('login')
+
+    if wants_json:
+        try:
+            raw_ids = json.loads(request.body.decode('utf-8') or '{}').get('ids', [])
+        except Exception:
+            return HttpResponseBadRequest("Invalid JSON")
+    else:
+        raw_ids = request.POST.getlist('wishlist_ids')
+    ids = set()
+    for raw in raw_ids if isinstance(raw_ids, list) else []:
+        try:
+            ids.add(int(raw))
+        except (TypeError, ValueError):
+            continue
+
+    rows = list(Wishlist.objects.filter(customer_id=customer_id, id__in=ids)) if ids else []
+
+    # resolve the catalog objects: one in_bulk query per category
+    ids_by_category = {}
+    for w in rows:
+        category = w.category or 'product'
+        if w.item_product_id and category in CATEGORY_MAP:
+            ids_by_category.setdefault(category, set()).add(w.item_product_id)
+    objects_by_category = {}
+    for category, item_ids in ids_by_category.items():
+        model, model_id_field, _ = CATEGORY_MAP[category]
+        objects_by_category[category] = model.objects.in_bulk(item_ids, field_name=model_id_field)
+
+    cart = request.session.get('cart', {})
+    added = {}      # cart_key -> line to merge (quantity 1 per wishlist row)
+    moved, skipped = [], []
+    for w in rows:
+        category = w.category or 'product'
+        obj = objects_by_category.get(category, {}).get(w.item_product_id)
+        if obj is None or getattr(obj, 'available', True) is False:
+            skipped.append(w.id)
+            continue
+
+        cart_category = WISHLIST_TO_CART_CATEGORY.get(category, category)
+        # same size / key rules as add_to_cart (default size for clothes)
+        selected_size = None
+        if cart_category == 'product':
+            available_sizes = list(getattr(obj, 'sizes', []) or [])
+            selected_size = (available_sizes[0] if available_sizes else SIZE_ORDER[0]).upper()
+        cart_key = f"{w.item_product_id}_{selected_size}" if selected_size else f"{cart_category}_{w.item_product_id}"
+
+        if getattr(obj, 'image', None) and hasattr(obj.image, 'url'):
+            image_url = obj.image.url
+        else:
+            image_url = w.image_url or static('images/product-images/default-product.jpg')
+
+        line = added.get(cart_key)
+        if line is None:
+            line = added[cart_key] = {
+                'product_id': getattr(obj, 'product_id', getattr(obj, 'cosmetic_product_id', None)),
+                'name': getattr(obj, 'title', getattr(obj, 'name', 'Item')),
+                'price_cents': size_price_cents(to_cents(getattr(obj, 'price', 0)), selected_size),
+                'quantity': 0,
+                'image': image_url,
+            }
+            if selected_size:
+                line['size'] = selected_size
+        line['quantity'] += 1
+        moved.append(w)
+
+    if moved:
+        with transaction.atomic():
+            customer = Customer_Table.objects.filter(customer_id=customer_id).first()
+            if customer:
+                sync_session_items_to_db(customer, added)
+            Wishlist.objects.filter(pk__in=[w.pk for w in moved]).delete()
+
+        for cart_key, line in added.items():
+            if cart_key in cart:
+                cart[cart_key]['quantity'] = int(cart[cart_key].get('quantity', 0)) + line['quantity']
+                cart[cart_key]['price_cents'] = line['price_cents']
+                cart[cart_key].pop('price', None)  # drop legacy string price
+            else:
+                cart[cart_key] = line
+        request.session['cart'] = cart
+        request.session['cart_count'] = sum(int(i.get('quantity', 0)) for i in cart.values())
+        request.session.modified = True
+        refresh_cart_members(request, cart)
+        for w in moved:
+            discard_wishlist_member(request, w.category or 'product', w.item_product_id)
+
+    if wants_json:
+        return JsonResponse({
+            'moved': [w.id for w in moved],
+            'skipped': skipped,
+            'cart_count': request.session.get('cart_count', 0),
+        })
+
+    if moved:
+        messages.success(request, f"Moved {len(moved)} item{'s' if len(moved) != 1 else ''} to your cart.")
+    if skipped:
+        messages.warning(request, f"{len(skipped)} item{'s are' if len(skipped) != 1 else ' is'} no longer available and stayed in your wishlist.")
+    if not moved and not skipped:
+        messages.info(request, "Select the wishlist items to move to your cart.")
+        return redirect('wishlist_view')
+    return redirect('cart_detail')